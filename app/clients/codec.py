@@ -0,0 +1,132 @@
+"""
+Кодеки сообщений Kafka.
+
+Формат сообщения определяется по первому байту, поэтому потребители читают
+все форматы сразу, а продюсеры переключаются настройкой KAFKA_CODEC без
+одновременной выкладки:
+
+- JSON без заголовка (первый байт «{») — прежний формат, его пишет кодек json;
+- двоичные форматы начинаются с заголовка MAGIC, codec_id.
+
+struct — упакованная запись фиксированного размера для запроса модерации;
+сообщения других видов (DLQ и т.п.) этот кодек пишет как JSON.
+msgpack доступен, если установлен пакет msgpack.
+"""
+
+import json
+import struct
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+try:
+    import msgpack
+except ImportError:  # необязательная зависимость
+    msgpack = None
+
+MAGIC = 0x00
+MSGPACK_ID = 2
+STRUCT_ID = 3
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# schema_version, флаги присутствия полей, item_id, task_id, retry_count,
+# timestamp (мкс от эпохи, без часового пояса, как datetime.now()), retry_at
+_RECORD = struct.Struct("<BBqqHqd")
+_RECORD_FIELDS = frozenset(
+    ("schema_version", "item_id", "task_id", "retry_count", "timestamp", "retry_at")
+)
+_HAS_TASK_ID, _HAS_RETRY_COUNT, _HAS_TIMESTAMP, _HAS_RETRY_AT = 1, 2, 4, 8
+
+
+class CodecError(ValueError):
+    """Сообщение в неизвестном или недоступном формате"""
+
+
+def _pack_record(payload: Dict[str, Any]) -> Optional[bytes]:
+    """Запрос модерации в упакованном виде или None, если payload в запись не помещается"""
+    if not payload.keys() <= _RECORD_FIELDS or "item_id" not in payload:
+        return None
+    try:
+        flags = 0
+        task_id = payload.get("task_id")
+        if task_id is not None:
+            flags |= _HAS_TASK_ID
+        if "retry_count" in payload:
+            flags |= _HAS_RETRY_COUNT
+        timestamp = payload.get("timestamp")
+        if timestamp is not None:
+            flags |= _HAS_TIMESTAMP
+            timestamp = (datetime.fromisoformat(timestamp) - _EPOCH) // _MICROSECOND
+        if "retry_at" in payload:
+            flags |= _HAS_RETRY_AT
+        return _RECORD.pack(
+            payload.get("schema_version", 1),
+            flags,
+            payload["item_id"],
+            task_id or 0,
+            payload.get("retry_count", 0),
+            timestamp or 0,
+            payload.get("retry_at", 0.0),
+        )
+    except (TypeError, ValueError, struct.error):
+        # Нестандартные значения (строковый item_id, отрицательный счётчик...) — в JSON
+        return None
+
+
+def _unpack_record(data: bytes) -> Dict[str, Any]:
+    schema_version, flags, item_id, task_id, retry_count, timestamp, retry_at = (
+        _RECORD.unpack_from(data, 2)
+    )
+    payload: Dict[str, Any] = {
+        "schema_version": schema_version,
+        "item_id": item_id,
+        "task_id": task_id if flags & _HAS_TASK_ID else None,
+    }
+    if flags & _HAS_TIMESTAMP:
+        payload["timestamp"] = (_EPOCH + timestamp * _MICROSECOND).isoformat()
+    if flags & _HAS_RETRY_COUNT:
+        payload["retry_count"] = retry_count
+    if flags & _HAS_RETRY_AT:
+        payload["retry_at"] = retry_at
+    return payload
+
+
+def _json(payload: Dict[str, Any]) -> bytes:
+    return json.dumps(payload).encode("utf-8")
+
+
+def check_codec(codec: str) -> None:
+    if codec not in ("json", "msgpack", "struct"):
+        raise CodecError(f"Неизвестный кодек сообщений: {codec}")
+    if codec == "msgpack" and msgpack is None:
+        raise CodecError("Кодек msgpack требует пакет msgpack")
+
+
+def encode(payload: Dict[str, Any], codec: str = "json") -> bytes:
+    """Сериализация сообщения выбранным кодеком (json | msgpack | struct)"""
+    if codec == "struct":
+        record = _pack_record(payload)
+        if record is not None:
+            return bytes((MAGIC, STRUCT_ID)) + record
+        return _json(payload)
+    if codec == "msgpack":
+        check_codec(codec)
+        return bytes((MAGIC, MSGPACK_ID)) + msgpack.packb(payload)
+    return _json(payload)
+
+
+def decode(data: bytes) -> Dict[str, Any]:
+    """Десериализация сообщения любого формата; JSON без заголовка — прежний формат"""
+    if not data or data[0] != MAGIC:
+        return json.loads(data)
+    if len(data) < 2:
+        raise CodecError("Обрезанный заголовок сообщения")
+    codec_id = data[1]
+    if codec_id == STRUCT_ID:
+        return _unpack_record(data)
+    if codec_id == MSGPACK_ID:
+        if msgpack is None:
+            raise CodecError("Сообщение в формате msgpack, но пакет msgpack не установлен")
+        return msgpack.unpackb(data[2:])
+    raise CodecError(f"Неизвестный формат сообщения: {codec_id}")
@@ -1,27 +1,203 @@
-import json
+import asyncio
+import time
 from datetime import datetime
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 from aiokafka import AIOKafkaProducer
 
+from app.clients.codec import check_codec, encode
+from app.clients.settings import (
+    KAFKA_ACKS,
+    KAFKA_CODEC,
+    KAFKA_COMPRESSION,
+    KAFKA_LINGER_MS,
+    KAFKA_MAX_BATCH_BYTES,
+    KAFKA_MAX_BUFFERED_MESSAGES,
+    TOPIC,
+)
+from app.metrics import Counter, Gauge, Histogram
+
+# Версия схемы сообщения запроса модерации. Версия 1 (поле отсутствует) несёт
+# только item_id, и воркер ищет pending-задачу в БД; с версии 2 в сообщении
+# есть task_id
+MODERATION_SCHEMA_VERSION = 2
+
+DELIVERY_TIME = Histogram(
+    "kafka_producer_delivery_seconds",
+    "Время от send до подтверждения брокером",
+    labelnames=("topic",),
+)
+DELIVERY_ERRORS = Counter(
+    "kafka_producer_delivery_errors_total", "Неподтверждённые сообщения", labelnames=("topic",)
+)
+BATCH_MESSAGES = Histogram(
+    "kafka_producer_batch_messages",
+    "Сообщения, подтверждённые брокером одним батчем партиции",
+    labelnames=("topic",),
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+BUFFERED = Gauge("kafka_producer_buffered_messages", "Отправленные и ещё не подтверждённые")
+BUFFER_WAIT = Histogram("kafka_producer_buffer_wait_seconds", "Ожидание места в буфере продюсера")
+
+
+def item_key(item_id: int) -> bytes:
+    """
+    Ключ сообщения по объявлению. Разделитель продюсера по умолчанию
+    (murmur2 от ключа, как в Java-клиенте) отправляет все сообщения одного
+    item_id в одну партицию: порядок по объявлению сохраняется, а воркер
+    партиции видит все её объявления.
+    """
+    return str(item_id).encode("utf-8")
+
+
+def moderation_request(item_id: int, task_id: Optional[int] = None) -> dict:
+    """Сообщение запроса модерации для TOPIC"""
+    return {
+        "schema_version": MODERATION_SCHEMA_VERSION,
+        "item_id": item_id,
+        "task_id": task_id,
+        "timestamp": datetime.now().isoformat(),
+    }
+
 
 class KafkaProducer:
-    def __init__(self, bootstrap_servers: str):
+    """
+    Продюсер сообщений поверх AIOKafkaProducer; формат задаёт codec
+    (json, msgpack или struct, см. app.clients.codec).
+
+    Сообщения копятся до linger_ms или max_batch_bytes на партицию и уходят
+    батчами (при compression — сжатыми). send() возвращает future подтверждения,
+    не дожидаясь брокера; send_json() ждёт подтверждения. Неподтверждённых
+    сообщений не больше max_buffered: дальше send() ждёт свободного места.
+    """
+
+    def __init__(
+        self,
+        bootstrap_servers: str,
+        linger_ms: int = KAFKA_LINGER_MS,
+        max_batch_bytes: int = KAFKA_MAX_BATCH_BYTES,
+        compression: Optional[str] = KAFKA_COMPRESSION,
+        acks: Union[int, str] = KAFKA_ACKS,
+        max_buffered: int = KAFKA_MAX_BUFFERED_MESSAGES,
+        codec: str = KAFKA_CODEC,
+    ):
+        check_codec(codec)
         self._bootstrap = bootstrap_servers
+        self.codec = codec
+        self.linger_ms = linger_ms
+        self.max_batch_bytes = max_batch_bytes
+        self.compression = compression
+        self.acks = acks
+        self.max_buffered = max_buffered
         self._producer = None  # AIOKafkaProducer
+        self._buffer: Optional[asyncio.Semaphore] = None
+        # Подтверждения текущего прохода цикла событий по партициям
+        self._acked: Dict = {}
 
     async def start(self) -> None:
-        self._producer = AIOKafkaProducer(bootstrap_servers=self._bootstrap)
+        self._buffer = asyncio.Semaphore(self.max_buffered)
+        self._producer = AIOKafkaProducer(
+            bootstrap_servers=self._bootstrap,
+            linger_ms=self.linger_ms,
+            max_batch_size=self.max_batch_bytes,
+            compression_type=self.compression,
+            acks=self.acks,
+        )
         await self._producer.start()
 
     async def stop(self) -> None:
         if self._producer:
+            # stop() дожидается отправки накопленных батчей
             await self._producer.stop()
 
-    async def send_json(self, topic: str, payload: dict) -> None:
+    async def send(self, topic: str, payload: dict, key: Optional[bytes] = None) -> asyncio.Future:
+        """Постановка сообщения в батч; возвращает future с RecordMetadata"""
         assert self._producer is not None
-        data = json.dumps(payload).encode("utf-8")
-        await self._producer.send_and_wait(topic, data)
+        data = encode(payload, self.codec)
+
+        if self._buffer.locked():
+            with BUFFER_WAIT.time():
+                await self._buffer.acquire()
+        else:
+            await self._buffer.acquire()
+        BUFFERED.inc()
+
+        started = time.perf_counter()
+        try:
+            delivery = await self._producer.send(topic, data, key=key)
+        except BaseException:
+            self._release()
+            raise
+        delivery.add_done_callback(partial(self._on_delivery, topic, started))
+        return delivery
+
+    def _release(self) -> None:
+        self._buffer.release()
+        BUFFERED.dec()
+
+    def _on_delivery(self, topic: str, started: float, future: asyncio.Future) -> None:
+        self._release()
+        if future.cancelled() or future.exception() is not None:
+            DELIVERY_ERRORS.inc(topic=topic)
+            return
+        DELIVERY_TIME.observe(time.perf_counter() - started, topic=topic)
+
+        # Подтверждения одного батча приходят в одном проходе цикла событий:
+        # считаем их по партиции и фиксируем размер в следующем проходе
+        tp = future.result().topic_partition
+        if tp not in self._acked:
+            self._acked[tp] = 0
+            asyncio.get_running_loop().call_soon(self._observe_batch, tp)
+        self._acked[tp] += 1
+
+    def _observe_batch(self, tp) -> None:
+        BATCH_MESSAGES.observe(self._acked.pop(tp), topic=tp.topic)
+
+    async def send_json(self, topic: str, payload: dict, key: Optional[bytes] = None) -> None:
+        """Отправка с ожиданием подтверждения"""
+        await (await self.send(topic, payload, key=key))
+
+    async def send_many(
+        self,
+        topic: str,
+        payloads: Iterable[dict],
+        keys: Optional[Iterable[Optional[bytes]]] = None,
+    ) -> None:
+        """
+        Отправка пачки сообщений без ожидания каждого: продюсер собирает их
+        в батчи по партициям, ждём только подтверждения всех вместе.
+        keys — ключи сообщений в том же порядке, что payloads.
+        """
+        payloads = list(payloads)
+        keys = [None] * len(payloads) if keys is None else list(keys)
+        deliveries = [
+            await self.send(topic, payload, key=key) for payload, key in zip(payloads, keys)
+        ]
+        await asyncio.gather(*deliveries)
+
+    async def send_moderation_request(
+        self, item_id: int, task_id: Optional[int] = None, wait: bool = True
+    ) -> asyncio.Future:
+        """
+        Запрос модерации в TOPIC. С wait=False возвращается сразу после постановки
+        в батч, подтверждение — в возвращённом future.
+        """
+        delivery = await self.send(
+            TOPIC, moderation_request(item_id, task_id), key=item_key(item_id)
+        )
+        if wait:
+            await delivery
+        return delivery
 
-    async def send_moderation_request(self, item_id: int) -> None:
-        payload = {"item_id": item_id, "timestamp": datetime.now().isoformat()}
-        await self.send_json("moderation", payload)
+    async def send_moderation_requests(
+        self, tasks: Iterable[Tuple[int, int]]
+    ) -> List[asyncio.Future]:
+        """
+        Запросы модерации для пар (item_id, task_id) одной пачкой: все сообщения
+        ставятся в батчи без ожидания, подтверждения — в возвращённых future.
+        """
+        return [
+            await self.send(TOPIC, moderation_request(item_id, task_id), key=item_key(item_id))
+            for item_id, task_id in tasks
+        ]
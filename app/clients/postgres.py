@@ -1,6 +1,6 @@
 import os
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Awaitable, Callable, Optional
 
 import asyncpg
 
@@ -21,3 +21,28 @@ async def get_pg_connection() -> AsyncGenerator[asyncpg.Connection, None]:
     yield connection
 
     await connection.close()
+
+
+async def create_pg_pool(
+    min_size: int = 1,
+    max_size: int = 10,
+    init: Optional[Callable[[asyncpg.Connection], Awaitable[None]]] = None,
+    command_timeout: Optional[float] = None,
+) -> asyncpg.Pool:
+    """
+    Пул соединений с теми же параметрами подключения, что и get_pg_connection.
+
+    init вызывается для каждого нового соединения, в том числе для тех,
+    что пул создаёт взамен разорванных.
+    """
+    return await asyncpg.create_pool(
+        user=os.getenv("DB_USER", "postgres"),
+        password=os.getenv("DB_PASSWORD", "postgres"),
+        database=os.getenv("DB_NAME", "moderation"),
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "6432")),
+        min_size=min_size,
+        max_size=max_size,
+        init=init,
+        command_timeout=command_timeout,
+    )
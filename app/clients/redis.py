@@ -1,20 +1,32 @@
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
 import redis.asyncio as redis
 
 from app.clients import settings
 
+_url = f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}"
+
 _pool = redis.ConnectionPool.from_url(
-    f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}",
+    _url,
     decode_responses=True,
     max_connections=1,
 )
 
+# Пул для записи результатов воркером: параллельные обработчики ждут
+# свободного соединения, а не получают ошибку превышения max_connections
+results_pool = redis.BlockingConnectionPool.from_url(
+    _url,
+    decode_responses=True,
+    max_connections=settings.REDIS_RESULTS_MAX_CONNECTIONS,
+)
+
 
 @asynccontextmanager
-async def get_redis_connection() -> AsyncGenerator[redis.Redis, None]:
-    connection = redis.Redis(connection_pool=_pool)
+async def get_redis_connection(
+    connection_pool: Optional[redis.ConnectionPool] = None,
+) -> AsyncGenerator[redis.Redis, None]:
+    connection = redis.Redis(connection_pool=connection_pool or _pool)
     try:
         yield connection
     finally:
@@ -9,7 +9,32 @@ TOPIC = os.getenv("TOPIC", "moderation")
 DLQ_TOPIC = os.getenv("DLQ_TOPIC", "moderation_dlq")
 CONSUMER_GROUP = os.getenv("CONSUMER_GROUP", "moderation-worker")
 
+# Продюсер Kafka: батч партиции уходит через KAFKA_LINGER_MS или при заполнении
+# KAFKA_MAX_BATCH_BYTES. KAFKA_COMPRESSION: none | gzip | snappy | lz4 | zstd
+# (кроме gzip нужны дополнительные пакеты). KAFKA_ACKS: all | 1 | 0
+KAFKA_LINGER_MS = int(os.getenv("KAFKA_LINGER_MS", "5"))
+KAFKA_MAX_BATCH_BYTES = int(os.getenv("KAFKA_MAX_BATCH_BYTES", "65536"))
+KAFKA_COMPRESSION = os.getenv("KAFKA_COMPRESSION", "gzip")
+KAFKA_COMPRESSION = None if KAFKA_COMPRESSION == "none" else KAFKA_COMPRESSION
+KAFKA_ACKS = os.getenv("KAFKA_ACKS", "all")
+KAFKA_ACKS = KAFKA_ACKS if KAFKA_ACKS == "all" else int(KAFKA_ACKS)
+# Формат сообщений продюсеров: json | msgpack | struct (app.clients.codec).
+# Потребители читают все форматы, поэтому сначала выкладываются они
+KAFKA_CODEC = os.getenv("KAFKA_CODEC", "json")
+# Предел неподтверждённых сообщений продюсера, дальше send ждёт
+KAFKA_MAX_BUFFERED_MESSAGES = int(os.getenv("KAFKA_MAX_BUFFERED_MESSAGES", "10000"))
+# async_predict ждёт подтверждения брокера; false — ответ сразу после постановки
+# в батч, а при ошибке доставки задача помечается failed позже
+KAFKA_WAIT_FOR_ACK = os.getenv("KAFKA_WAIT_FOR_ACK", "true") == "true"
+# async_predict пишет запрос в moderation_outbox в транзакции с задачей
+# и не ходит в Kafka; публикует outbox_relay
+USE_OUTBOX = os.getenv("USE_OUTBOX", "false") == "true"
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+OUTBOX_POLL_INTERVAL_MS = float(os.getenv("OUTBOX_POLL_INTERVAL_MS", "100"))
+
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
 API_PORT = int(os.getenv("API_PORT", "8003"))
+API_WORKERS = int(os.getenv("API_WORKERS", "0"))  # 0 — по числу CPU
 
 DB_USER = os.getenv("DB_USER", "postgres")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "postgres")
@@ -20,12 +45,70 @@ DB_PORT = os.getenv("DB_PORT", "5432")
 PG_DSN = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
+# Базовая задержка повтора: попытка n ждёт ~RETRY_DELAY_SECONDS * 2**(n-1) с джиттером
 RETRY_DELAY_SECONDS = int(os.getenv("RETRY_DELAY_SECONDS", "5"))
+RETRY_MAX_DELAY_SECONDS = int(os.getenv("RETRY_MAX_DELAY_SECONDS", "300"))
+# Отложенные повторы: топики {RETRY_TOPIC_PREFIX}_{n} для каждой попытки n
+RETRY_TOPIC_PREFIX = os.getenv("RETRY_TOPIC_PREFIX", f"{TOPIC}_retry")
+RETRY_CONSUMER_GROUP = os.getenv("RETRY_CONSUMER_GROUP", "moderation-retry")
+RETRY_MAX_PENDING = int(os.getenv("RETRY_MAX_PENDING", "10000"))
+# Повтор сообщений из DLQ (app.workers.dlq_replay)
+DLQ_REPLAY_GROUP = os.getenv("DLQ_REPLAY_GROUP", "moderation-dlq-replay")
+DLQ_REPLAY_BATCH_SIZE = int(os.getenv("DLQ_REPLAY_BATCH_SIZE", "1000"))
+
+# Повторный async_predict для объявления с pending-задачей не старше этого срока
+# возвращает её task_id без новой задачи и сообщения; 0 отключает склейку
+MODERATION_COALESCE_SECONDS = float(os.getenv("MODERATION_COALESCE_SECONDS", "300"))
+
+WORKER_MODE = os.getenv("WORKER_MODE", "single")  # single | batch | concurrent
+WORKER_BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", "500"))
+WORKER_BATCH_TIMEOUT_MS = int(os.getenv("WORKER_BATCH_TIMEOUT_MS", "100"))
+# Commit смещений раз в N сообщений или T мс (1 и 0 — после каждого сообщения)
+WORKER_COMMIT_EVERY_MESSAGES = int(os.getenv("WORKER_COMMIT_EVERY_MESSAGES", "100"))
+WORKER_COMMIT_INTERVAL_MS = float(os.getenv("WORKER_COMMIT_INTERVAL_MS", "1000"))
+# Предел одновременно обрабатываемых сообщений в режиме concurrent
+WORKER_MAX_IN_FLIGHT = int(os.getenv("WORKER_MAX_IN_FLIGHT", "32"))
+# Размер пула БД воркера, 0 — по режиму (WORKER_MAX_IN_FLIGHT для concurrent, иначе 2)
+WORKER_DB_POOL_SIZE = int(os.getenv("WORKER_DB_POOL_SIZE", "0"))
+WORKER_DB_COMMAND_TIMEOUT_SECONDS = float(os.getenv("WORKER_DB_COMMAND_TIMEOUT_SECONDS", "10"))
+# Число процессов воркера под общим супервизором (--processes), 1 — без супервизора
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "1"))
+WORKER_STATUS_INTERVAL_SECONDS = float(os.getenv("WORKER_STATUS_INTERVAL_SECONDS", "30"))
+# HTTP /metrics воркера; процесс n под супервизором слушает порт WORKER_METRICS_PORT + n,
+# 0 отключает
+WORKER_METRICS_HOST = os.getenv("WORKER_METRICS_HOST", "0.0.0.0")
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9100"))
+# Локальный кэш признаков объявления (с верификацией продавца) на партицию воркера:
+# предел записей одной партиции (0 отключает) и срок жизни записи — столько
+# изменения объявления или продавца могут не доходить до модерации
+WORKER_FEATURE_CACHE_SIZE = int(os.getenv("WORKER_FEATURE_CACHE_SIZE", "10000"))
+WORKER_FEATURE_CACHE_TTL_SECONDS = float(os.getenv("WORKER_FEATURE_CACHE_TTL_SECONDS", "30"))
 
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))
-REDIS_TTL = int(os.getenv("REDIS_TTL_DAYS", 1)) * 24 * 60 * 60  # TTL для кэша пользователей
+# TTL записей UserRedisStorage (в том числе moderation_result:{task_id} из GET
+# /moderation_result) и результатов, которые воркер пишет в кэш сам, в секундах
+REDIS_TTL = int(os.getenv("REDIS_TTL_DAYS", 1)) * 24 * 60 * 60
 REDIS_TTL_PREDICTION = int(
     os.getenv("REDIS_TTL_PREDICTION", 3600)
 )  # TTL для предсказаний (в секундах)
+# Запись готовых результатов воркером в кэш moderation_result:{task_id}
+WORKER_CACHE_RESULTS = os.getenv("WORKER_CACHE_RESULTS", "true") == "true"
+RESULT_CACHE_TIMEOUT_SECONDS = float(os.getenv("RESULT_CACHE_TIMEOUT_SECONDS", "0.5"))
+REDIS_RESULTS_MAX_CONNECTIONS = int(os.getenv("REDIS_RESULTS_MAX_CONNECTIONS", "8"))
+
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", ".model_cache")
+# Период проверки новой версии модели, 0 отключает горячую перезагрузку
+MODEL_RELOAD_INTERVAL_SECONDS = float(os.getenv("MODEL_RELOAD_INTERVAL_SECONDS", "60"))
+
+INFERENCE_BATCHING = os.getenv("INFERENCE_BATCHING", "true") == "true"
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "64"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "2"))
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "native")  # sklearn | native | lookup
+LOOKUP_DESCRIPTION_STEP = int(os.getenv("LOOKUP_DESCRIPTION_STEP", "10"))
+LOOKUP_TOLERANCE = float(os.getenv("LOOKUP_TOLERANCE", "0.001"))
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")  # none | thread | process
+INFERENCE_EXECUTOR_WORKERS = int(os.getenv("INFERENCE_EXECUTOR_WORKERS", "1"))
+PREDICT_BATCH_MAX_ITEMS = int(os.getenv("PREDICT_BATCH_MAX_ITEMS", "10000"))
+ASYNC_PREDICT_BATCH_MAX_ITEMS = int(os.getenv("ASYNC_PREDICT_BATCH_MAX_ITEMS", "10000"))
@@ -0,0 +1,5 @@
+-- Числовая версия модели, посчитавшей результат (номер в реестре MLflow
+-- или mtime_ns файла model.pkl): повторная доставка сообщения не должна
+-- перезаписывать результат более новой модели
+ALTER TABLE moderation_results
+ADD COLUMN model_version BIGINT;
@@ -0,0 +1,6 @@
+-- Поиск последней pending-задачи объявления для сообщений старой схемы
+-- без task_id (WorkerRepository.find_pending_task(s)); готовые результаты
+-- в индекс не попадают, поэтому он остаётся маленьким
+CREATE INDEX IF NOT EXISTS idx_moderation_results_pending_item
+ON moderation_results (item_id, created_at DESC)
+WHERE status = 'pending';
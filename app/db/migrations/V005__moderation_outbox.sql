@@ -0,0 +1,9 @@
+-- Outbox запросов модерации: строка пишется в одной транзакции с задачей,
+-- outbox_relay публикует строки в Kafka пачками и удаляет опубликованные
+CREATE TABLE IF NOT EXISTS public.moderation_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    topic TEXT NOT NULL,
+    key TEXT,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
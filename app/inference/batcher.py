@@ -0,0 +1,155 @@
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from app.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = Histogram(
+    "inference_batch_size",
+    "Количество строк в одном вызове модели",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
+BATCH_FILL = Histogram(
+    "inference_batch_fill_ratio",
+    "Заполненность батча относительно max_batch_size",
+    buckets=(0.1, 0.25, 0.5, 0.75, 0.9, 1.0),
+)
+QUEUE_WAIT = Histogram(
+    "inference_queue_wait_seconds",
+    "Время ожидания запроса в очереди батчера",
+)
+BATCHES = Counter("inference_batches_total", "Количество выполненных батчей")
+BATCH_ERRORS = Counter("inference_batch_errors_total", "Количество батчей, завершившихся ошибкой")
+
+# Функция предсказания может быть синхронной или возвращать awaitable (исполнитель инференса)
+PredictFn = Callable[[Any, np.ndarray], Union[np.ndarray, Awaitable[np.ndarray]]]
+
+
+@dataclass
+class _PendingRow:
+    model: Any
+    features: np.ndarray
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class MicroBatcher:
+    """
+    Собирает одновременные запросы к модели в один векторизованный вызов.
+
+    Батч отправляется в модель, когда набрано max_batch_size строк или
+    с момента прихода первой строки прошло max_wait_ms миллисекунд.
+    Строки группируются по объекту модели, поэтому запрос всегда
+    оценивается той моделью, с которой он был поставлен в очередь.
+    """
+
+    def __init__(
+        self,
+        predict_fn: PredictFn,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size должен быть положительным")
+        self._predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Строки, уже взятые из очереди: собираемый или выполняемый батч
+        self._batch: List[_PendingRow] = []
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # Ожидающие запросы получают ошибку, а не висят до таймаута клиента
+        rows, self._batch = self._batch, []
+        while self._queue is not None and not self._queue.empty():
+            rows.append(self._queue.get_nowait())
+        for row in rows:
+            if not row.future.done():
+                row.future.set_exception(RuntimeError("Батчер остановлен"))
+
+    async def predict(self, model, features: np.ndarray) -> float:
+        """Вероятность нарушения для одной строки признаков (матрица 1xN)"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_PendingRow(model=model, features=features, future=future))
+        return await future
+
+    async def _collect(self) -> List[_PendingRow]:
+        first = await self._queue.get()
+        batch = self._batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            await self._execute(batch)
+
+    async def _execute(self, batch: List[_PendingRow]) -> None:
+        started = time.perf_counter()
+        for row in batch:
+            QUEUE_WAIT.observe(started - row.enqueued_at)
+
+        groups: Dict[int, List[_PendingRow]] = {}
+        for row in batch:
+            groups.setdefault(id(row.model), []).append(row)
+
+        for rows in groups.values():
+            BATCHES.inc()
+            BATCH_SIZE.observe(len(rows))
+            BATCH_FILL.observe(len(rows) / self.max_batch_size)
+
+            try:
+                matrix = np.vstack([row.features for row in rows])
+                probas = self._predict_fn(rows[0].model, matrix)
+                if inspect.isawaitable(probas):
+                    probas = await probas
+            except Exception as e:
+                BATCH_ERRORS.inc()
+                logger.error(f"Ошибка предсказания батча из {len(rows)} строк: {e}")
+                for row in rows:
+                    if not row.future.done():
+                        row.future.set_exception(e)
+                continue
+
+            for row, proba in zip(rows, probas):
+                if not row.future.done():
+                    row.future.set_result(float(proba))
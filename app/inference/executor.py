@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import pickle
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from app.metrics import Gauge, Histogram
+from app.routers.utils import predict_proba
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("none", "thread", "process")
+
+QUEUE_DEPTH = Gauge(
+    "inference_executor_queue_depth", "Количество задач инференса, ожидающих или выполняемых"
+)
+RUN_TIME = Histogram("inference_executor_run_seconds", "Время выполнения задачи инференса")
+WAIT_TIME = Histogram(
+    "inference_executor_wait_seconds", "Время ожидания задачи инференса в очереди пула"
+)
+
+
+class _Preloaded:
+    """Маркер аргумента: подставить модель, загруженную в дочерний процесс"""
+
+
+_PRELOADED = _Preloaded()
+_child_model = None
+
+
+def _init_child(model_bytes: bytes) -> None:
+    global _child_model
+    _child_model = pickle.loads(model_bytes)
+
+
+def _timed_call(fn: Callable, args: tuple) -> tuple:
+    if _child_model is not None:
+        args = tuple(_child_model if isinstance(arg, _Preloaded) else arg for arg in args)
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class InferenceExecutor:
+    """
+    Выполняет инференс вне event loop.
+
+    kind="thread" — пул потоков (NumPy отпускает GIL на тяжёлых операциях),
+    kind="process" — пул процессов, в каждый из которых модель загружается
+    один раз при старте; kind="none" — вызов прямо в event loop.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 1) -> None:
+        if kind not in KINDS:
+            raise ValueError(f"Неизвестный тип исполнителя инференса: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self._pool: Optional[Executor] = None
+        self._model = None
+
+    def start(self, model=None) -> None:
+        self._model = model
+        if self.kind == "thread":
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="inference"
+            )
+        elif self.kind == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_child,
+                initargs=(pickle.dumps(model),),
+            )
+        logger.info(f"Исполнитель инференса: {self.kind}, воркеров: {self.workers}")
+
+    def set_model(self, model) -> None:
+        """Замена модели; пул процессов пересоздаётся с новой моделью"""
+        if self.kind == "process" and model is not self._model:
+            old_pool = self._pool
+            self.start(model)
+            if old_pool is not None:
+                old_pool.shutdown(wait=False)
+        else:
+            self._model = model
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """Вызов fn(*args) в пуле; время ожидания и выполнения попадают в метрики"""
+        if self._pool is None:
+            start = time.perf_counter()
+            result = fn(*args)
+            RUN_TIME.observe(time.perf_counter() - start)
+            return result
+
+        if self.kind == "process" and self._model is not None:
+            args = tuple(_PRELOADED if arg is self._model else arg for arg in args)
+
+        submitted = time.perf_counter()
+        QUEUE_DEPTH.inc()
+        try:
+            loop = asyncio.get_running_loop()
+            result, elapsed = await loop.run_in_executor(self._pool, _timed_call, fn, args)
+        finally:
+            QUEUE_DEPTH.dec()
+
+        RUN_TIME.observe(elapsed)
+        WAIT_TIME.observe(max(time.perf_counter() - submitted - elapsed, 0.0))
+        return result
+
+    async def predict_proba(self, model, features: np.ndarray) -> np.ndarray:
+        return await self.run(predict_proba, model, features)
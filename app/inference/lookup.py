@@ -0,0 +1,190 @@
+import logging
+import time
+from typing import Any, Mapping, Optional
+
+import numpy as np
+
+from app.metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+# Границы домена признаков: CHECK-ограничения advertisement (V001__initial.sql)
+# и насыщение длины описания в prepare_features
+IMAGES_QTY_MAX = 10
+CATEGORY_MAX = 100
+DESCRIPTION_LENGTH_MAX = 5000
+
+LOOKUP_MAX_ERROR = Gauge(
+    "lookup_table_max_error", "Максимальное отклонение таблицы от модели на контрольной выборке"
+)
+LOOKUP_SIZE = Gauge("lookup_table_bytes", "Размер таблицы предсказаний в байтах")
+
+
+def _features(is_verified, images_qty, description_length, category) -> np.ndarray:
+    """Нормализация как в prepare_features, но для целых столбцов домена"""
+    return np.column_stack(
+        (
+            is_verified.astype(np.float64),
+            np.minimum(images_qty / 20.0, 1.0),
+            np.minimum(description_length / float(DESCRIPTION_LENGTH_MAX), 1.0),
+            category / 100.0,
+        )
+    )
+
+
+class LookupTableScorer:
+    """
+    Предсказания модели, заранее посчитанные для всего конечного домена признаков.
+
+    Таблица float32 формы (2, 11, 101, D) строится один раз при загрузке
+    модели; ось длины описания квантуется с шагом description_step
+    (шаг 1 — без квантования). Предсказание для строки из домена — это
+    вычисление индекса и чтение одного элемента, без вызова модели.
+    Строки вне домена оцениваются исходной моделью.
+    """
+
+    def __init__(self, model, description_step: int = 10) -> None:
+        if description_step < 1:
+            raise ValueError("description_step должен быть положительным")
+        self.model = model
+        self.classes_ = model.classes_
+        self.n_features_in_ = 4
+        self.description_step = description_step
+        self._buckets = DESCRIPTION_LENGTH_MAX // description_step + 1
+        self.max_error: Optional[float] = None
+
+        start = time.perf_counter()
+        self.table = self._build()
+        # memoryview отдаёт Python float по индексу без создания NumPy-скаляров
+        self._flat = memoryview(self.table.reshape(-1))
+        LOOKUP_SIZE.set(self.table.nbytes)
+        logger.info(
+            f"Таблица предсказаний {self.table.shape} ({self.table.nbytes / 2**20:.1f} МБ) "
+            f"построена за {time.perf_counter() - start:.3f} c"
+        )
+
+    def __getstate__(self):
+        # memoryview не сериализуется; нужен для передачи в пул процессов инференса
+        state = self.__dict__.copy()
+        del state["_flat"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._flat = memoryview(self.table.reshape(-1))
+
+    def _bucket_lengths(self) -> np.ndarray:
+        """Представитель каждой корзины длины описания — её середина"""
+        starts = np.arange(self._buckets) * self.description_step
+        return np.minimum(starts + (self.description_step - 1) / 2.0, DESCRIPTION_LENGTH_MAX)
+
+    def _build(self) -> np.ndarray:
+        table = np.empty(
+            (2, IMAGES_QTY_MAX + 1, CATEGORY_MAX + 1, self._buckets), dtype=np.float32
+        )
+        category, lengths = np.meshgrid(
+            np.arange(CATEGORY_MAX + 1, dtype=np.float64), self._bucket_lengths(), indexing="ij"
+        )
+        category, lengths = category.ravel(), lengths.ravel()
+
+        # Строим по срезам (is_verified, images_qty), чтобы не держать в памяти всю сетку
+        for is_verified in (0, 1):
+            for images_qty in range(IMAGES_QTY_MAX + 1):
+                features = _features(
+                    np.full(category.shape, is_verified),
+                    np.full(category.shape, float(images_qty)),
+                    lengths,
+                    category,
+                )
+                proba = self.model.predict_proba(features)[:, 1]
+                table[is_verified, images_qty] = proba.reshape(CATEGORY_MAX + 1, self._buckets)
+        return table
+
+    def score(
+        self, is_verified: Any, images_qty: int, description_length: int, category: int
+    ) -> Optional[float]:
+        """Вероятность из таблицы или None, если значения вне домена"""
+        if not (0 <= images_qty <= IMAGES_QTY_MAX and 0 <= category <= CATEGORY_MAX):
+            return None
+        if description_length < 0:
+            return None
+        bucket = min(description_length, DESCRIPTION_LENGTH_MAX) // self.description_step
+        index = (
+            ((1 if is_verified else 0) * (IMAGES_QTY_MAX + 1) + images_qty) * (CATEGORY_MAX + 1)
+            + category
+        ) * self._buckets + bucket
+        return self._flat[index]
+
+    def score_row(self, row: Mapping[str, Any]) -> Optional[float]:
+        """O(1) предсказание для строки объявления (dict, asyncpg.Record, AdRequest.model_dump())"""
+        if "description_length" in row.keys():
+            description_length = row["description_length"] or 0
+        else:
+            description_length = len(row["description"] or "")
+        return self.score(
+            row["is_verified_seller"], row["images_qty"] or 0, description_length, row["category"]
+        )
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """Векторизованный поиск по таблице; строки не из домена уходят в исходную модель"""
+        features = np.asarray(features, dtype=np.float64)
+        is_verified = features[:, 0]
+        images_qty = np.rint(features[:, 1] * 20.0)
+        description_length = np.rint(features[:, 2] * DESCRIPTION_LENGTH_MAX)
+        category = np.rint(features[:, 3] * 100.0)
+
+        # Строка из домена, только если признаки получены из целых значений в границах
+        in_domain = (
+            np.isin(is_verified, (0.0, 1.0))
+            & (images_qty >= 0)
+            & (images_qty <= IMAGES_QTY_MAX)
+            & (category >= 0)
+            & (category <= CATEGORY_MAX)
+            & (description_length >= 0)
+            & np.isclose(
+                _features(is_verified, images_qty, description_length, category), features
+            ).all(axis=1)
+        )
+
+        positive = np.empty(len(features), dtype=np.float64)
+        if in_domain.any():
+            buckets = description_length[in_domain].astype(np.intp) // self.description_step
+            positive[in_domain] = self.table[
+                is_verified[in_domain].astype(np.intp),
+                images_qty[in_domain].astype(np.intp),
+                category[in_domain].astype(np.intp),
+                buckets,
+            ]
+        if not in_domain.all():
+            positive[~in_domain] = self.model.predict_proba(features[~in_domain])[:, 1]
+
+        return np.column_stack((1.0 - positive, positive))
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        return self.classes_[(self.predict_proba(features)[:, 1] >= 0.5).astype(np.intp)]
+
+    def verify(self, sample_size: int = 10000, seed: int = 0) -> float:
+        """Максимальное отклонение таблицы от исходной модели на случайных точках домена"""
+        rng = np.random.default_rng(seed)
+        is_verified = rng.integers(0, 2, sample_size)
+        images_qty = rng.integers(0, IMAGES_QTY_MAX + 1, sample_size)
+        description_length = rng.integers(0, DESCRIPTION_LENGTH_MAX + 1, sample_size)
+        category = rng.integers(0, CATEGORY_MAX + 1, sample_size)
+
+        features = _features(is_verified, images_qty, description_length, category)
+        expected = self.model.predict_proba(features)[:, 1]
+        actual = np.array(
+            [
+                self.score(*values)
+                for values in zip(
+                    is_verified.tolist(),
+                    images_qty.tolist(),
+                    description_length.tolist(),
+                    category.tolist(),
+                )
+            ]
+        )
+
+        self.max_error = float(np.max(np.abs(actual - expected)))
+        LOOKUP_MAX_ERROR.set(self.max_error)
+        return self.max_error
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from app.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+MODEL_INFO = Gauge("model_info", "Версия модели, используемая процессом", labelnames=("version",))
+RELOADS = Counter("model_reloads_total", "Количество горячих перезагрузок модели")
+RELOAD_ERRORS = Counter(
+    "model_reload_errors_total", "Ошибки при проверке или загрузке новой модели"
+)
+RELOAD_TIME = Histogram(
+    "model_reload_seconds",
+    "Время загрузки и прогрева новой версии модели",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+WARMUP_FEATURES = np.zeros((1, 4))
+
+
+def set_model(state, model, version: Optional[str], executor=None) -> None:
+    """
+    Атомарная (в рамках event loop) замена модели в state.
+
+    Запросы, уже получившие ссылку на старую модель, дорабатывают на ней.
+    """
+    previous = getattr(state, "model_version", None)
+    if previous is not None:
+        MODEL_INFO.set(0, version=previous)
+    if version is not None:
+        MODEL_INFO.set(1, version=version)
+
+    state.model = model
+    state.model_version = version
+    if executor is not None:
+        executor.set_model(model)
+
+
+class ModelReloader:
+    """
+    Фоновая проверка новой версии модели без перезапуска процесса.
+
+    Раз в interval_seconds вызывается version_fn (запрос метаданных реестра
+    или mtime model.pkl). Если версия изменилась, модель загружается в
+    отдельном потоке через load_fn(version), прогревается и подменяется
+    в state (атрибуты model и model_version).
+    """
+
+    def __init__(
+        self,
+        state: Any,
+        version_fn: Callable[[], Optional[str]],
+        load_fn: Callable[[str], Any],
+        interval_seconds: float = 60.0,
+        executor=None,
+    ) -> None:
+        self._state = state
+        self._version_fn = version_fn
+        self._load_fn = load_fn
+        self.interval = interval_seconds
+        self._executor = executor
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check_once()
+            except Exception as e:
+                RELOAD_ERRORS.inc()
+                logger.error(f"Ошибка горячей перезагрузки модели: {e}")
+
+    async def check_once(self) -> bool:
+        """Проверка версии и замена модели; True, если модель была заменена"""
+        version = await asyncio.to_thread(self._version_fn)
+        if version is None or version == getattr(self._state, "model_version", None):
+            return False
+
+        logger.info(f"Найдена новая версия модели {version}, загрузка")
+        start = time.perf_counter()
+        model = await asyncio.to_thread(self._load_fn, version)
+        await asyncio.to_thread(model.predict_proba, WARMUP_FEATURES)
+        RELOAD_TIME.observe(time.perf_counter() - start)
+
+        previous = getattr(self._state, "model_version", None)
+        set_model(self._state, model, version, self._executor)
+        RELOADS.inc()
+        logger.info(
+            f"Модель заменена: {previous} -> {version} за {time.perf_counter() - start:.3f} c"
+        )
+        return True
@@ -0,0 +1,93 @@
+import logging
+from typing import Optional
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from app.clients.settings import LOOKUP_DESCRIPTION_STEP, LOOKUP_TOLERANCE
+from app.inference.lookup import LookupTableScorer
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("sklearn", "native", "lookup")
+
+# exp(-z) переполняет float64 при z < -709; за пределами ±500 сигмоида
+# и так равна 0 или 1 с точностью float64
+_LOGIT_LIMIT = 500.0
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -_LOGIT_LIMIT, _LOGIT_LIMIT)))
+
+
+class LogisticScorer:
+    """
+    Скоринг бинарной логистической регрессии без накладных расходов sklearn.
+
+    Коэффициенты извлекаются из обученной модели один раз, дальше каждый
+    вызов — это одно скалярное произведение и сигмоида. Интерфейс
+    (predict_proba, predict, classes_) совместим с sklearn-моделью.
+    """
+
+    def __init__(self, coef: np.ndarray, intercept: float, classes: np.ndarray) -> None:
+        self.coef_ = np.ascontiguousarray(coef, dtype=np.float64).reshape(-1)
+        self.intercept_ = float(intercept)
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = self.coef_.shape[0]
+
+    @classmethod
+    def from_model(cls, model) -> Optional["LogisticScorer"]:
+        """Скорер для модели или None, если тип модели не поддерживается"""
+        if isinstance(model, LogisticScorer):
+            return model
+        if not isinstance(model, LogisticRegression):
+            return None
+        if not hasattr(model, "coef_") or model.coef_.shape[0] != 1:
+            return None
+        return cls(model.coef_[0], model.intercept_[0], model.classes_)
+
+    def decision_function(self, features: np.ndarray) -> np.ndarray:
+        features = np.asarray(features, dtype=np.float64)
+        if features.ndim != 2 or features.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"Ожидается матрица с {self.n_features_in_} признаками, получено {features.shape}"
+            )
+        return features @ self.coef_ + self.intercept_
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        positive = _sigmoid(self.decision_function(features))
+        return np.column_stack((1.0 - positive, positive))
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        return self.classes_[(self.decision_function(features) > 0).astype(np.intp)]
+
+
+def select_backend(model, backend: str = "sklearn"):
+    """Обёртка над моделью для выбранного бэкенда инференса"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд инференса: {backend}")
+
+    if backend in ("native", "lookup"):
+        scorer = LogisticScorer.from_model(model)
+        if scorer is not None:
+            logger.info("Используется нативный скорер логистической регрессии")
+            model = scorer
+        else:
+            logger.warning(
+                f"Модель {type(model).__name__} не поддерживается нативным скорером, "
+                "используется sklearn"
+            )
+
+    if backend == "lookup":
+        table = LookupTableScorer(model, description_step=LOOKUP_DESCRIPTION_STEP)
+        max_error = table.verify()
+        if max_error > LOOKUP_TOLERANCE:
+            logger.warning(
+                f"Отклонение таблицы предсказаний {max_error:.2e} больше допустимого "
+                f"{LOOKUP_TOLERANCE:.2e}, таблица не используется"
+            )
+            return model
+        logger.info(f"Используется таблица предсказаний, отклонение {max_error:.2e}")
+        return table
+
+    return model
@@ -1,15 +1,31 @@
 import logging
 import os
 from contextlib import asynccontextmanager
+from functools import partial
 
 import asyncpg
 import uvicorn
 from dotenv import load_dotenv
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 
 from app.clients.kafka import KafkaProducer
-from app.clients.settings import KAFKA_BOOTSTRAP, PG_DSN
-from app.model import load_or_train_model
+from app.clients.settings import (
+    INFERENCE_BACKEND,
+    INFERENCE_BATCHING,
+    INFERENCE_EXECUTOR,
+    INFERENCE_EXECUTOR_WORKERS,
+    INFERENCE_MAX_BATCH_SIZE,
+    INFERENCE_MAX_WAIT_MS,
+    KAFKA_BOOTSTRAP,
+    MODEL_RELOAD_INTERVAL_SECONDS,
+    PG_DSN,
+)
+from app.inference.batcher import MicroBatcher
+from app.inference.executor import InferenceExecutor
+from app.inference.reloader import ModelReloader, set_model
+from app.metrics import REGISTRY
+from app.model import current_model_version, load_model_version, load_or_train_model_with_version
 from app.repositories.users import UserRedisStorage
 from app.routers.moderation import (
     async_predict_router,
@@ -29,7 +45,39 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    app.state.model = load_or_train_model(use_mlflow=os.environ["USE_MLFLOW"])
+    use_mlflow = os.environ["USE_MLFLOW"]
+    # app.server загружает модель в родительском процессе до fork
+    preloaded = getattr(app.state, "preloaded_model", None)
+    if preloaded is not None:
+        model, model_version = preloaded
+    else:
+        model, model_version = load_or_train_model_with_version(
+            use_mlflow=use_mlflow, backend=INFERENCE_BACKEND
+        )
+
+    app.state.inference_executor = InferenceExecutor(
+        INFERENCE_EXECUTOR, workers=INFERENCE_EXECUTOR_WORKERS
+    )
+    app.state.inference_executor.start(model)
+    set_model(app.state, model, model_version)
+
+    app.state.model_reloader = ModelReloader(
+        app.state,
+        version_fn=partial(current_model_version, use_mlflow=use_mlflow),
+        load_fn=partial(load_model_version, use_mlflow=use_mlflow, backend=INFERENCE_BACKEND),
+        interval_seconds=MODEL_RELOAD_INTERVAL_SECONDS,
+        executor=app.state.inference_executor,
+    )
+    app.state.model_reloader.start()
+
+    app.state.batcher = None
+    if INFERENCE_BATCHING:
+        app.state.batcher = MicroBatcher(
+            app.state.inference_executor.predict_proba,
+            max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+            max_wait_ms=INFERENCE_MAX_WAIT_MS,
+        )
+        app.state.batcher.start()
 
     app.state.kafka_producer = KafkaProducer(KAFKA_BOOTSTRAP)
     await app.state.kafka_producer.start()
@@ -38,6 +86,10 @@ async def lifespan(app: FastAPI):
     app.state.redis_storage = UserRedisStorage()
     yield
 
+    await app.state.model_reloader.stop()
+    if app.state.batcher:
+        await app.state.batcher.stop()
+    app.state.inference_executor.shutdown()
     await app.state.kafka_producer.stop()
 
 
@@ -49,6 +101,11 @@ async def root():
     return {"message": "Hello World"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return REGISTRY.render()
+
+
 app.include_router(user_router, prefix="/users")
 app.include_router(predict_router)
 app.include_router(simple_predict_router)
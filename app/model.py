@@ -1,13 +1,22 @@
+import hashlib
+import json
 import logging
+import os
 import pickle
+import time
 from pathlib import Path
+from typing import Optional
 
 import mlflow
 import numpy as np
+from mlflow.exceptions import MlflowException
 from mlflow.sklearn import log_model
 from mlflow.tracking import MlflowClient
 from sklearn.linear_model import LogisticRegression
 
+from app.clients.settings import MODEL_CACHE_DIR
+from app.inference.scorer import select_backend
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -63,39 +72,198 @@ def load_model_from_mlflow(model_name: str, stage: str = "Production"):
     return mlflow.sklearn.load_model(model_uri)
 
 
-def check_model_in_mlflow(model_name: str = "moderation-model", stage: str = "Production") -> bool:
-    client = mlflow.MlflowClient()
+def resolve_model_version(model_name: str = "moderation-model", stage: str = "Production"):
+    """Версия модели в стадии stage одним запросом к метаданным реестра (без загрузки модели)"""
+    try:
+        versions = MlflowClient().get_latest_versions(model_name, stages=[stage])
+    except MlflowException:
+        return None
+    if not versions:
+        return None
+    return max(versions, key=lambda v: int(v.version))
 
+
+def check_model_in_mlflow(model_name: str = "moderation-model", stage: str = "Production") -> bool:
     if stage:
-        model_uri = f"models:/{model_name}/{stage}"
-        try:
-            model = mlflow.sklearn.load_model(model_uri)
-            return model is not None
-        except:
-            return False
+        return resolve_model_version(model_name, stage) is not None
+
+    model_versions = MlflowClient().search_model_versions(f"name='{model_name}'")
+    return len(model_versions) > 0
+
+
+def _cache_ref_path(cache_dir: Path, model_name: str, version: str) -> Path:
+    return cache_dir / "refs" / model_name / f"{version}.json"
+
+
+def _cache_object_path(cache_dir: Path, checksum: str) -> Path:
+    return cache_dir / "objects" / f"{checksum}.pkl"
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def _read_cached_model(cache_dir: Path, model_name: str, model_version):
+    ref_path = _cache_ref_path(cache_dir, model_name, model_version.version)
+    if not ref_path.exists():
+        return None
+
+    ref = json.loads(ref_path.read_text())
+    if ref.get("run_id") != model_version.run_id:
+        logger.warning(f"Кэш модели {model_name} v{model_version.version} устарел (другой run_id)")
+        return None
+
+    object_path = _cache_object_path(cache_dir, ref["sha256"])
+    if not object_path.exists():
+        return None
+
+    data = object_path.read_bytes()
+    if hashlib.sha256(data).hexdigest() != ref["sha256"]:
+        logger.warning(
+            f"Контрольная сумма кэша модели {model_name} v{model_version.version} не совпала"
+        )
+        return None
+
+    return pickle.loads(data)
+
+
+def _write_cached_model(cache_dir: Path, model_name: str, model_version, model) -> str:
+    data = pickle.dumps(model)
+    checksum = hashlib.sha256(data).hexdigest()
+
+    object_path = _cache_object_path(cache_dir, checksum)
+    if not object_path.exists():
+        _atomic_write(object_path, data)
+
+    ref = {"sha256": checksum, "run_id": model_version.run_id, "source": model_version.source}
+    _atomic_write(
+        _cache_ref_path(cache_dir, model_name, model_version.version), json.dumps(ref).encode()
+    )
+    return checksum
+
+
+def load_model_cached(model_name: str, model_version, cache_dir=MODEL_CACHE_DIR):
+    """
+    Загрузка конкретной версии модели через локальный кэш артефактов.
+
+    Артефакты хранятся по sha256 содержимого (objects/), версия реестра
+    ссылается на них через refs/<model_name>/<version>.json.
+    """
+    cache_dir = Path(cache_dir)
+    start = time.perf_counter()
+
+    try:
+        model = _read_cached_model(cache_dir, model_name, model_version)
+    except (OSError, ValueError, pickle.UnpicklingError) as e:
+        logger.warning(f"Не удалось прочитать кэш модели: {e}")
+        model = None
+
+    if model is not None:
+        logger.info(
+            f"Модель {model_name} v{model_version.version} загружена из локального кэша "
+            f"за {time.perf_counter() - start:.3f} c (warm start)"
+        )
+        return model
+
+    model = mlflow.sklearn.load_model(f"models:/{model_name}/{model_version.version}")
+    try:
+        _write_cached_model(cache_dir, model_name, model_version, model)
+    except OSError as e:
+        logger.warning(f"Не удалось сохранить модель в локальный кэш: {e}")
+
+    logger.info(
+        f"Модель {model_name} v{model_version.version} загружена из MLflow "
+        f"за {time.perf_counter() - start:.3f} c (cold start)"
+    )
+    return model
+
+
+def _local_model_version(path) -> str:
+    return f"local-{Path(path).stat().st_mtime_ns}"
+
+
+def model_version_number(version: Optional[str]) -> Optional[int]:
+    """
+    Версия модели как число для сравнения «новее/старше»:
+    номер версии в MLflow или mtime_ns для локальной модели.
+    """
+    if version is None:
+        return None
+    try:
+        return int(str(version).rsplit("-", 1)[-1])
+    except ValueError:
+        return None
+
+
+def current_model_version(
+    use_mlflow="true",
+    path="model.pkl",
+    model_name: str = "moderation-model",
+):
+    """Дешёвое определение актуальной версии модели без её загрузки"""
+    if use_mlflow == "true":
+        model_version = resolve_model_version(model_name)
+        return model_version.version if model_version else None
+
+    if not Path(path).exists():
+        return None
+    return _local_model_version(path)
+
+
+def load_model_version(
+    version: str,
+    use_mlflow="true",
+    path="model.pkl",
+    model_name: str = "moderation-model",
+    backend: str = "sklearn",
+):
+    """Загрузка версии модели, найденной current_model_version"""
+    if use_mlflow == "true":
+        model_version = MlflowClient().get_model_version(model_name, version)
+        model = load_model_cached(model_name, model_version)
     else:
-        model_versions = client.search_model_versions(f"name='{model_name}'")
-        return len(model_versions) > 0
+        model = load_model(path)
+    return select_backend(model, backend)
 
 
-def load_or_train_model(
+def load_or_train_model_with_version(
     use_mlflow="true",
     path="model.pkl",
     model_name: str = "moderation-model",
+    backend: str = "sklearn",
 ):
+    """Модель и её версия (номер в реестре MLflow или метка файла model.pkl)"""
     if use_mlflow == "true":
-        if not check_model_in_mlflow():
+        model_version = resolve_model_version(model_name)
+        if model_version is None:
             registration_model()
+            model_version = resolve_model_version(model_name)
 
-        model = load_model_from_mlflow(model_name=model_name)
+        model = load_model_cached(model_name, model_version)
+        version = model_version.version
 
     else:
         model_path = Path(path)
         if model_path.exists():
-            model = load_model()
+            model = load_model(path)
             logger.info("Модель загружена")
         else:
             model = train_model()
-            save_model(model)
+            save_model(model, path)
             logger.info("Модель сохранена")
+        version = _local_model_version(path)
+
+    return select_backend(model, backend), version
+
+
+def load_or_train_model(
+    use_mlflow="true",
+    path="model.pkl",
+    model_name: str = "moderation-model",
+    backend: str = "sklearn",
+):
+    model, _ = load_or_train_model_with_version(use_mlflow, path, model_name, backend)
     return model
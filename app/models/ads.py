@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, List, Optional
 
 from pydantic import BaseModel
 
@@ -16,6 +16,21 @@ class AdRequest(BaseModel):
 class AdResponse(BaseModel):
     is_violation: bool
     probability: float
+    model_version: Optional[str] = None
+
+
+class BatchPredictRequest(BaseModel):
+    items: List[Any]
+
+
+class BatchItemError(BaseModel):
+    index: int
+    detail: Any
+
+
+class BatchPredictResponse(BaseModel):
+    results: List[Optional[AdResponse]]
+    errors: List[BatchItemError]
 
 
 class AdSimpleRequest(BaseModel):
@@ -28,6 +43,23 @@ class AsyncPredictResponse(BaseModel):
     message: str
 
 
+class AsyncPredictBatchRequest(BaseModel):
+    item_ids: List[int]
+
+
+class AsyncPredictBatchItem(BaseModel):
+    item_id: int
+    task_id: Optional[int] = None
+    status: str  # pending, error
+    error: Optional[str] = None
+
+
+class AsyncPredictBatchResponse(BaseModel):
+    results: List[AsyncPredictBatchItem]
+    accepted: int
+    errors: int
+
+
 class ModerationResultResponse(BaseModel):
     task_id: int
     status: str  # pending, completed, failed
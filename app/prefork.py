@@ -0,0 +1,111 @@
+import gc
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing.connection import wait
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_fork = multiprocessing.get_context("fork")
+
+
+def _child_entry(target: Callable[[int], None], index: int) -> None:
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    target(index)
+
+
+class Prefork:
+    """
+    Супервизор дочерних процессов, созданных через fork.
+
+    Всё, что загружено в родителе до start() (модель, конфигурация),
+    достаётся детям без повторной загрузки и разделяется copy-on-write.
+    Упавшие процессы перезапускаются, SIGTERM/SIGINT передаются детям.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        processes: int,
+        target: Callable[[int], None],
+        restart_delay: float = 1.0,
+    ) -> None:
+        if processes < 1:
+            raise ValueError("Количество процессов должно быть положительным")
+        self.name = name
+        self.processes = processes
+        self._target = target
+        self.restart_delay = restart_delay
+        self.restarts = 0
+        self._children: Dict[int, multiprocessing.Process] = {}
+        self._stopping = False
+
+    def _spawn(self, index: int) -> None:
+        process = _fork.Process(
+            target=_child_entry, args=(self._target, index), name=f"{self.name}-{index}"
+        )
+        process.start()
+        self._children[index] = process
+        logger.info(f"[{self.name}] запущен процесс {index}, pid={process.pid}")
+
+    def start(self) -> None:
+        # Объекты, созданные до fork, не должны попадать в сборку мусора детей:
+        # иначе обход GC затрагивает их страницы и ломает copy-on-write
+        gc.freeze()
+        for index in range(self.processes):
+            self._spawn(index)
+
+    def poll(self, timeout: Optional[float] = None) -> None:
+        """Ожидание завершения любого ребёнка и перезапуск упавших"""
+        sentinels = {process.sentinel: index for index, process in self._children.items()}
+        for sentinel in wait(list(sentinels), timeout):
+            index = sentinels[sentinel]
+            process = self._children[index]
+            process.join()
+            if self._stopping:
+                continue
+            logger.error(
+                f"[{self.name}] процесс {index} (pid={process.pid}) завершился "
+                f"с кодом {process.exitcode}, перезапуск"
+            )
+            self.restarts += 1
+            time.sleep(self.restart_delay)
+            self._spawn(index)
+
+    def alive(self) -> int:
+        return sum(process.is_alive() for process in self._children.values())
+
+    def stop(self, timeout: float = 30.0) -> None:
+        self._stopping = True
+        for process in self._children.values():
+            if process.is_alive():
+                process.terminate()
+
+        deadline = time.monotonic() + timeout
+        for process in self._children.values():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning(f"[{self.name}] процесс pid={process.pid} не завершился, SIGKILL")
+                process.kill()
+                process.join()
+
+    def _handle_signal(self, signum, frame) -> None:
+        logger.info(f"[{self.name}] получен сигнал {signum}, остановка")
+        self._stopping = True
+
+    def run(self, on_tick: Optional[Callable[[], None]] = None, tick: float = 1.0) -> None:
+        """Запуск детей и супервизия до SIGTERM/SIGINT"""
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+
+        self.start()
+        try:
+            while not self._stopping:
+                self.poll(timeout=tick)
+                if on_tick is not None:
+                    on_tick()
+        finally:
+            self.stop()
@@ -1,6 +1,6 @@
 import logging
 from dataclasses import dataclass
-from typing import Any, Mapping, Optional
+from typing import Any, Mapping, Optional, Sequence, Set
 
 import asyncpg
 from fastapi import HTTPException, Request
@@ -54,6 +54,21 @@ class AdsRepository:
             logger.error(f"Ошибка БД в get_ad_id для item_id={item_id}: {e}")
             raise HTTPException(status_code=503, detail="Сервис базы данных временно недоступен")
 
+    async def get_open_ad_ids(self, item_ids: Sequence[int]) -> Set[int]:
+        """Существующие незакрытые объявления из item_ids одним запросом по ANY($1)"""
+        query = """
+            SELECT item_id FROM advertisement
+            WHERE item_id = ANY($1::int[]) AND is_closed = FALSE
+        """
+
+        try:
+            async with self.request.app.state.pg_pool.acquire() as conn:
+                rows = await conn.fetch(query, list(item_ids))
+                return {row["item_id"] for row in rows}
+        except asyncpg.PostgresError as e:
+            logger.error(f"Ошибка БД в get_open_ad_ids для {len(item_ids)} объявлений: {e}")
+            raise HTTPException(status_code=503, detail="Сервис базы данных временно недоступен")
+
     async def get_ad_by_id(self, item_id: int) -> Optional[Mapping[str, Any]]:
         """Получение объявления по ID (включая закрытые) для проверки статуса"""
         query = """
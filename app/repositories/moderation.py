@@ -1,12 +1,68 @@
+import asyncio
 import logging
 from dataclasses import dataclass
-from typing import Any, Mapping, Optional
+from datetime import timedelta
+from json import dumps
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
 
 import asyncpg
 from fastapi import HTTPException, Request
 
+from app.clients.kafka import moderation_request
+from app.clients.redis import get_redis_connection, results_pool
+from app.clients.settings import (
+    MODERATION_COALESCE_SECONDS,
+    REDIS_TTL,
+    RESULT_CACHE_TIMEOUT_SECONDS,
+    TOPIC,
+)
+from app.metrics import Counter
+from app.repositories.outbox import OutboxRepository
+
 logger = logging.getLogger(__name__)
 
+COALESCED = Counter(
+    "moderation_requests_coalesced_total",
+    "Запросы модерации, присоединённые к уже ожидающей задаче",
+)
+RESULT_CACHE_ERRORS = Counter(
+    "moderation_result_cache_errors_total", "Ошибки записи готовых результатов в Redis"
+)
+
+
+def result_cache_key(task_id: int) -> str:
+    return f"moderation_result:{task_id}"
+
+
+@dataclass(frozen=True)
+class ModerationResultCache:
+    """
+    Запись готовых результатов в Redis с тем же ключом, форматом и TTL,
+    что у GET /moderation_result, чтобы опрос после завершения не шёл в БД.
+
+    Кэш необязателен: ошибки и таймаут Redis только логируются.
+    """
+
+    _TTL: timedelta = timedelta(seconds=REDIS_TTL)
+    timeout: float = RESULT_CACHE_TIMEOUT_SECONDS
+
+    async def _write(self, results: Sequence[Mapping[str, Any]]) -> None:
+        async with get_redis_connection(results_pool) as connection:
+            pipeline = connection.pipeline(transaction=False)
+            for result in results:
+                pipeline.set(result_cache_key(result["task_id"]), dumps(result), ex=self._TTL)
+            await pipeline.execute()
+
+    async def set_many(self, results: Sequence[Mapping[str, Any]]) -> None:
+        """Все результаты одним pipeline"""
+        if not results:
+            return
+        try:
+            await asyncio.wait_for(self._write(results), self.timeout)
+        except Exception as e:
+            RESULT_CACHE_ERRORS.inc()
+            logger.warning(f"Не удалось записать {len(results)} результатов в кэш: {e!r}")
+
 
 @dataclass
 class ModerationRepository:
@@ -33,6 +89,158 @@ class ModerationRepository:
             logger.error(f"Неожиданная ошибка при создании задачи: {e}")
             raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
+    @staticmethod
+    async def _find_recent_pending(conn, item_id: int, coalesce_seconds: float) -> Optional[int]:
+        await conn.execute(
+            "SELECT pg_advisory_xact_lock(hashtext('moderation_results'), $1)", item_id
+        )
+        return await conn.fetchval(
+            """
+            SELECT id FROM moderation_results
+            WHERE item_id = $1 AND status = 'pending'
+              AND created_at > LOCALTIMESTAMP - make_interval(secs => $2)
+            ORDER BY created_at DESC
+            LIMIT 1
+            """,
+            item_id,
+            coalesce_seconds,
+        )
+
+    async def get_or_create_task(
+        self,
+        item_id: int,
+        coalesce_seconds: float = MODERATION_COALESCE_SECONDS,
+        outbox: bool = False,
+    ) -> Tuple[int, bool]:
+        """
+        Pending-задача объявления не старше coalesce_seconds или новая задача.
+
+        Возвращает (task_id, created). Advisory-блокировка на item_id на время
+        транзакции не даёт параллельным запросам создать две задачи. Более
+        старая pending-задача считается потерянной и не переиспользуется.
+        При outbox запрос модерации для новой задачи записывается
+        в moderation_outbox в той же транзакции.
+        """
+        try:
+            async with self.request.app.state.pg_pool.acquire() as conn:
+                async with conn.transaction():
+                    if coalesce_seconds > 0:
+                        task_id = await self._find_recent_pending(conn, item_id, coalesce_seconds)
+                        if task_id is not None:
+                            COALESCED.inc()
+                            logger.info(f"item_id={item_id}: присоединён к задаче {task_id}")
+                            return task_id, False
+
+                    task_id = await conn.fetchval(
+                        """
+                        INSERT INTO moderation_results (item_id, status)
+                        VALUES ($1, 'pending')
+                        RETURNING id
+                        """,
+                        item_id,
+                    )
+                    if outbox:
+                        await OutboxRepository(conn).add(
+                            TOPIC, moderation_request(item_id, task_id), key=str(item_id)
+                        )
+                    return task_id, True
+        except asyncpg.PostgresError as e:
+            logger.error(f"Ошибка БД при создании задачи для item_id={item_id}: {e}")
+            raise HTTPException(status_code=503, detail="Сервис базы данных временно недоступен")
+        except Exception as e:
+            logger.error(f"Неожиданная ошибка при создании задачи: {e}")
+            raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
+
+    async def get_or_create_tasks(
+        self,
+        item_ids: Sequence[int],
+        coalesce_seconds: float = MODERATION_COALESCE_SECONDS,
+        outbox: bool = False,
+    ) -> Dict[int, Tuple[int, bool]]:
+        """
+        get_or_create_task для пачки объявлений: {item_id: (task_id, created)}.
+
+        Блокировки берутся в порядке item_id, чтобы параллельные пачки не ждали
+        друг друга по кругу; недавние pending-задачи ищутся одним запросом,
+        новые создаются одним INSERT ... SELECT unnest($1), запросы в outbox —
+        одним INSERT в той же транзакции.
+        """
+        item_ids = sorted(set(item_ids))
+        tasks: Dict[int, Tuple[int, bool]] = {}
+        if not item_ids:
+            return tasks
+
+        try:
+            async with self.request.app.state.pg_pool.acquire() as conn:
+                async with conn.transaction():
+                    if coalesce_seconds > 0:
+                        await conn.execute(
+                            """
+                            SELECT pg_advisory_xact_lock(hashtext('moderation_results'), item_id)
+                            FROM unnest($1::int[]) AS t(item_id)
+                            ORDER BY item_id
+                            """,
+                            item_ids,
+                        )
+                        rows = await conn.fetch(
+                            """
+                            SELECT DISTINCT ON (item_id) item_id, id
+                            FROM moderation_results
+                            WHERE item_id = ANY($1::int[]) AND status = 'pending'
+                              AND created_at > LOCALTIMESTAMP - make_interval(secs => $2)
+                            ORDER BY item_id, created_at DESC
+                            """,
+                            item_ids,
+                            coalesce_seconds,
+                        )
+                        tasks.update((row["item_id"], (row["id"], False)) for row in rows)
+                        COALESCED.inc(len(rows))
+
+                    new_ids = [item_id for item_id in item_ids if item_id not in tasks]
+                    if new_ids:
+                        rows = await conn.fetch(
+                            """
+                            INSERT INTO moderation_results (item_id, status)
+                            SELECT unnest($1::int[]), 'pending'
+                            RETURNING id, item_id
+                            """,
+                            new_ids,
+                        )
+                        created = [(row["item_id"], row["id"]) for row in rows]
+                        tasks.update((item_id, (task_id, True)) for item_id, task_id in created)
+                        if outbox:
+                            await OutboxRepository(conn).add_many(
+                                TOPIC,
+                                [moderation_request(*task) for task in created],
+                                [str(item_id) for item_id, _ in created],
+                            )
+                    return tasks
+        except asyncpg.PostgresError as e:
+            logger.error(f"Ошибка БД при создании {len(item_ids)} задач: {e}")
+            raise HTTPException(status_code=503, detail="Сервис базы данных временно недоступен")
+        except Exception as e:
+            logger.error(f"Неожиданная ошибка при создании задач: {e}")
+            raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
+
+    async def mark_tasks_failed(self, task_ids: Sequence[int], error: str) -> None:
+        """Отметить задачи как ошибочные одним UPDATE"""
+        query = """
+            UPDATE moderation_results
+            SET status = 'failed', error_message = $1
+            WHERE id = ANY($2::int[])
+        """
+
+        try:
+            async with self.request.app.state.pg_pool.acquire() as conn:
+                await conn.execute(query, error, list(task_ids))
+                logger.info(f"{len(task_ids)} задач отмечены как failed: {error}")
+        except asyncpg.PostgresError as e:
+            logger.error(f"Ошибка БД при обновлении {len(task_ids)} задач: {e}")
+            raise HTTPException(status_code=503, detail="Сервис базы данных временно недоступен")
+        except Exception as e:
+            logger.error(f"Неожиданная ошибка при обновлении {len(task_ids)} задач: {e}")
+            raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
+
     async def mark_task_failed(self, task_id: int, error: str) -> None:
         """Отметить задачу как ошибочную"""
         query = """
@@ -0,0 +1,70 @@
+import json
+from dataclasses import dataclass
+from typing import Any, List, Mapping, Optional, Sequence
+
+import asyncpg
+
+ADD_QUERY = """
+    INSERT INTO moderation_outbox (topic, key, payload)
+    VALUES ($1, $2, $3::jsonb)
+"""
+
+ADD_MANY_QUERY = """
+    INSERT INTO moderation_outbox (topic, key, payload)
+    SELECT $1, t.key, t.payload::jsonb
+    FROM unnest($2::text[], $3::text[]) WITH ORDINALITY AS t(key, payload, n)
+    ORDER BY t.n
+"""
+
+# Удаление с RETURNING внутри транзакции релея: если публикация не удалась,
+# откат возвращает строки. SKIP LOCKED позволяет нескольким релеям разбирать
+# outbox параллельно, не дожидаясь чужих пачек. id блокируются один раз в CTE:
+# подзапрос в WHERE id IN (...) планировщик может выполнить заново для каждой
+# строки (Nested Loop Semi Join), и тогда удаляется больше LIMIT строк.
+# Возраст считается в БД: created_at — время БД без часового пояса, и его
+# нельзя сравнивать с часами приложения
+CLAIM_QUERY = """
+    WITH claimed AS (
+        SELECT id FROM moderation_outbox
+        ORDER BY id
+        LIMIT $1
+        FOR UPDATE SKIP LOCKED
+    )
+    DELETE FROM moderation_outbox o
+    USING claimed c
+    WHERE o.id = c.id
+    RETURNING o.id, o.topic, o.key, o.payload, o.created_at,
+        EXTRACT(EPOCH FROM LOCALTIMESTAMP - o.created_at)::float8 AS age_seconds
+"""
+
+
+@dataclass(frozen=True)
+class OutboxRepository:
+    """Сообщения для Kafka, записанные в одной транзакции с изменением данных"""
+
+    conn: asyncpg.Connection
+
+    async def add(self, topic: str, payload: Mapping[str, Any], key: Optional[str] = None):
+        await self.conn.execute(ADD_QUERY, topic, key, json.dumps(payload))
+
+    async def add_many(
+        self,
+        topic: str,
+        payloads: Sequence[Mapping[str, Any]],
+        keys: Optional[Sequence[Optional[str]]] = None,
+    ):
+        """Пачка сообщений одним INSERT ... SELECT unnest(...), id в порядке payloads"""
+        keys = [None] * len(payloads) if keys is None else list(keys)
+        await self.conn.execute(
+            ADD_MANY_QUERY, topic, keys, [json.dumps(payload) for payload in payloads]
+        )
+
+    async def claim(self, limit: int) -> List[Mapping[str, Any]]:
+        """
+        Забрать до limit самых старых сообщений. Вызывать в транзакции и
+        фиксировать её только после подтверждения публикации.
+        """
+        rows = await self.conn.fetch(CLAIM_QUERY, limit)
+        # Порядок RETURNING не определён, публикуем в порядке записи
+        rows = sorted(rows, key=lambda row: row["id"])
+        return [dict(row, payload=json.loads(row["payload"])) for row in rows]
@@ -5,6 +5,7 @@ from typing import Any, Mapping, Sequence
 
 from app.clients.postgres import get_pg_connection
 from app.clients.redis import get_redis_connection
+from app.clients.settings import REDIS_TTL
 from app.errors import UserNotFoundError
 from app.models.users import UserModel
 
@@ -108,7 +109,7 @@ class UserPostgresStorage:
 
 @dataclass(frozen=True)
 class UserRedisStorage:
-    _TTL: timedelta = timedelta(days=1)
+    _TTL: timedelta = timedelta(seconds=REDIS_TTL)
 
     async def set(self, row_id: int, row: Mapping[str, Any]) -> None:
         async with get_redis_connection() as connection:
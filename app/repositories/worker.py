@@ -0,0 +1,225 @@
+import asyncio
+import contextlib
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Горячие запросы воркера. asyncpg готовит каждый текст запроса один раз
+# на соединение и дальше берёт его из кэша prepared statements
+FEATURES_QUERY = """
+    SELECT
+        s.is_verified as is_verified_seller,
+        a.images_qty,
+        COALESCE(length(a.description), 0) as description_length,
+        a.category
+    FROM advertisement a
+    JOIN sellers s ON a.seller_id = s.seller_id
+    WHERE a.item_id = $1
+"""
+
+FEATURES_MANY_QUERY = """
+    SELECT
+        a.item_id,
+        s.is_verified as is_verified_seller,
+        a.images_qty,
+        COALESCE(length(a.description), 0) as description_length,
+        a.category
+    FROM advertisement a
+    JOIN sellers s ON a.seller_id = s.seller_id
+    WHERE a.item_id = ANY($1::int[])
+"""
+
+PENDING_TASK_QUERY = """
+    SELECT id FROM moderation_results
+    WHERE item_id = $1 AND status = 'pending'
+    ORDER BY created_at DESC
+    LIMIT 1
+"""
+
+PENDING_TASKS_QUERY = """
+    SELECT DISTINCT ON (item_id) item_id, id
+    FROM moderation_results
+    WHERE item_id = ANY($1::int[]) AND status = 'pending'
+    ORDER BY item_id, created_at DESC
+"""
+
+# Результат применяется только к ожидающей задаче: повторная доставка или
+# повтор сообщения (в том числе после смены модели) готовый результат не меняет
+COMPLETE_TASK_QUERY = """
+    UPDATE moderation_results
+    SET status = 'completed',
+        is_violation = $1,
+        probability = $2,
+        model_version = $4,
+        processed_at = CURRENT_TIMESTAMP
+    WHERE id = $3 AND status = 'pending'
+"""
+
+COMPLETE_TASKS_QUERY = """
+    UPDATE moderation_results AS m
+    SET status = 'completed',
+        is_violation = r.is_violation,
+        probability = r.probability,
+        model_version = $4,
+        processed_at = CURRENT_TIMESTAMP
+    FROM unnest($1::int[], $2::bool[], $3::float8[]) AS r(id, is_violation, probability)
+    WHERE m.id = r.id AND m.status = 'pending'
+    RETURNING m.id
+"""
+
+FAIL_TASK_QUERY = """
+    UPDATE moderation_results SET status='failed', error_message=$1
+    WHERE id=$2 AND status = 'pending'
+"""
+
+# Упавшие задачи возвращаются в очередь по id (сообщения с task_id) или по
+# item_id (сообщения старой схемы). По item_id — только последняя упавшая
+# задача: воркер находит для сообщения одну pending-задачу, остальные
+# остались бы в pending навсегда
+RESET_FAILED_QUERY = """
+    UPDATE moderation_results
+    SET status = 'pending', error_message = NULL, processed_at = NULL
+    WHERE status = 'failed'
+      AND (
+          id = ANY($1::int[])
+          OR id IN (
+              SELECT max(id) FROM moderation_results
+              WHERE status = 'failed' AND item_id = ANY($2::int[])
+              GROUP BY item_id
+          )
+      )
+"""
+
+# Ошибки, после которых соединение непригодно. InternalClientError и зависание
+# до command_timeout asyncpg выдаёт, если сервер закрыл соединение, пока оно
+# простаивало в пуле (pg_terminate_backend, рестарт или failover PostgreSQL)
+CONNECTION_ERRORS = (
+    asyncpg.PostgresConnectionError,
+    asyncpg.exceptions.AdminShutdownError,
+    asyncpg.exceptions.CannotConnectNowError,
+    asyncpg.exceptions.ConnectionDoesNotExistError,
+    asyncpg.exceptions.InternalClientError,
+    asyncio.TimeoutError,
+    OSError,
+)
+
+
+async def prepare_statements(conn: asyncpg.Connection) -> None:
+    """
+    Подготовка горячих запросов на новом соединении (init для asyncpg.create_pool).
+
+    Каждый запрос выполняется с аргументами, которые не совпадают ни с одной
+    строкой: так его план попадает в кэш prepared statements соединения
+    до первого сообщения, а не во время обработки.
+    """
+    await conn.fetchrow(FEATURES_QUERY, -1)
+    await conn.fetch(FEATURES_MANY_QUERY, [])
+    await conn.fetchrow(PENDING_TASK_QUERY, -1)
+    await conn.fetch(PENDING_TASKS_QUERY, [])
+    await conn.execute(COMPLETE_TASK_QUERY, False, 0.0, -1, None)
+    await conn.fetch(COMPLETE_TASKS_QUERY, [], [], [], None)
+
+
+def _affected(status: str) -> int:
+    """Число строк из статуса команды asyncpg ("UPDATE 3")"""
+    return int(status.split()[-1])
+
+
+@dataclass(frozen=True)
+class WorkerRepository:
+    """
+    Запросы воркера модерации.
+
+    conn — пул asyncpg или отдельное соединение (у обоих есть fetch/fetchrow/execute).
+    Через пул сломанное соединение закрывается, чтобы пул создал вместо него
+    новое, а запрос повторяется до reconnect_attempts раз; все запросы
+    воркера идемпотентны, поэтому повтор безопасен.
+    """
+
+    conn: Any
+    reconnect_attempts: int = 3
+
+    async def _query(self, method: str, query: str, *args) -> Any:
+        if not isinstance(self.conn, asyncpg.Pool):
+            return await getattr(self.conn, method)(query, *args)
+
+        for attempt in range(1, self.reconnect_attempts + 1):
+            async with self.conn.acquire() as conn:
+                try:
+                    return await getattr(conn, method)(query, *args)
+                except CONNECTION_ERRORS as e:
+                    # Закрытое соединение пул уже отвязал сам, остальные закрываем явно
+                    with contextlib.suppress(asyncpg.InterfaceError):
+                        conn.terminate()
+                    if attempt == self.reconnect_attempts:
+                        raise
+                    logger.warning(f"Соединение с БД потеряно ({e!r}), повтор {attempt}")
+            await asyncio.sleep(0.1 * attempt)
+
+    async def get_features(self, item_id: int) -> Optional[Mapping[str, Any]]:
+        return await self._query("fetchrow", FEATURES_QUERY, item_id)
+
+    async def get_features_many(self, item_ids: Sequence[int]) -> Dict[int, Mapping[str, Any]]:
+        rows = await self._query("fetch", FEATURES_MANY_QUERY, list(item_ids))
+        return {row["item_id"]: row for row in rows}
+
+    async def find_pending_task(self, item_id: int) -> Optional[int]:
+        row = await self._query("fetchrow", PENDING_TASK_QUERY, item_id)
+        return row["id"] if row else None
+
+    async def find_pending_tasks(self, item_ids: Sequence[int]) -> Dict[int, int]:
+        """Последняя pending-задача для каждого item_id"""
+        rows = await self._query("fetch", PENDING_TASKS_QUERY, list(item_ids))
+        return {row["item_id"]: row["id"] for row in rows}
+
+    async def complete_task(
+        self,
+        task_id: int,
+        is_violation: bool,
+        probability: float,
+        model_version: Optional[int] = None,
+    ) -> bool:
+        """Запись результата в ожидающую задачу; False, если задача уже не pending"""
+        status = await self._query(
+            "execute", COMPLETE_TASK_QUERY, is_violation, probability, task_id, model_version
+        )
+        return _affected(status) > 0
+
+    async def complete_tasks(
+        self,
+        task_ids: Sequence[int],
+        is_violations: Sequence[bool],
+        probabilities: Sequence[float],
+        model_version: Optional[int] = None,
+    ) -> List[int]:
+        """
+        Запись результатов пачки задач одним UPDATE ... FROM unnest(...).
+
+        Возвращает id задач, к которым результат применён (бывших pending).
+        """
+        rows = await self._query(
+            "fetch",
+            COMPLETE_TASKS_QUERY,
+            list(task_ids),
+            list(is_violations),
+            list(probabilities),
+            model_version,
+        )
+        return [row["id"] for row in rows]
+
+    async def fail_task(self, task_id: int, error_msg: str) -> None:
+        """Ошибка записывается только в ожидающую задачу, готовый результат не затирается"""
+        await self._query("execute", FAIL_TASK_QUERY, error_msg, task_id)
+
+    async def reset_failed_tasks(
+        self, task_ids: Sequence[int], item_ids: Sequence[int] = ()
+    ) -> int:
+        """Перевод упавших задач обратно в pending одним UPDATE; возвращает их число"""
+        status = await self._query(
+            "execute", RESET_FAILED_QUERY, list(task_ids), list(item_ids)
+        )
+        return _affected(status)
@@ -1,23 +1,41 @@
+import asyncio
 import logging
+from typing import Dict, List
 
 from fastapi import APIRouter, HTTPException, Request
+from pydantic import ValidationError
 
+from app.clients.settings import (
+    ASYNC_PREDICT_BATCH_MAX_ITEMS,
+    KAFKA_WAIT_FOR_ACK,
+    PREDICT_BATCH_MAX_ITEMS,
+    USE_OUTBOX,
+)
 from app.models.ads import (
     AdRequest,
     AdResponse,
     AdSimpleRequest,
+    AsyncPredictBatchItem,
+    AsyncPredictBatchRequest,
+    AsyncPredictBatchResponse,
     AsyncPredictResponse,
+    BatchItemError,
+    BatchPredictRequest,
+    BatchPredictResponse,
     CloseAdRequest,
     CloseAdResponse,
     ModerationResultResponse,
 )
 from app.repositories.ads import AdsRepository
-from app.repositories.moderation import ModerationRepository
+from app.repositories.moderation import ModerationRepository, result_cache_key
 from app.routers.utils import (
     check_kafka,
     check_model,
-    get_prediction,
+    get_prediction_async,
+    lookup_prediction,
+    predict_proba,
     prepare_features,
+    prepare_features_batch,
 )
 
 predict_router = APIRouter(prefix="/predict")
@@ -29,22 +47,113 @@ close_ad_router = APIRouter(prefix="/close")
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Фоновые проверки доставки запросов модерации (ссылки держим до завершения)
+_deliveries = set()
+
+
+async def _confirm_delivery(delivery, moderation_repo: ModerationRepository, task_id: int):
+    """Задача, чьё сообщение брокер не подтвердил, помечается failed после ответа клиенту"""
+    try:
+        await delivery
+    except Exception as e:
+        logger.error(f"Kafka не подтвердила запрос задачи {task_id}: {e}")
+        try:
+            await moderation_repo.mark_task_failed(task_id, f"Ошибка Kafka: {str(e)}")
+        except Exception as mark_error:
+            logger.error(f"Не удалось отметить задачу {task_id} как ошибочную: {mark_error}")
+
+
+async def _confirm_batch_delivery(
+    deliveries, moderation_repo: ModerationRepository, task_ids
+) -> List[int]:
+    """Ожидание подтверждений пачки; неподтверждённые задачи помечаются failed одним UPDATE"""
+    outcomes = await asyncio.gather(*deliveries, return_exceptions=True)
+    failed = [
+        task_id for task_id, outcome in zip(task_ids, outcomes) if isinstance(outcome, Exception)
+    ]
+    if failed:
+        error = next(outcome for outcome in outcomes if isinstance(outcome, Exception))
+        logger.error(f"Kafka не подтвердила запросы {len(failed)} задач: {error}")
+        try:
+            await moderation_repo.mark_tasks_failed(failed, f"Ошибка Kafka: {str(error)}")
+        except Exception as mark_error:
+            logger.error(f"Не удалось отметить {len(failed)} задач как ошибочные: {mark_error}")
+    return failed
+
 
 @predict_router.post("", response_model=AdResponse)
 async def predict(ad: AdRequest, request: Request):
     logger.info(f"Запрос: {ad}")
 
     model = request.app.state.model
+    model_version = getattr(request.app.state, "model_version", None)
     check_model(model)
 
-    features = prepare_features(ad.model_dump())
-    proba = get_prediction(model, features)
-    response = AdResponse(is_violation=(proba >= 0.5), probability=proba)
+    row = ad.model_dump()
+    proba = lookup_prediction(model, row)
+    if proba is None:
+        features = prepare_features(row)
+        proba = await get_prediction_async(request.app.state, model, features)
+    response = AdResponse(
+        is_violation=(proba >= 0.5), probability=proba, model_version=model_version
+    )
 
     logger.info(f"Ответ: {response}")
     return response
 
 
+@predict_router.post("/batch", response_model=BatchPredictResponse)
+async def predict_batch(batch: BatchPredictRequest, request: Request):
+    logger.info(f"Запрос predict/batch на {len(batch.items)} объявлений")
+
+    if len(batch.items) > PREDICT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Слишком много объявлений в запросе, максимум {PREDICT_BATCH_MAX_ITEMS}",
+        )
+
+    model = request.app.state.model
+    model_version = getattr(request.app.state, "model_version", None)
+    check_model(model)
+
+    valid_ads, valid_indexes, errors = [], [], []
+    for index, item in enumerate(batch.items):
+        try:
+            valid_ads.append(AdRequest.model_validate(item))
+            valid_indexes.append(index)
+        except ValidationError as e:
+            detail = e.errors(include_url=False, include_context=False, include_input=False)
+            errors.append(BatchItemError(index=index, detail=detail))
+
+    results = [None] * len(batch.items)
+    if valid_ads:
+        features = prepare_features_batch(
+            {
+                "is_verified_seller": [ad.is_verified_seller for ad in valid_ads],
+                "images_qty": [ad.images_qty for ad in valid_ads],
+                "description_length": [len(ad.description) for ad in valid_ads],
+                "category": [ad.category for ad in valid_ads],
+            }
+        )
+        executor = getattr(request.app.state, "inference_executor", None)
+        try:
+            if executor is not None:
+                probas = await executor.predict_proba(model, features)
+            else:
+                probas = predict_proba(model, features)
+        except Exception as e:
+            logger.error(f"Ошибка предсказания батча: {e}")
+            raise HTTPException(status_code=500, detail="Ошибка при обработке запроса")
+
+        for index, proba in zip(valid_indexes, probas.tolist()):
+            results[index] = AdResponse(
+                is_violation=proba >= 0.5, probability=proba, model_version=model_version
+            )
+
+    logger.info(f"Ответ predict/batch: {len(valid_ads)} оценено, {len(errors)} с ошибками")
+    return BatchPredictResponse(results=results, errors=errors)
+
+
 @simple_predict_router.post("", response_model=AdResponse)
 async def simple_predict(ad: AdSimpleRequest, request: Request):
     logger.info(f"Запрос simple_predict для item_id: {ad.item_id}")
@@ -57,6 +166,7 @@ async def simple_predict(ad: AdSimpleRequest, request: Request):
         return AdResponse(**cached_result)
 
     model = request.app.state.model
+    model_version = getattr(request.app.state, "model_version", None)
     check_model(model)
 
     ads_repo = AdsRepository(request=request)
@@ -72,9 +182,13 @@ async def simple_predict(ad: AdSimpleRequest, request: Request):
     if not row:
         raise HTTPException(status_code=404, detail="Объявление не найдено")
 
-    features = prepare_features(row)
-    proba = get_prediction(model, features)
-    response = AdResponse(is_violation=proba >= 0.5, probability=float(proba))
+    proba = lookup_prediction(model, row)
+    if proba is None:
+        features = prepare_features(row)
+        proba = await get_prediction_async(request.app.state, model, features)
+    response = AdResponse(
+        is_violation=proba >= 0.5, probability=float(proba), model_version=model_version
+    )
 
     await redis_storage.set(cache_key, response.model_dump())
     logger.info(f"Результат сохранен в кэш для item_id={ad.item_id}")
@@ -87,7 +201,8 @@ async def async_predict(ad: AdSimpleRequest, request: Request):
     logger.info(f"Запрос async_predict для item_id: {ad.item_id}")
 
     kafka_producer = request.app.state.kafka_producer
-    check_kafka(kafka_producer)
+    if not USE_OUTBOX:
+        check_kafka(kafka_producer)
 
     ads_repo = AdsRepository(request=request)
     moderation_repo = ModerationRepository(request=request)
@@ -106,15 +221,24 @@ async def async_predict(ad: AdSimpleRequest, request: Request):
         )
 
     try:
-        task_id = await moderation_repo.create_task(ad_id)
+        task_id, created = await moderation_repo.get_or_create_task(ad_id, outbox=USE_OUTBOX)
     except HTTPException as e:
         raise e
     except Exception as e:
         logger.error(f"Ошибка создания задачи: {e}")
         raise HTTPException(status_code=500, detail="Ошибка при создании задачи модерации")
 
+    # Задача уже в очереди (второе сообщение заставило бы воркер посчитать её ещё раз)
+    # или запрос записан в outbox вместе с задачей
+    if not created or USE_OUTBOX:
+        return AsyncPredictResponse(
+            task_id=task_id, status="pending", message="Moderation request accepted"
+        )
+
     try:
-        await kafka_producer.send_moderation_request(ad_id)
+        delivery = await kafka_producer.send_moderation_request(
+            ad_id, task_id=task_id, wait=KAFKA_WAIT_FOR_ACK
+        )
     except Exception as e:
         logger.error(f"Ошибка Kafka: {e}")
 
@@ -125,17 +249,119 @@ async def async_predict(ad: AdSimpleRequest, request: Request):
 
         raise HTTPException(status_code=500, detail="Ошибка при отправке задачи в очередь")
 
+    if not KAFKA_WAIT_FOR_ACK:
+        confirmation = asyncio.create_task(_confirm_delivery(delivery, moderation_repo, task_id))
+        _deliveries.add(confirmation)
+        confirmation.add_done_callback(_deliveries.discard)
+
     return AsyncPredictResponse(
         task_id=task_id, status="pending", message="Moderation request accepted"
     )
 
 
+@async_predict_router.post("/batch", response_model=AsyncPredictBatchResponse)
+async def async_predict_batch(batch: AsyncPredictBatchRequest, request: Request):
+    """
+    Запросы модерации для пачки объявлений: проверка существования одним
+    SELECT по ANY($1), задачи одним INSERT ... SELECT unnest($1), сообщения
+    одной пачкой продюсера. Результат по каждому item_id — task_id или ошибка;
+    повторы item_id в запросе дают один результат.
+    """
+    logger.info(f"Запрос async_predict/batch на {len(batch.item_ids)} объявлений")
+
+    if len(batch.item_ids) > ASYNC_PREDICT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Слишком много объявлений в запросе, максимум {ASYNC_PREDICT_BATCH_MAX_ITEMS}",
+        )
+
+    kafka_producer = request.app.state.kafka_producer
+    if not USE_OUTBOX:
+        check_kafka(kafka_producer)
+
+    ads_repo = AdsRepository(request=request)
+    moderation_repo = ModerationRepository(request=request)
+    item_ids = list(dict.fromkeys(batch.item_ids))
+
+    try:
+        open_ids = await ads_repo.get_open_ad_ids(item_ids)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Ошибка при проверке объявлений: {e}")
+        raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
+
+    try:
+        tasks = await moderation_repo.get_or_create_tasks(
+            [item_id for item_id in item_ids if item_id in open_ids], outbox=USE_OUTBOX
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Ошибка создания задач: {e}")
+        raise HTTPException(status_code=500, detail="Ошибка при создании задач модерации")
+
+    errors: Dict[int, str] = {
+        item_id: f"Объявление с item_id={item_id} не найдено"
+        for item_id in item_ids
+        if item_id not in open_ids
+    }
+
+    # Сообщения нужны только новым задачам; с outbox они уже записаны вместе с задачами
+    created = [(item_id, task_id) for item_id, (task_id, new) in tasks.items() if new]
+    if created and not USE_OUTBOX:
+        task_ids = [task_id for _, task_id in created]
+        try:
+            deliveries = await kafka_producer.send_moderation_requests(created)
+        except Exception as e:
+            logger.error(f"Ошибка Kafka: {e}")
+            try:
+                await moderation_repo.mark_tasks_failed(task_ids, f"Ошибка Kafka: {str(e)}")
+            except Exception as mark_error:
+                logger.error(f"Не удалось отметить задачи как ошибочные: {mark_error}")
+            failed = task_ids
+        else:
+            confirmation = _confirm_batch_delivery(deliveries, moderation_repo, task_ids)
+            if KAFKA_WAIT_FOR_ACK:
+                failed = await confirmation
+            else:
+                confirmation = asyncio.create_task(confirmation)
+                _deliveries.add(confirmation)
+                confirmation.add_done_callback(_deliveries.discard)
+                failed = []
+        failed = set(failed)
+        errors.update(
+            (item_id, "Ошибка при отправке задачи в очередь")
+            for item_id, task_id in created
+            if task_id in failed
+        )
+
+    results = []
+    for item_id in item_ids:
+        if item_id in errors:
+            results.append(
+                AsyncPredictBatchItem(item_id=item_id, status="error", error=errors[item_id])
+            )
+        else:
+            results.append(
+                AsyncPredictBatchItem(item_id=item_id, task_id=tasks[item_id][0], status="pending")
+            )
+
+    logger.info(
+        f"Ответ async_predict/batch: {len(item_ids) - len(errors)} принято, "
+        f"{len(errors)} с ошибками"
+    )
+    return AsyncPredictBatchResponse(
+        results=results, accepted=len(item_ids) - len(errors), errors=len(errors)
+    )
+
+
 @moderation_result_router.get("/{task_id}", response_model=ModerationResultResponse)
 async def get_moderation_result(task_id: int, request: Request):
     logger.info(f"Запрос статуса: task_id={task_id}")
 
     redis_storage = request.app.state.redis_storage
-    cache_key = f"moderation_result:{task_id}"
+    cache_key = result_cache_key(task_id)
 
     try:
         cached_result = await redis_storage.get(cache_key)
@@ -1,8 +1,11 @@
 import logging
+from typing import Mapping
 
 import numpy as np
 from fastapi import HTTPException
 
+from app.inference.lookup import LookupTableScorer
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,16 +23,98 @@ def check_kafka(producer):
 
 def prepare_features(row):
     is_verified = 1 if row["is_verified_seller"] else 0
-    images_norm = min(row["images_qty"] / 20.0, 1.0) if row["images_qty"] else 0.0
+    # Те же границы [0, 1], что в prepare_features_batch: отрицательное число фото даёт 0
+    images_norm = min(max(row["images_qty"] / 20.0, 0.0), 1.0) if row["images_qty"] else 0.0
     desc_len_norm = min(len(row["description"] or "") / 5000.0, 1.0)
     category_norm = row["category"] / 100.0
     return np.array([[is_verified, images_norm, desc_len_norm, category_norm]])
 
 
+def _description_lengths(columns, count):
+    if "description_length" in columns:
+        return np.asarray(columns["description_length"], dtype=np.float64)
+    return np.fromiter(
+        (len(description) if description else 0 for description in columns["description"]),
+        dtype=np.float64,
+        count=count,
+    )
+
+
+def prepare_features_batch(data):
+    """
+    Матрица признаков (C-contiguous, float64) для набора объявлений.
+
+    Принимает либо последовательность строк (dict, asyncpg.Record),
+    либо отображение имя столбца -> список/массив значений.
+    Вместо description можно передать готовый столбец description_length.
+    """
+    if isinstance(data, Mapping):
+        columns = data
+    else:
+        description_key = "description"
+        if data and "description_length" in data[0].keys():
+            description_key = "description_length"
+        columns = {
+            key: [row[key] for row in data]
+            for key in ("is_verified_seller", "images_qty", description_key, "category")
+        }
+
+    count = len(columns["category"])
+    features = np.empty((count, 4), dtype=np.float64)
+
+    features[:, 0] = np.asarray(columns["is_verified_seller"], dtype=bool)
+
+    # fmax/fmin вместо clip: пропуски (None -> NaN) превращаются в 0 тем же вызовом
+    images_qty = np.asarray(columns["images_qty"], dtype=np.float64)
+    np.fmin(np.fmax(images_qty / 20.0, 0.0), 1.0, out=features[:, 1])
+
+    desc_len = _description_lengths(columns, count)
+    np.fmin(np.fmax(desc_len / 5000.0, 0.0), 1.0, out=features[:, 2])
+
+    category = np.asarray(columns["category"], dtype=np.float64)
+    np.divide(category, 100.0, out=features[:, 3])
+
+    return features
+
+
+def predict_proba(model, features):
+    """Вероятности нарушения (класс 1) для матрицы признаков"""
+    return model.predict_proba(features)[:, 1]
+
+
+def lookup_prediction(model, row):
+    """Предсказание по таблице без вызова модели, если модель в режиме lookup и строка в домене"""
+    if isinstance(model, LookupTableScorer):
+        return model.score_row(row)
+    return None
+
+
 def get_prediction(model, features):
     try:
-        proba = model.predict(features)[0]
-        return proba
+        proba = predict_proba(model, features)[0]
+        return float(proba)
+    except Exception as e:
+        logger.error(f"Ошибка предсказания: {e}")
+        raise HTTPException(status_code=500, detail="Ошибка при обработке запроса")
+
+
+async def get_prediction_async(state, model, features):
+    """
+    Предсказание для одной строки признаков.
+
+    Если в состоянии приложения настроены микробатчер или исполнитель
+    инференса, вызов модели идёт через них, иначе — прямо в event loop.
+    """
+    batcher = getattr(state, "batcher", None)
+    executor = getattr(state, "inference_executor", None)
+
+    if batcher is None and executor is None:
+        return get_prediction(model, features)
+
+    try:
+        if batcher is not None:
+            return await batcher.predict(model, features)
+        return float((await executor.predict_proba(model, features))[0])
     except Exception as e:
         logger.error(f"Ошибка предсказания: {e}")
         raise HTTPException(status_code=500, detail="Ошибка при обработке запроса")
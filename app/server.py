@@ -0,0 +1,51 @@
+"""
+Production-запуск API: модель загружается один раз, затем fork на API_WORKERS процессов.
+
+Каждый процесс обслуживает общий слушающий сокет, а Kafka-продюсер,
+пул asyncpg и прочие соединения создаёт в lifespan уже после fork.
+
+Запуск: python -m app.server
+"""
+
+import logging
+import os
+import socket
+
+import uvicorn
+
+from app.clients.settings import API_HOST, API_PORT, API_WORKERS, INFERENCE_BACKEND
+from app.main import app
+from app.model import load_or_train_model_with_version
+from app.prefork import Prefork
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def main() -> None:
+    app.state.preloaded_model = load_or_train_model_with_version(
+        use_mlflow=os.getenv("USE_MLFLOW"), backend=INFERENCE_BACKEND
+    )
+
+    sock = bind_socket(API_HOST, API_PORT)
+    config = uvicorn.Config(app, host=API_HOST, port=API_PORT)
+    workers = API_WORKERS or os.cpu_count() or 1
+    logger.info(f"API слушает {API_HOST}:{API_PORT}, процессов: {workers}")
+
+    def serve(index: int) -> None:
+        uvicorn.Server(config).run(sockets=[sock])
+
+    Prefork("api", workers, serve).run()
+
+
+if __name__ == "__main__":
+    main()
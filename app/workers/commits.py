@@ -0,0 +1,136 @@
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Iterator, Optional, Set
+
+from aiokafka import ConsumerRebalanceListener
+
+from app.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+COMMITS = Counter("worker_offset_commits_total", "Commit смещений в Kafka")
+COMMIT_ERRORS = Counter("worker_offset_commit_errors_total", "Ошибки commit смещений")
+MESSAGES_PER_COMMIT = Histogram(
+    "worker_messages_per_commit",
+    "Сообщения, подтверждённые одним commit",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000),
+)
+COMMIT_TIME = Histogram("worker_offset_commit_seconds", "Время commit смещений")
+UNCOMMITTED = Gauge("worker_uncommitted_messages", "Обработанные, но ещё не закоммиченные")
+
+
+class OffsetCommitter:
+    """
+    Commit смещений раз в every_messages сообщений или interval_ms миллисекунд.
+
+    Безопасно при at-least-once: после падения незакоммиченные сообщения
+    придут повторно, а запись результата идемпотентна. every_messages=1
+    даёт прежний commit после каждого сообщения.
+    """
+
+    def __init__(self, consumer, every_messages: int = 100, interval_ms: float = 1000) -> None:
+        self._consumer = consumer
+        self.every_messages = max(every_messages, 1)
+        self.interval = interval_ms / 1000
+        self._pending = 0
+        self._offsets: Dict[Hashable, int] = {}
+        self._last_commit = time.monotonic()
+        # commit из цикла чтения и из on_partitions_revoked не должны пересекаться
+        self._lock = asyncio.Lock()
+
+    def _due(self) -> bool:
+        if self._pending >= self.every_messages:
+            return True
+        return self._pending > 0 and time.monotonic() - self._last_commit >= self.interval
+
+    async def processed(self, count: int = 1, offsets: Optional[Dict[Hashable, int]] = None):
+        """
+        Учёт обработанных сообщений. offsets — явные смещения по партициям;
+        без них commit подтверждает текущие позиции consumer.
+        """
+        self._pending += count
+        if offsets:
+            self._offsets.update(offsets)
+        UNCOMMITTED.set(self._pending)
+        await self.maybe_commit()
+
+    async def maybe_commit(self) -> None:
+        """Commit, если набралось сообщений или прошёл интервал (вызывать и в простое)"""
+        if self._due():
+            await self.commit()
+
+    async def commit(self) -> None:
+        """
+        Commit накопленного. Явные смещения отбираются по текущему назначению
+        consumer: партицию, отданную при перебалансировке, aiokafka не даст
+        закоммитить (IllegalStateError), а её сообщения уже у нового владельца.
+        При ошибке накопленное остаётся до следующей попытки.
+        """
+        async with self._lock:
+            if not self._pending:
+                return
+            pending, offsets = self._pending, self._offsets
+            self._pending, self._offsets = 0, {}
+            explicit = bool(offsets)
+            if explicit:
+                assigned = self._consumer.assignment()
+                offsets = {tp: offset for tp, offset in offsets.items() if tp in assigned}
+
+            start = time.perf_counter()
+            try:
+                if offsets:
+                    await self._consumer.commit(offsets)
+                elif not explicit:
+                    await self._consumer.commit()
+            except Exception:
+                COMMIT_ERRORS.inc()
+                # Смещения, накопленные во время commit, новее неудавшихся
+                self._pending += pending
+                self._offsets = {**offsets, **self._offsets}
+                UNCOMMITTED.set(self._pending)
+                raise
+            COMMIT_TIME.observe(time.perf_counter() - start)
+            COMMITS.inc()
+            MESSAGES_PER_COMMIT.observe(pending)
+
+            self._last_commit = time.monotonic()
+            UNCOMMITTED.set(self._pending)
+
+
+class RebalanceHandoff(ConsumerRebalanceListener):
+    """
+    Передача партиций при перебалансировке.
+
+    Цикл чтения регистрирует обработчик (register), который дорабатывает
+    и коммитит сообщения отдаваемых партиций. aiokafka вызывает его из
+    on_partitions_revoked, пока партиции ещё назначены этому consumer, так
+    что новый владелец начинает с закоммиченных смещений, а не с позиций
+    последнего пакетного commit.
+    """
+
+    def __init__(self) -> None:
+        self._on_revoked: Optional[Callable[[Set[Hashable]], Awaitable[None]]] = None
+
+    @contextlib.contextmanager
+    def register(
+        self, on_revoked: Callable[[Set[Hashable]], Awaitable[None]]
+    ) -> Iterator[None]:
+        self._on_revoked = on_revoked
+        try:
+            yield
+        finally:
+            self._on_revoked = None
+
+    async def on_partitions_revoked(self, revoked) -> None:
+        if self._on_revoked is None or not revoked:
+            return
+        try:
+            await self._on_revoked(set(revoked))
+        except Exception as e:
+            # Перебалансировка продолжится; незакоммиченное придёт новому владельцу повторно
+            logger.error(f"Не удалось передать партиции {sorted(map(str, revoked))}: {e}")
+
+    async def on_partitions_assigned(self, assigned) -> None:
+        pass
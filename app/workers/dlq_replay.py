@@ -0,0 +1,282 @@
+"""
+Повторная обработка сообщений из DLQ.
+
+Читает DLQ_TOPIC от сохранённой позиции группы до конца на момент запуска,
+отбирает сообщения по тексту ошибки и времени попадания в DLQ, переводит
+их задачи из failed в pending одним UPDATE на пачку и публикует исходные
+события в TOPIC пачками со сброшенным retry_count.
+
+Позиция в DLQ хранится в группе DLQ_REPLAY_GROUP. Запуск с фильтром
+коммитит и отвергнутые сообщения, поэтому по умолчанию у него своя группа,
+производная от фильтра (filter_group): следующий запуск без фильтра увидит
+всё, что фильтр пропустил.
+
+Запуск: python -m app.workers.dlq_replay --error "не найдено" --since 2024-01-01 --rate 500
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Hashable, List, Optional, Sequence
+
+from aiokafka import AIOKafkaConsumer, TopicPartition
+
+from app.clients.codec import decode
+from app.clients.kafka import KafkaProducer, item_key
+from app.clients.postgres import create_pg_pool
+from app.clients.settings import (
+    DLQ_REPLAY_BATCH_SIZE,
+    DLQ_REPLAY_GROUP,
+    DLQ_TOPIC,
+    KAFKA_BOOTSTRAP,
+    TOPIC,
+)
+from app.metrics import Counter
+from app.repositories.worker import WorkerRepository
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPLAYED = Counter("dlq_replayed_messages_total", "Сообщения DLQ, возвращённые в основной топик")
+
+
+@dataclass(frozen=True)
+class ReplayFilter:
+    """Отбор сообщений DLQ: подстрока любой из ошибок и интервал [since, until)"""
+
+    errors: Sequence[str] = ()
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+    def is_set(self) -> bool:
+        return bool(self.errors) or self.since is not None or self.until is not None
+
+    def matches(self, dlq_message: dict) -> bool:
+        if self.errors:
+            error = str(dlq_message.get("error", "")).lower()
+            if not any(pattern.lower() in error for pattern in self.errors):
+                return False
+        if self.since is not None or self.until is not None:
+            try:
+                failed_at = datetime.fromisoformat(dlq_message["timestamp"])
+            except (KeyError, TypeError, ValueError):
+                return False
+            if self.since is not None and failed_at < self.since:
+                return False
+            if self.until is not None and failed_at >= self.until:
+                return False
+        return True
+
+
+@dataclass
+class ReplayStats:
+    scanned: int = 0
+    matched: int = 0
+    replayed: int = 0
+    reset: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    def summary(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return (
+            f"прочитано={self.scanned}, отобрано={self.matched}, "
+            f"отправлено={self.replayed} ({self.replayed / elapsed:.0f} msg/s), "
+            f"задач в pending={self.reset}"
+        )
+
+
+class RateLimiter:
+    """Не больше rate сообщений в секунду в среднем с начала работы; rate=0 — без ограничения"""
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self._start = time.monotonic()
+        self._sent = 0
+
+    async def acquire(self, count: int) -> None:
+        if self.rate > 0:
+            delay = self._start + (self._sent + count) / self.rate - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        self._sent += count
+
+
+def filter_group(base: str, replay_filter: ReplayFilter) -> str:
+    """Группа для позиции в DLQ: base без фильтра, у каждого фильтра своя"""
+    if not replay_filter.is_set():
+        return base
+    errors = sorted(pattern.lower() for pattern in replay_filter.errors)
+    key = repr((errors, replay_filter.since, replay_filter.until)).encode("utf-8")
+    return f"{base}-filtered-{hashlib.sha1(key).hexdigest()[:12]}"
+
+
+def replay_event(dlq_message: dict) -> dict:
+    """Исходное событие для повторной обработки: счётчик попыток с нуля"""
+    event = dict(dlq_message["original_message"])
+    event.pop("retry_at", None)
+    event["retry_count"] = 0
+    return event
+
+
+async def _flush(producer, repo, events: List[dict], stats: ReplayStats, dry_run: bool):
+    if not events:
+        return
+    if not dry_run:
+        # Сначала задачи в pending: иначе воркер может успеть обработать событие
+        # раньше, а результат для задачи в статусе failed не записывается
+        stats.reset += await repo.reset_failed_tasks(
+            [event["task_id"] for event in events if event.get("task_id")],
+            [event["item_id"] for event in events if not event.get("task_id")],
+        )
+        await producer.send_many(TOPIC, events, [item_key(event["item_id"]) for event in events])
+        REPLAYED.inc(len(events))
+    stats.replayed += len(events)
+
+
+async def _reached_end(consumer, end_offsets: Dict[Hashable, int]) -> bool:
+    for tp, end in end_offsets.items():
+        if await consumer.position(tp) < end:
+            return False
+    return True
+
+
+async def replay(
+    consumer,
+    producer,
+    repo: WorkerRepository,
+    end_offsets: Dict[Hashable, int],
+    replay_filter: ReplayFilter,
+    batch_size: int = DLQ_REPLAY_BATCH_SIZE,
+    rate: float = 0,
+    dry_run: bool = False,
+    progress_interval: float = 5.0,
+) -> ReplayStats:
+    """
+    Чтение DLQ до end_offsets и отправка отобранных событий пачками по batch_size.
+
+    Сообщения со смещением от end_offsets и дальше пропускаются. Смещения
+    коммитятся после отправки каждой пачки (не дальше end_offsets), поэтому
+    прерванный запуск продолжится с места остановки. Коммит включает и
+    отвергнутые фильтром сообщения, так что у фильтра должна быть своя группа
+    (filter_group).
+    В режиме dry_run ничего не отправляется и не коммитится.
+    """
+    stats = ReplayStats()
+    limiter = RateLimiter(rate)
+    last_progress = time.monotonic()
+
+    while not await _reached_end(consumer, end_offsets):
+        records = await consumer.getmany(timeout_ms=1000, max_records=batch_size)
+        events = []
+        offsets = {}
+        for tp, messages in records.items():
+            # Попавшие в DLQ после старта остаются следующему запуску: не
+            # повторяются и не коммитятся
+            messages = [msg for msg in messages if msg.offset < end_offsets[tp]]
+            for msg in messages:
+                stats.scanned += 1
+                if replay_filter.matches(msg.value):
+                    events.append(replay_event(msg.value))
+            if messages:
+                offsets[tp] = messages[-1].offset + 1
+        stats.matched += len(events)
+
+        # getmany отдаёт не больше batch_size сообщений, это и есть пачка отправки
+        await limiter.acquire(len(events))
+        await _flush(producer, repo, events, stats, dry_run)
+        if offsets and not dry_run:
+            await consumer.commit(offsets)
+
+        if time.monotonic() - last_progress >= progress_interval:
+            logger.info(f"[dlq-replay] {stats.summary()}")
+            last_progress = time.monotonic()
+
+    logger.info(f"[dlq-replay] готово: {stats.summary()}")
+    return stats
+
+
+def _parse_time(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ожидается время в формате ISO 8601: {value}")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Повторная обработка сообщений из DLQ")
+    parser.add_argument(
+        "--error",
+        action="append",
+        default=[],
+        help="подстрока текста ошибки (можно несколько, без учёта регистра)",
+    )
+    parser.add_argument("--since", type=_parse_time, help="попавшие в DLQ не раньше (ISO 8601)")
+    parser.add_argument("--until", type=_parse_time, help="попавшие в DLQ раньше (ISO 8601)")
+    parser.add_argument(
+        "--rate", type=float, default=0, help="предел сообщений в секунду, 0 — без предела"
+    )
+    parser.add_argument("--batch-size", type=int, default=DLQ_REPLAY_BATCH_SIZE)
+    parser.add_argument(
+        "--group",
+        help=(
+            "группа, в которой хранится позиция в DLQ; по умолчанию DLQ_REPLAY_GROUP, "
+            "а с фильтром — своя группа для каждого фильтра"
+        ),
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="только посчитать подходящие сообщения"
+    )
+    return parser.parse_args(argv)
+
+
+async def main(argv=None) -> ReplayStats:
+    args = parse_args(argv)
+    replay_filter = ReplayFilter(args.error, args.since, args.until)
+    group = args.group or filter_group(DLQ_REPLAY_GROUP, replay_filter)
+
+    consumer = AIOKafkaConsumer(
+        bootstrap_servers=KAFKA_BOOTSTRAP,
+        group_id=group,
+        enable_auto_commit=False,
+        auto_offset_reset="earliest",
+        value_deserializer=decode,
+    )
+    await consumer.start()
+    producer = KafkaProducer(KAFKA_BOOTSTRAP)
+    await producer.start()
+    pool = await create_pg_pool(min_size=1, max_size=1)
+
+    try:
+        # Ручное назначение всех партиций: читаем DLQ целиком, а не долю группы
+        await consumer.topics()
+        partitions = [
+            TopicPartition(DLQ_TOPIC, partition)
+            for partition in sorted(consumer.partitions_for_topic(DLQ_TOPIC) or ())
+        ]
+        consumer.assign(partitions)
+        # Сообщения, попавшие в DLQ во время повтора, оставляем следующему запуску
+        end_offsets = await consumer.end_offsets(partitions)
+        logger.info(f"[dlq-replay] {DLQ_TOPIC} -> {TOPIC}, группа {group}")
+
+        return await replay(
+            consumer,
+            producer,
+            WorkerRepository(pool),
+            end_offsets,
+            replay_filter,
+            batch_size=args.batch_size,
+            rate=args.rate,
+            dry_run=args.dry_run,
+        )
+    finally:
+        await consumer.stop()
+        await producer.stop()
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
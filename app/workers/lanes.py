@@ -0,0 +1,225 @@
+import asyncio
+import logging
+from collections import deque
+from itertools import zip_longest
+from operator import attrgetter
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Iterable, List, Optional
+
+from app.metrics import Gauge, Histogram
+from app.workers.commits import OffsetCommitter, RebalanceHandoff
+
+logger = logging.getLogger(__name__)
+
+PENDING = Gauge("worker_pending_messages", "Сообщения, принятые в обработку и ещё не завершённые")
+POLL_SIZE = Histogram(
+    "worker_poll_records",
+    "Сообщения, полученные одним getmany",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000),
+)
+
+
+class OffsetTracker:
+    """
+    Смещения, которые можно закоммитить по каждой партиции.
+
+    Смещение партиции коммитится, только когда завершены все сообщения
+    до него включительно, даже если более поздние закончились раньше.
+    """
+
+    def __init__(self) -> None:
+        # По партиции: [offset, done] в порядке поступления
+        self._in_flight: Dict[Hashable, Deque[List]] = {}
+        self._committable: Dict[Hashable, int] = {}
+        # Сообщения, чьи смещения уже можно коммитить
+        self.completed = 0
+
+    def start(self, tp: Hashable, offset: int) -> None:
+        self._in_flight.setdefault(tp, deque()).append([offset, False])
+
+    def finish(self, tp: Hashable, offset: int) -> None:
+        for entry in self._in_flight.get(tp, ()):
+            if entry[0] == offset:
+                entry[1] = True
+                break
+
+        pending = self._in_flight.get(tp)
+        while pending and pending[0][1]:
+            # Kafka ожидает смещение следующего сообщения, которое нужно прочитать
+            self._committable[tp] = pending.popleft()[0] + 1
+            self.completed += 1
+
+    def committable(self) -> Dict[Hashable, int]:
+        """Новые смещения для commit с прошлого вызова"""
+        offsets, self._committable = self._committable, {}
+        return offsets
+
+    def pending(self) -> int:
+        return sum(len(entries) for entries in self._in_flight.values())
+
+    def forget(self, tps: Iterable[Hashable]) -> None:
+        """Партиции, отданные при перебалансировке, больше не отслеживаются"""
+        for tp in tps:
+            self._in_flight.pop(tp, None)
+            self._committable.pop(tp, None)
+
+
+class PartitionLanes:
+    """
+    Параллельная обработка сообщений разных партиций.
+
+    У каждой партиции своя очередь и своя задача-обработчик, поэтому внутри
+    партиции порядок сохраняется, а медленное сообщение одной партиции не
+    задерживает другие. Одновременно выполняется не больше max_in_flight
+    обработчиков; принятых и не завершённых сообщений не больше max_pending
+    (по умолчанию 4 * max_in_flight) — submit ждёт свободного места.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[None]],
+        max_in_flight: int,
+        tracker: Optional[OffsetTracker] = None,
+        max_pending: Optional[int] = None,
+    ) -> None:
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight должен быть положительным")
+        self._handler = handler
+        self._running = asyncio.Semaphore(max_in_flight)
+        self._slots = asyncio.Semaphore(max(max_pending or 4 * max_in_flight, max_in_flight))
+        self.tracker = tracker or OffsetTracker()
+        self._queues: Dict[Hashable, asyncio.Queue] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._error: Optional[BaseException] = None
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    async def submit(self, tp: Hashable, offset: int, item: Any) -> None:
+        self._raise_if_failed()
+        await self._slots.acquire()
+        self._raise_if_failed()
+
+        self.tracker.start(tp, offset)
+        PENDING.inc()
+        if tp not in self._queues:
+            self._queues[tp] = asyncio.Queue()
+            self._tasks[tp] = asyncio.create_task(self._run(tp, self._queues[tp]))
+        self._queues[tp].put_nowait((offset, item))
+
+    async def _run(self, tp: Hashable, queue: asyncio.Queue) -> None:
+        while True:
+            offset, item = await queue.get()
+            try:
+                if self._error is None:
+                    async with self._running:
+                        await self._handler(item)
+                    self.tracker.finish(tp, offset)
+            except Exception as e:
+                # Смещение не помечается завершённым и не будет закоммичено;
+                # ошибка пробрасывается из следующего submit
+                logger.error(f"Ошибка обработки {tp}@{offset}: {e}")
+                self._error = e
+            finally:
+                PENDING.dec()
+                self._slots.release()
+                queue.task_done()
+
+    async def drain(self, tps: Optional[Iterable[Hashable]] = None) -> None:
+        """Ожидание обработки принятых сообщений партиций tps (по умолчанию всех)"""
+        tps = self._queues.keys() if tps is None else tps
+        await asyncio.gather(*(self._queues[tp].join() for tp in tps if tp in self._queues))
+
+    async def drop(self, tps: Iterable[Hashable]) -> None:
+        """Удаление очередей и обработчиков партиций (после drain), отданных при перебалансировке"""
+        tps = [tp for tp in tps if tp in self._queues]
+        tasks = [self._tasks.pop(tp) for tp in tps]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for tp in tps:
+            # Сообщения, принятые после drain, не будут обработаны: освобождаем их места
+            queue = self._queues.pop(tp)
+            while not queue.empty():
+                queue.get_nowait()
+                PENDING.dec()
+                self._slots.release()
+        self.tracker.forget(tps)
+
+    async def close(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+        self._queues.clear()
+
+
+def _round_robin(records):
+    """(tp, msg) по очереди из каждой партиции, чтобы длинная партиция не заняла все места"""
+    per_partition = [[(tp, msg) for msg in messages] for tp, messages in records.items()]
+    for step in zip_longest(*per_partition):
+        for pair in step:
+            if pair is not None:
+                yield pair
+
+
+async def consume_partitioned(
+    consumer,
+    handler: Callable[[Any], Awaitable[None]],
+    max_in_flight: int,
+    max_records: int,
+    timeout_ms: int,
+    max_pending: Optional[int] = None,
+    commit_every: int = 1,
+    commit_interval_ms: float = 0,
+    payload: Callable[[Any], Any] = attrgetter("value"),
+    handoff: Optional[RebalanceHandoff] = None,
+    drain_on_revoke: bool = True,
+) -> None:
+    """
+    Чтение consumer.getmany() и обработка payload(msg) (по умолчанию msg.value)
+    через PartitionLanes с commit смещений, до которых всё обработано, раз
+    в commit_every сообщений или commit_interval_ms.
+
+    handoff — listener, переданный в consumer.subscribe: при отзыве партиций
+    их принятые сообщения дорабатываются (drain_on_revoke=False — отменяются
+    и придут новому владельцу), смещения коммитятся, а очереди удаляются.
+    """
+    lanes = PartitionLanes(handler, max_in_flight, max_pending=max_pending)
+    committer = OffsetCommitter(consumer, commit_every, commit_interval_ms)
+    reported = 0
+
+    async def record_progress() -> None:
+        nonlocal reported
+        offsets = lanes.tracker.committable()
+        if offsets:
+            # Счётчик сдвигается до await: record_progress вызывается и из on_revoked
+            count, reported = lanes.tracker.completed - reported, lanes.tracker.completed
+            await committer.processed(count, offsets)
+        else:
+            await committer.maybe_commit()
+
+    async def on_revoked(revoked) -> None:
+        if drain_on_revoke:
+            await lanes.drain(revoked)
+        await record_progress()
+        await committer.commit()
+        await lanes.drop(revoked)
+
+    try:
+        with (handoff or RebalanceHandoff()).register(on_revoked):
+            while True:
+                records = await consumer.getmany(timeout_ms=timeout_ms, max_records=max_records)
+                if records:
+                    POLL_SIZE.observe(sum(len(messages) for messages in records.values()))
+                for tp, msg in _round_robin(records):
+                    await lanes.submit(tp, msg.offset, payload(msg))
+                await record_progress()
+    finally:
+        # Дожидаемся уже принятых сообщений, чтобы не обрабатывать их повторно
+        try:
+            await lanes.drain()
+            await record_progress()
+            await committer.commit()
+        finally:
+            await lanes.close()
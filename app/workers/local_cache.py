@@ -0,0 +1,124 @@
+"""
+Локальные кэши воркера по партициям.
+
+Сообщения ключуются по item_id, поэтому все запросы одного объявления
+приходят в одну партицию и к одному процессу: кэш партиции видит
+повторные запросы своих объявлений и не делит место с чужими. При
+перебалансировке кэши отданных партиций удаляются — их объявления теперь
+обрабатывает другой процесс.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from app.metrics import Counter, Gauge
+
+LOOKUPS = Counter(
+    "worker_local_cache_lookups_total",
+    "Обращения к локальному кэшу воркера",
+    labelnames=("cache", "partition", "result"),
+)
+HIT_RATIO = Gauge(
+    "worker_local_cache_hit_ratio",
+    "Доля попаданий в локальный кэш партиции с запуска процесса",
+    labelnames=("cache", "partition"),
+)
+ENTRIES = Gauge(
+    "worker_local_cache_entries",
+    "Записи локального кэша партиции",
+    labelnames=("cache", "partition"),
+)
+
+
+class LRUCache:
+    """Не больше max_size записей, вытесняется давно не использованная; записи живут ttl секунд"""
+
+    def __init__(
+        self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        # key -> (срок годности, значение), от давно использованных к недавним
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class PartitionCaches:
+    """
+    LRUCache на каждую партицию с учётом попаданий и промахов по партициям.
+
+    max_size — предел записей одной партиции, 0 отключает кэш. Партиция
+    None (сообщение без известной партиции) не кэшируется.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._caches: Dict[Hashable, LRUCache] = {}
+
+    def _cache(self, partition: Hashable) -> Optional[LRUCache]:
+        if self.max_size <= 0 or partition is None:
+            return None
+        cache = self._caches.get(partition)
+        if cache is None:
+            cache = self._caches[partition] = LRUCache(self.max_size, self.ttl, self._clock)
+        return cache
+
+    def get(self, partition: Hashable, key: Hashable) -> Optional[Any]:
+        cache = self._cache(partition)
+        if cache is None:
+            return None
+        value = cache.get(key)
+        result = "miss" if value is None else "hit"
+        LOOKUPS.inc(cache=self.name, partition=partition, result=result)
+        return value
+
+    def put(self, partition: Hashable, key: Hashable, value: Any) -> None:
+        cache = self._cache(partition)
+        if cache is not None:
+            cache.put(key, value)
+
+    def retain(self, partitions: Iterable[Hashable]) -> None:
+        """Удаление кэшей партиций, которых нет в partitions (после перебалансировки)"""
+        keep = set(partitions)
+        for partition in [p for p in self._caches if p not in keep]:
+            del self._caches[partition]
+            ENTRIES.set(0, cache=self.name, partition=partition)
+
+    def report(self) -> None:
+        """Доля попаданий и размер по партициям; вызывается при выводе метрик"""
+        for partition, cache in self._caches.items():
+            hits = LOOKUPS.value(cache=self.name, partition=partition, result="hit")
+            misses = LOOKUPS.value(cache=self.name, partition=partition, result="miss")
+            if hits + misses:
+                HIT_RATIO.set(hits / (hits + misses), cache=self.name, partition=partition)
+            ENTRIES.set(len(cache), cache=self.name, partition=partition)
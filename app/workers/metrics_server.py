@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+from app.metrics import REGISTRY, Gauge, Registry
+
+logger = logging.getLogger(__name__)
+
+PARTITION_LAG = Gauge(
+    "worker_partition_lag",
+    "Непрочитанные сообщения партиции (highwater - позиция consumer)",
+    labelnames=("topic", "partition"),
+)
+
+
+async def update_partition_lag(consumer) -> None:
+    """Лаг по каждой назначенной партиции; считается при запросе метрик, не в цикле чтения"""
+    for tp in consumer.assignment():
+        highwater = consumer.highwater(tp)
+        if highwater is None:
+            continue
+        lag = max(highwater - await consumer.position(tp), 0)
+        PARTITION_LAG.set(lag, topic=tp.topic, partition=tp.partition)
+
+
+class MetricsServer:
+    """
+    Минимальный HTTP-сервер метрик процесса в текстовом формате Prometheus.
+
+    Отвечает на GET /metrics и ничего не делает между запросами, поэтому
+    цикл обработки сообщений платит только за обновление самих метрик.
+    before_render вызывается перед выводом (например, для расчёта лага).
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        registry: Registry = REGISTRY,
+        before_render: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self._registry = registry
+        self._before_render = before_render
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Порт 0 — выбор свободного порта системой
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Метрики воркера на http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _render(self) -> str:
+        if self._before_render is not None:
+            try:
+                await self._before_render()
+            except Exception as e:
+                logger.warning(f"Не удалось обновить метрики перед выводом: {e}")
+        return self._registry.render()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            # Заголовки запроса не нужны, но их надо дочитать до пустой строки
+            while (await reader.readline()).strip():
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", (await self._render()).encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"Not Found\n"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode("latin-1")
+                + body
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
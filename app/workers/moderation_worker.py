@@ -1,27 +1,169 @@
+import argparse
 import asyncio
-import json
 import logging
+import multiprocessing
 import os
+import signal
 from datetime import datetime
+from functools import partial
+from types import SimpleNamespace
 
 from aiokafka import AIOKafkaConsumer
 
-from app.clients.kafka import KafkaProducer
-from app.clients.postgres import get_pg_connection
+from app.clients.codec import decode
+from app.clients.kafka import KafkaProducer, item_key
+from app.clients.postgres import create_pg_pool
 from app.clients.settings import (
     CONSUMER_GROUP,
     DLQ_TOPIC,
+    INFERENCE_BACKEND,
+    INFERENCE_EXECUTOR,
+    INFERENCE_EXECUTOR_WORKERS,
     KAFKA_BOOTSTRAP,
     MAX_RETRIES,
-    RETRY_DELAY_SECONDS,
+    MODEL_RELOAD_INTERVAL_SECONDS,
     TOPIC,
+    WORKER_BATCH_SIZE,
+    WORKER_BATCH_TIMEOUT_MS,
+    WORKER_CACHE_RESULTS,
+    WORKER_COMMIT_EVERY_MESSAGES,
+    WORKER_COMMIT_INTERVAL_MS,
+    WORKER_DB_COMMAND_TIMEOUT_SECONDS,
+    WORKER_DB_POOL_SIZE,
+    WORKER_FEATURE_CACHE_SIZE,
+    WORKER_FEATURE_CACHE_TTL_SECONDS,
+    WORKER_MAX_IN_FLIGHT,
+    WORKER_METRICS_HOST,
+    WORKER_METRICS_PORT,
+    WORKER_MODE,
+    WORKER_PROCESSES,
+    WORKER_STATUS_INTERVAL_SECONDS,
 )
-from app.model import load_or_train_model
-from app.routers.utils import get_prediction, prepare_features
+from app.inference.executor import InferenceExecutor
+from app.inference.reloader import ModelReloader, set_model
+from app.metrics import Counter, Histogram
+from app.model import (
+    current_model_version,
+    load_model_version,
+    load_or_train_model_with_version,
+    model_version_number,
+)
+from app.prefork import Prefork
+from app.repositories.moderation import ModerationResultCache
+from app.repositories.worker import WorkerRepository, prepare_statements
+from app.routers.utils import get_prediction, prepare_features_batch
+from app.workers.commits import OffsetCommitter, RebalanceHandoff
+from app.workers.lanes import POLL_SIZE, consume_partitioned
+from app.workers.local_cache import PartitionCaches
+from app.workers.metrics_server import MetricsServer, update_partition_lag
+from app.workers.retry import schedule_retry
+from app.workers.supervisor import StatusBoard, report_stats
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MESSAGES = Counter(
+    "worker_messages_total", "Сообщения, обработанные воркером", labelnames=("status",)
+)
+
+RESULTS_SKIPPED = Counter(
+    "worker_results_skipped_total",
+    "Повторно доставленные сообщения: задача уже не pending, результат не перезаписан",
+)
+
+LEGACY_MESSAGES = Counter(
+    "worker_legacy_messages_total",
+    "Сообщения старой схемы без task_id: задачу приходится искать в БД",
+)
+
+
+DLQ_MESSAGES = Counter("worker_dlq_messages_total", "Сообщения, отправленные в DLQ")
+DLQ_ERRORS = Counter("worker_dlq_errors_total", "Ошибки отправки в DLQ")
+
+# fetch — признаки и задача из БД, score — инференс, update — запись результата,
+# cache — запись результата в Redis, retry/dlq — отправка на повтор или в DLQ
+STAGE_TIME = Histogram(
+    "worker_stage_seconds", "Время этапа обработки сообщения", labelnames=("stage",)
+)
+
+
+RESULT_CACHE = ModerationResultCache()
+
+# Признаки объявления вместе с верификацией продавца (одна строка FEATURES_QUERY)
+FEATURE_CACHE = PartitionCaches(
+    "features", WORKER_FEATURE_CACHE_SIZE, WORKER_FEATURE_CACHE_TTL_SECONDS
+)
+
+
+class WorkerRebalanceListener(RebalanceHandoff):
+    """
+    Перед отзывом партиций цикл чтения коммитит обработанное (RebalanceHandoff),
+    после назначения остаются только кэши назначенных партиций
+    """
+
+    async def on_partitions_assigned(self, assigned) -> None:
+        FEATURE_CACHE.retain(tp.partition for tp in assigned)
+
+
+async def update_worker_metrics(consumer) -> None:
+    await update_partition_lag(consumer)
+    FEATURE_CACHE.report()
+
+
+def processed_messages() -> float:
+    return MESSAGES.value(status="completed") + MESSAGES.value(status="failed")
+
+
+def result_payload(task_id: int, is_violation: bool, probability: float) -> dict:
+    """Готовый результат в формате ModerationResultResponse"""
+    return {
+        "task_id": task_id,
+        "status": "completed",
+        "is_violation": is_violation,
+        "probability": probability,
+    }
+
+
+async def cache_results(results) -> None:
+    """Write-through готовых результатов в Redis; ошибки кэша обработку не прерывают"""
+    if WORKER_CACHE_RESULTS and results:
+        with STAGE_TIME.time(stage="cache"):
+            await RESULT_CACHE.set_many(results)
+
+
+async def get_features(repo: WorkerRepository, item_id: int, partition=None):
+    """Признаки из кэша партиции или из БД; отсутствующие объявления не кэшируются"""
+    row = FEATURE_CACHE.get(partition, item_id)
+    if row is None:
+        row = await repo.get_features(item_id)
+        if row:
+            FEATURE_CACHE.put(partition, item_id, row)
+    return row
+
+
+async def get_features_many(repo: WorkerRepository, events, partitions=None):
+    """
+    Признаки пачки: из кэшей партиций сообщений, недостающие одним SELECT по ANY($1).
+    partitions — партиции сообщений в порядке events.
+    """
+    partitions = [None] * len(events) if partitions is None else partitions
+    rows, missing = {}, {}
+    for event, partition in zip(events, partitions):
+        item_id = event["item_id"]
+        if item_id in rows or item_id in missing:
+            continue
+        row = FEATURE_CACHE.get(partition, item_id)
+        if row is None:
+            missing[item_id] = partition
+        else:
+            rows[item_id] = row
+    if missing:
+        fetched = await repo.get_features_many(missing)
+        for item_id, row in fetched.items():
+            FEATURE_CACHE.put(missing[item_id], item_id, row)
+        rows.update(fetched)
+    return rows
+
 
 async def handle_error(producer, conn, event, error_msg, task_id=None):
 
@@ -33,117 +175,397 @@ async def handle_error(producer, conn, event, error_msg, task_id=None):
     }
 
     try:
-        await producer.send_json(DLQ_TOPIC, dlq_message)
+        await producer.send_json(DLQ_TOPIC, dlq_message, key=item_key(event["item_id"]))
+        DLQ_MESSAGES.inc()
         logger.info("Отправлено в DLQ")
     except Exception as e:
+        DLQ_ERRORS.inc()
         logger.error(f"Ошибка отправки в DLQ: {e}")
 
     if task_id:
-        await conn.execute(
-            "UPDATE moderation_results SET status='failed', error_message=$1 WHERE id=$2",
-            error_msg,
-            task_id,
-        )
+        await WorkerRepository(conn).fail_task(task_id, error_msg)
 
 
-async def main():
-    model = load_or_train_model(use_mlflow=os.getenv("USE_MLFLOW"))
-    logger.info("Модель загружена")
+async def handle_failures(producer, conn, failures) -> None:
+    """
+    Повтор или DLQ для упавших сообщений: failures — список (event, error_msg, task_id).
 
-    async with get_pg_connection() as conn:
-        producer = KafkaProducer(KAFKA_BOOTSTRAP)
-        await producer.start()
+    Повтор не ждёт задержку в цикле чтения: событие уходит в топик отложенных
+    повторов, откуда retry_worker вернёт его в TOPIC, когда подойдёт срок.
+    """
+    MESSAGES.inc(len(failures), status="failed")
+    for event, error_msg, task_id in failures:
+        retry = event.get("retry_count", 0)
+        if retry < MAX_RETRIES - 1:
+            event["retry_count"] = retry + 1
+            with STAGE_TIME.time(stage="retry"):
+                delay = await schedule_retry(producer, event)
+            logger.info(f"Повтор {retry + 2} для {event['item_id']} через {delay:.1f} c")
+        else:
+            with STAGE_TIME.time(stage="dlq"):
+                await handle_error(producer, conn, event, error_msg, task_id)
 
-        consumer = AIOKafkaConsumer(
-            TOPIC,
-            bootstrap_servers=KAFKA_BOOTSTRAP,
-            group_id=CONSUMER_GROUP,
-            enable_auto_commit=False,
-            auto_offset_reset="earliest",
-            value_deserializer=lambda v: json.loads(v.decode("utf-8")),
-        )
-        await consumer.start()
-        logger.info(f"[worker] consuming {TOPIC} as group={CONSUMER_GROUP}")
 
+async def process_message(
+    state, executor, repo: WorkerRepository, producer, event, partition=None
+) -> None:
+    """
+    Обработка одного сообщения: признаки, предсказание, запись результата.
+    partition — партиция сообщения для локального кэша признаков.
+    """
+    item_id = event["item_id"]
+    task_id = event.get("task_id")
+
+    # Модель и версия берутся вместе: горячая перезагрузка может заменить их во время await
+    model, version = state.model, model_version_number(state.model_version)
+
+    try:
+        logger.info(f"item_id={item_id}, task_id={task_id}")
+
+        with STAGE_TIME.time(stage="fetch"):
+            row = await get_features(repo, item_id, partition)
+            if not row:
+                raise ValueError(f"Объявление {item_id} не найдено")
+
+            if not task_id:
+                # Совместимость с сообщениями, отправленными до появления task_id
+                LEGACY_MESSAGES.inc()
+                task_id = await repo.find_pending_task(item_id)
+            if not task_id:
+                raise ValueError(f"Нет задачи для item_id={item_id}")
+
+        with STAGE_TIME.time(stage="score"):
+            features = prepare_features_batch([row])
+            proba = await executor.run(get_prediction, model, features)
+            is_violation = proba >= 0.5
+
+        with STAGE_TIME.time(stage="update"):
+            applied = await repo.complete_task(
+                task_id, bool(is_violation), float(proba), version
+            )
+        MESSAGES.inc(status="completed")
+        if not applied:
+            RESULTS_SKIPPED.inc()
+            logger.info(f"Задача {task_id} уже завершена, результат не перезаписан")
+            return
+
+        await cache_results([result_payload(task_id, bool(is_violation), float(proba))])
+
+        logger.info(f"is_violation={is_violation}, probability={proba:.3f}")
+
+    except Exception as e:
+        await handle_failures(producer, repo.conn, [(event, str(e), task_id)])
+
+
+async def process_batch(
+    state, executor, repo: WorkerRepository, producer, events, partitions=None
+) -> None:
+    """
+    Обработка пачки сообщений: один SELECT признаков по ANY($1) для не найденных
+    в кэше, одно предсказание на матрицу и один UPDATE ... FROM unnest(...).
+    partitions — партиции сообщений в порядке events.
+    """
+    with STAGE_TIME.time(stage="fetch"):
+        rows = await get_features_many(repo, events, partitions)
+        without_task = {
+            event["item_id"]
+            for event in events
+            if not event.get("task_id") and event["item_id"] in rows
+        }
+        # Сообщения с task_id обходятся без поиска задачи; поиск только для старой схемы
+        pending = {}
+        if without_task:
+            LEGACY_MESSAGES.inc(len(without_task))
+            pending = await repo.find_pending_tasks(without_task)
+
+    ready, failures = [], []
+    for event in events:
+        item_id = event["item_id"]
+        task_id = event.get("task_id") or pending.get(item_id)
+        if item_id not in rows:
+            failures.append((event, f"Объявление {item_id} не найдено", task_id))
+        elif not task_id:
+            failures.append((event, f"Нет задачи для item_id={item_id}", None))
+        else:
+            ready.append((event, task_id))
+
+    if ready:
+        model, version = state.model, model_version_number(state.model_version)
         try:
+            with STAGE_TIME.time(stage="score"):
+                features = prepare_features_batch([rows[event["item_id"]] for event, _ in ready])
+                proba = await executor.predict_proba(model, features)
+            task_ids = [task_id for _, task_id in ready]
+            violations, probabilities = (proba >= 0.5).tolist(), proba.tolist()
+            with STAGE_TIME.time(stage="update"):
+                applied = await repo.complete_tasks(task_ids, violations, probabilities, version)
+            MESSAGES.inc(len(ready), status="completed")
+            RESULTS_SKIPPED.inc(len(ready) - len(applied))
+            logger.info(f"Пачка: обработано {len(ready)} из {len(events)} сообщений")
+        except Exception as e:
+            failures.extend((event, str(e), task_id) for event, task_id in ready)
+        else:
+            # В кэш только применённые результаты: остальные задачи уже завершены
+            results = {
+                task_id: result_payload(task_id, is_violation, probability)
+                for task_id, is_violation, probability in zip(task_ids, violations, probabilities)
+            }
+            await cache_results([results[task_id] for task_id in applied])
+
+    if failures:
+        await handle_failures(producer, repo.conn, failures)
+
+
+def _committer(consumer) -> OffsetCommitter:
+    return OffsetCommitter(consumer, WORKER_COMMIT_EVERY_MESSAGES, WORKER_COMMIT_INTERVAL_MS)
+
+
+def _commit_when_idle(committer: OffsetCommitter, idle: asyncio.Event):
+    """
+    Обработчик отзыва партиций для single и batch: ждёт конца текущего
+    сообщения или пачки и коммитит позиции, пока партиции ещё назначены
+    """
+    async def on_revoked(revoked) -> None:
+        # Цикл мог снова взять сообщения, пока обработчик просыпался
+        while not idle.is_set():
+            await idle.wait()
+        await committer.commit()
+
+    return on_revoked
+
+
+async def consume_single(consumer, state, executor, repo, producer, handoff=None) -> None:
+    """
+    Построчная обработка. Commit текущих позиций раз в WORKER_COMMIT_EVERY_MESSAGES
+    сообщений или WORKER_COMMIT_INTERVAL_MS (проверяется при следующем сообщении),
+    а также перед отзывом партиций через handoff.
+    """
+    committer = _committer(consumer)
+    idle = asyncio.Event()
+    idle.set()
+    try:
+        with (handoff or RebalanceHandoff()).register(_commit_when_idle(committer, idle)):
             async for msg in consumer:
-                try:
-                    event = msg.value
-                    item_id = event["item_id"]
-                    task_id = event.get("task_id")
-                    retry = event.get("retry_count", 0)
-
-                    logger.info(f"item_id={item_id}, task_id={task_id}")
-
-                    row = await conn.fetchrow(
-                        """
-                        SELECT 
-                            s.is_verified as is_verified_seller,
-                            a.images_qty,
-                            a.description,
-                            a.category
-                        FROM advertisement a
-                        JOIN sellers s ON a.seller_id = s.seller_id
-                        WHERE a.item_id = $1
-                        """,
-                        item_id,
-                    )
-
-                    if not row:
-                        raise ValueError(f"Объявление {item_id} не найдено")
-
-                    if not task_id:
-                        task_row = await conn.fetchrow(
-                            """
-                            SELECT id FROM moderation_results 
-                            WHERE item_id = $1 AND status = 'pending'
-                            ORDER BY created_at DESC
-                            LIMIT 1
-                            """,
-                            item_id,
-                        )
-                        task_id = task_row["id"] if task_row else None
-
-                    if not task_id:
-                        raise ValueError(f"Нет задачи для item_id={item_id}")
-
-                    features = prepare_features(row)
-                    proba = get_prediction(model, features)
-                    is_violation = proba >= 0.5
-
-                    await conn.execute(
-                        """
-                        UPDATE moderation_results 
-                        SET status = 'completed', 
-                            is_violation = $1, 
-                            probability = $2,
-                            processed_at = CURRENT_TIMESTAMP
-                        WHERE id = $3
-                        """,
-                        bool(is_violation),
-                        float(proba),
-                        task_id,
-                    )
-
-                    logger.info(f"is_violation={is_violation}, probability={proba:.3f}")
-
-                    await consumer.commit()
-
-                except Exception as e:
-                    if retry < MAX_RETRIES - 1:
-                        event["retry_count"] = retry + 1
-                        await asyncio.sleep(RETRY_DELAY_SECONDS)
-                        await producer.send_json(TOPIC, event)
-                        logger.info(f"Повтор {retry + 2} для {item_id}")
-                    else:
-                        await handle_error(producer, conn, event, str(e), task_id)
-
-                    await consumer.commit()
-
-        finally:
-            await consumer.stop()
-            await producer.stop()
+                idle.clear()
+                await process_message(state, executor, repo, producer, msg.value, msg.partition)
+                idle.set()
+                await committer.processed()
+    finally:
+        # Позиция уже за прерванным сообщением: commit потерял бы его, пусть придёт повторно
+        if idle.is_set():
+            await committer.commit()
+
+
+async def consume_batches(consumer, state, executor, repo, producer, handoff=None) -> None:
+    """Чтение до WORKER_BATCH_SIZE сообщений за раз, commit по тем же правилам, что в single"""
+    committer = _committer(consumer)
+    idle = asyncio.Event()
+    idle.set()
+    try:
+        with (handoff or RebalanceHandoff()).register(_commit_when_idle(committer, idle)):
+            while True:
+                records = await consumer.getmany(
+                    timeout_ms=WORKER_BATCH_TIMEOUT_MS, max_records=WORKER_BATCH_SIZE
+                )
+                messages = [msg for batch in records.values() for msg in batch]
+                if not messages:
+                    await committer.maybe_commit()
+                    continue
+                POLL_SIZE.observe(len(messages))
+                idle.clear()
+                await process_batch(
+                    state,
+                    executor,
+                    repo,
+                    producer,
+                    [msg.value for msg in messages],
+                    [msg.partition for msg in messages],
+                )
+                idle.set()
+                await committer.processed(len(messages))
+    finally:
+        if idle.is_set():
+            await committer.commit()
+
+
+async def consume_concurrent(
+    consumer, state, executor, repo, producer, handoff=None
+) -> None:
+    """
+    Параллельная обработка партиций: до WORKER_MAX_IN_FLIGHT сообщений одновременно,
+    порядок внутри партиции сохраняется. Смещение коммитится, только когда
+    обработаны все предыдущие сообщения его партиции; отзываемые партиции
+    дорабатываются и коммитятся через handoff.
+    """
+    async def handle(msg) -> None:
+        await process_message(state, executor, repo, producer, msg.value, msg.partition)
+
+    await consume_partitioned(
+        consumer,
+        handle,
+        payload=lambda msg: msg,
+        max_in_flight=WORKER_MAX_IN_FLIGHT,
+        max_records=WORKER_BATCH_SIZE,
+        timeout_ms=WORKER_BATCH_TIMEOUT_MS,
+        commit_every=WORKER_COMMIT_EVERY_MESSAGES,
+        commit_interval_ms=WORKER_COMMIT_INTERVAL_MS,
+        handoff=handoff,
+    )
+
+
+def db_pool_size() -> int:
+    if WORKER_DB_POOL_SIZE:
+        return WORKER_DB_POOL_SIZE
+    return WORKER_MAX_IN_FLIGHT if WORKER_MODE == "concurrent" else 2
+
+
+CONSUMERS = {
+    "single": consume_single,
+    "batch": consume_batches,
+    "concurrent": consume_concurrent,
+}
+
+
+async def main(preloaded=None, stats_queue=None, process_index: int = 0):
+    """
+    Воркер модерации. preloaded — (model, version), загруженные супервизором до fork;
+    в stats_queue процесс периодически отправляет счётчик сообщений и лаг.
+    Метрики процесса отдаются на WORKER_METRICS_PORT + process_index.
+    """
+    if WORKER_MODE not in CONSUMERS:
+        raise ValueError(f"Неизвестный режим воркера: {WORKER_MODE}")
+
+    use_mlflow = os.getenv("USE_MLFLOW")
+    if preloaded is not None:
+        model, model_version = preloaded
+    else:
+        model, model_version = load_or_train_model_with_version(
+            use_mlflow=use_mlflow, backend=INFERENCE_BACKEND
+        )
+        logger.info(f"Модель загружена, версия {model_version}")
+
+    executor = InferenceExecutor(INFERENCE_EXECUTOR, workers=INFERENCE_EXECUTOR_WORKERS)
+    executor.start(model)
+
+    state = SimpleNamespace()
+    set_model(state, model, model_version)
+    reloader = ModelReloader(
+        state,
+        version_fn=partial(current_model_version, use_mlflow=use_mlflow),
+        load_fn=partial(load_model_version, use_mlflow=use_mlflow, backend=INFERENCE_BACKEND),
+        interval_seconds=MODEL_RELOAD_INTERVAL_SECONDS,
+        executor=executor,
+    )
+    reloader.start()
+
+    pool = await create_pg_pool(
+        min_size=1,
+        max_size=db_pool_size(),
+        init=prepare_statements,
+        command_timeout=WORKER_DB_COMMAND_TIMEOUT_SECONDS,
+    )
+
+    producer = KafkaProducer(KAFKA_BOOTSTRAP)
+    await producer.start()
+
+    consumer = AIOKafkaConsumer(
+        bootstrap_servers=KAFKA_BOOTSTRAP,
+        group_id=CONSUMER_GROUP,
+        enable_auto_commit=False,
+        auto_offset_reset="earliest",
+        value_deserializer=decode,
+    )
+    # Перед отзывом партиций обработанное коммитится, кэши признаков отданных
+    # партиций удаляются
+    listener = WorkerRebalanceListener()
+    consumer.subscribe([TOPIC], listener=listener)
+    await consumer.start()
+    logger.info(f"[worker] consuming {TOPIC} as group={CONSUMER_GROUP}, mode={WORKER_MODE}")
+
+    metrics_server = None
+    if WORKER_METRICS_PORT:
+        metrics_server = MetricsServer(
+            WORKER_METRICS_HOST,
+            WORKER_METRICS_PORT + process_index,
+            before_render=partial(update_worker_metrics, consumer),
+        )
+
+    reporter = None
+    if stats_queue is not None:
+        reporter = asyncio.create_task(
+            report_stats(
+                stats_queue,
+                process_index,
+                consumer,
+                processed_messages,
+                WORKER_STATUS_INTERVAL_SECONDS,
+            )
+        )
+
+    try:
+        if metrics_server is not None:
+            await metrics_server.start()
+        await CONSUMERS[WORKER_MODE](
+            consumer, state, executor, WorkerRepository(pool), producer, handoff=listener
+        )
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        if metrics_server is not None:
+            await metrics_server.stop()
+        # stop() покидает группу явно, и партиции сразу переходят к другим процессам
+        await consumer.stop()
+        await producer.stop()
+        await reloader.stop()
+        executor.shutdown()
+        await pool.close()
+
+
+async def serve_process(preloaded, stats_queue, process_index: int) -> None:
+    """Дочерний процесс супервизора: SIGTERM завершает main() штатно, с выходом из группы"""
+    task = asyncio.current_task()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+    try:
+        await main(preloaded, stats_queue, process_index)
+    except asyncio.CancelledError:
+        logger.info(f"[worker-{process_index}] остановлен")
+
+
+def run_supervisor(processes: int) -> None:
+    """
+    Модель загружается один раз, затем fork на processes потребителей одной
+    CONSUMER_GROUP. Упавшие процессы перезапускаются, сводка по скорости
+    и лагу выводится раз в WORKER_STATUS_INTERVAL_SECONDS.
+    """
+    preloaded = load_or_train_model_with_version(
+        use_mlflow=os.getenv("USE_MLFLOW"), backend=INFERENCE_BACKEND
+    )
+    logger.info(f"Модель загружена, версия {preloaded[1]}, процессов: {processes}")
+
+    stats_queue = multiprocessing.get_context("fork").Queue()
+    board = StatusBoard(stats_queue, WORKER_STATUS_INTERVAL_SECONDS)
+
+    def target(index: int) -> None:
+        asyncio.run(serve_process(preloaded, stats_queue, index))
+
+    Prefork("worker", processes, target).run(on_tick=board.tick)
+
+
+def cli(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Воркер модерации объявлений")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=WORKER_PROCESSES,
+        help="число процессов-потребителей под общим супервизором",
+    )
+    args = parser.parse_args(argv)
+
+    if args.processes > 1:
+        run_supervisor(args.processes)
+    else:
+        asyncio.run(main())
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    cli()
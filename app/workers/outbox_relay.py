@@ -0,0 +1,90 @@
+"""
+Публикация moderation_outbox в Kafka.
+
+Забирает пачку самых старых строк (FOR UPDATE SKIP LOCKED), отправляет их
+с ключами строк одним send_many на топик и удаляет в той же транзакции,
+которая фиксируется только после подтверждения брокером. Доставка at-least-once: при падении
+между подтверждением и commit пачка уйдёт повторно, запись результата
+воркером идемпотентна. Несколько релеев могут работать параллельно.
+
+Запуск: python -m app.workers.outbox_relay
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from app.clients.kafka import KafkaProducer
+from app.clients.postgres import create_pg_pool
+from app.clients.settings import KAFKA_BOOTSTRAP, OUTBOX_BATCH_SIZE, OUTBOX_POLL_INTERVAL_MS
+from app.metrics import Counter, Gauge, Histogram
+from app.repositories.outbox import OutboxRepository
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PUBLISHED = Counter("outbox_published_total", "Сообщения outbox, опубликованные в Kafka")
+PUBLISH_ERRORS = Counter("outbox_publish_errors_total", "Пачки outbox, не опубликованные")
+BATCH_SIZE = Histogram(
+    "outbox_batch_messages",
+    "Сообщения в одной пачке outbox",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000),
+)
+OUTBOX_AGE = Gauge("outbox_oldest_message_seconds", "Возраст самого старого сообщения пачки")
+
+
+async def relay_batch(pool, producer, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """Публикация одной пачки; возвращает число опубликованных сообщений"""
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            rows = await OutboxRepository(conn).claim(batch_size)
+            if not rows:
+                OUTBOX_AGE.set(0)
+                return 0
+
+            by_topic: Dict[str, Tuple[List[dict], List[Optional[bytes]]]] = {}
+            for row in rows:
+                payloads, keys = by_topic.setdefault(row["topic"], ([], []))
+                payloads.append(row["payload"])
+                keys.append(row["key"].encode("utf-8") if row["key"] is not None else None)
+            await asyncio.gather(
+                *(
+                    producer.send_many(topic, payloads, keys)
+                    for topic, (payloads, keys) in by_topic.items()
+                )
+            )
+
+    PUBLISHED.inc(len(rows))
+    BATCH_SIZE.observe(len(rows))
+    OUTBOX_AGE.set(max(row["age_seconds"] for row in rows))
+    return len(rows)
+
+
+async def run(pool, producer, batch_size: int, poll_interval: float) -> None:
+    """Пачки подряд, пока outbox полон; на неполной пачке пауза poll_interval"""
+    while True:
+        try:
+            published = await relay_batch(pool, producer, batch_size)
+        except Exception as e:
+            PUBLISH_ERRORS.inc()
+            logger.error(f"Не удалось опубликовать пачку outbox: {e}")
+            published = 0
+        if published < batch_size:
+            await asyncio.sleep(poll_interval)
+
+
+async def main():
+    pool = await create_pg_pool(min_size=1, max_size=2)
+    producer = KafkaProducer(KAFKA_BOOTSTRAP)
+    await producer.start()
+    logger.info(f"[outbox] публикация moderation_outbox пачками по {OUTBOX_BATCH_SIZE}")
+
+    try:
+        await run(pool, producer, OUTBOX_BATCH_SIZE, OUTBOX_POLL_INTERVAL_MS / 1000)
+    finally:
+        await producer.stop()
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+import random
+import time
+from typing import List
+
+from app.clients.kafka import item_key
+from app.clients.settings import (
+    MAX_RETRIES,
+    RETRY_DELAY_SECONDS,
+    RETRY_MAX_DELAY_SECONDS,
+    RETRY_TOPIC_PREFIX,
+)
+from app.metrics import Counter
+
+RETRIES_SCHEDULED = Counter(
+    "moderation_retries_scheduled_total",
+    "Сообщения, отправленные на отложенный повтор",
+    labelnames=("attempt",),
+)
+
+
+def retry_topic(attempt: int) -> str:
+    """Топик отложенных повторов для попытки attempt (1..MAX_RETRIES-1)"""
+    return f"{RETRY_TOPIC_PREFIX}_{attempt}"
+
+
+def retry_topics() -> List[str]:
+    return [retry_topic(attempt) for attempt in range(1, MAX_RETRIES)]
+
+
+def retry_delay(
+    attempt: int,
+    base: float = RETRY_DELAY_SECONDS,
+    cap: float = RETRY_MAX_DELAY_SECONDS,
+    rng: random.Random = random,
+) -> float:
+    """
+    Экспоненциальная задержка с джиттером: половина фиксирована, половина случайна.
+
+    Джиттер разносит во времени повторы сообщений, упавших одновременно
+    (например, при недоступности БД).
+    """
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + rng.uniform(0, delay / 2)
+
+
+async def schedule_retry(producer, event: dict) -> float:
+    """
+    Отправка события в топик своей попытки с моментом повтора retry_at.
+
+    Не ждёт задержку: сообщение вернётся в основной топик через retry_worker.
+    """
+    attempt = event["retry_count"]
+    delay = retry_delay(attempt)
+    event["retry_at"] = time.time() + delay
+    await producer.send_json(retry_topic(attempt), event, key=item_key(event["item_id"]))
+    RETRIES_SCHEDULED.inc(attempt=attempt)
+    return delay
@@ -0,0 +1,86 @@
+"""
+Возврат отложенных повторов в основной топик модерации.
+
+Читает топики {RETRY_TOPIC_PREFIX}_{n}, ждёт момента retry_at каждого
+события и публикует его в TOPIC. Ожидание идёт отдельно по каждой партиции,
+поэтому основной воркер и другие партиции повторов не блокируются.
+
+Запуск: python -m app.workers.retry_worker
+"""
+
+import asyncio
+import logging
+import time
+from functools import partial
+
+from aiokafka import AIOKafkaConsumer
+
+from app.clients.codec import decode
+from app.clients.kafka import KafkaProducer, item_key
+from app.clients.settings import (
+    KAFKA_BOOTSTRAP,
+    RETRY_CONSUMER_GROUP,
+    RETRY_MAX_PENDING,
+    TOPIC,
+    WORKER_BATCH_SIZE,
+    WORKER_BATCH_TIMEOUT_MS,
+)
+from app.workers.commits import RebalanceHandoff
+from app.workers.lanes import consume_partitioned
+from app.workers.retry import retry_topics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def relay(producer, event: dict) -> None:
+    """Ожидание retry_at и публикация события обратно в TOPIC"""
+    delay = event.pop("retry_at", 0) - time.time()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    await producer.send_json(TOPIC, event, key=item_key(event["item_id"]))
+    logger.info(f"Повтор {event.get('retry_count')} для {event.get('item_id')} возвращён в {TOPIC}")
+
+
+async def main():
+    topics = retry_topics()
+    if not topics:
+        logger.info("MAX_RETRIES не предполагает повторов, retry_worker не нужен")
+        return
+
+    producer = KafkaProducer(KAFKA_BOOTSTRAP)
+    await producer.start()
+
+    consumer = AIOKafkaConsumer(
+        bootstrap_servers=KAFKA_BOOTSTRAP,
+        group_id=RETRY_CONSUMER_GROUP,
+        enable_auto_commit=False,
+        auto_offset_reset="earliest",
+        value_deserializer=decode,
+    )
+    # При отзыве партиций коммитятся вернувшиеся повторы; ожидающие срока
+    # не дожидаются (это до RETRY_MAX_DELAY_SECONDS) и придут новому владельцу
+    handoff = RebalanceHandoff()
+    consumer.subscribe(topics, listener=handoff)
+    await consumer.start()
+    logger.info(f"[retry] consuming {', '.join(topics)} as group={RETRY_CONSUMER_GROUP}")
+
+    try:
+        # Ожидающие повторы почти не занимают ресурсов, ограничиваем только их число
+        await consume_partitioned(
+            consumer,
+            partial(relay, producer),
+            max_in_flight=RETRY_MAX_PENDING,
+            max_records=WORKER_BATCH_SIZE,
+            timeout_ms=WORKER_BATCH_TIMEOUT_MS,
+            max_pending=RETRY_MAX_PENDING,
+            handoff=handoff,
+            drain_on_revoke=False,
+        )
+    finally:
+        await consumer.stop()
+        await producer.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
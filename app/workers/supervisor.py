@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import queue
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+async def consumer_lag(consumer) -> Optional[int]:
+    """Непрочитанные сообщения по всем партициям, назначенным consumer"""
+    lag = 0
+    known = False
+    for tp in consumer.assignment():
+        highwater = consumer.highwater(tp)
+        if highwater is None:
+            continue
+        lag += max(highwater - await consumer.position(tp), 0)
+        known = True
+    return lag if known else None
+
+
+async def report_stats(
+    stats_queue,
+    index: int,
+    consumer,
+    processed: Callable[[], float],
+    interval: float,
+) -> None:
+    """Периодическая отправка счётчика обработанных сообщений и лага супервизору"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            lag = await consumer_lag(consumer)
+        except Exception as e:
+            logger.warning(f"Не удалось посчитать лаг: {e}")
+            lag = None
+        stats_queue.put_nowait(
+            {"index": index, "processed": processed(), "lag": lag, "time": time.monotonic()}
+        )
+
+
+class StatusBoard:
+    """
+    Сводка по процессам воркера для супервизора.
+
+    Дети присылают в очередь накопленное число обработанных сообщений и лаг;
+    скорость считается по разнице между двумя последними отчётами процесса.
+    """
+
+    def __init__(self, stats_queue, interval: float = 30.0) -> None:
+        self._queue = stats_queue
+        self.interval = interval
+        self._reports: Dict[int, Dict[str, Any]] = {}
+        self.rates: Dict[int, float] = {}
+        self._last_log = time.monotonic()
+
+    def drain(self) -> None:
+        while True:
+            try:
+                report = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            previous = self._reports.get(report["index"])
+            # Перезапущенный процесс начинает счёт заново — скорость по нему пропускаем
+            if previous and report["processed"] >= previous["processed"]:
+                elapsed = report["time"] - previous["time"]
+                if elapsed > 0:
+                    self.rates[report["index"]] = (
+                        report["processed"] - previous["processed"]
+                    ) / elapsed
+            self._reports[report["index"]] = report
+
+    def summary(self) -> str:
+        lags = [r["lag"] for r in self._reports.values() if r["lag"] is not None]
+        parts = [
+            f"процессов={len(self._reports)}",
+            f"msg/s={sum(self.rates.values()):.1f}",
+            f"lag={sum(lags) if lags else '?'}",
+        ]
+        for index in sorted(self._reports):
+            report = self._reports[index]
+            lag = "?" if report["lag"] is None else report["lag"]
+            parts.append(f"#{index}: {self.rates.get(index, 0.0):.1f} msg/s, lag={lag}")
+        return "; ".join(parts)
+
+    def tick(self) -> None:
+        """Вызывается из цикла супервизора: сбор отчётов и периодический вывод сводки"""
+        self.drain()
+        if time.monotonic() - self._last_log >= self.interval and self._reports:
+            logger.info(f"[worker] {self.summary()}")
+            self._last_log = time.monotonic()
@@ -0,0 +1,55 @@
+"""
+Кодеки сообщений Kafka: скорость encode/decode и размер запроса модерации
+в форматах json (прежний), msgpack (если установлен) и struct.
+
+Запуск: python -m benchmarks.bench_codec
+"""
+
+import time
+
+from app.clients.codec import decode, encode, msgpack
+from app.clients.kafka import moderation_request
+
+MESSAGES = 10_000
+
+
+def make_messages(count: int):
+    messages = [moderation_request(100_000 + i, task_id=5_000_000 + i) for i in range(count)]
+    for i, message in enumerate(messages[::4]):
+        message["retry_count"] = 1 + i % 2
+        message["retry_at"] = 1_700_000_000.0 + i
+    return messages
+
+
+def measure(fn, items, min_seconds: float = 0.5) -> float:
+    """Сообщений в секунду для fn над каждым элементом items"""
+    repeats = 0
+    start = time.perf_counter()
+    while True:
+        for item in items:
+            fn(item)
+        repeats += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return repeats * len(items) / elapsed
+
+
+def main():
+    messages = make_messages(MESSAGES)
+    codecs = ["json", "struct"] + (["msgpack"] if msgpack is not None else [])
+    if msgpack is None:
+        print("msgpack не установлен, формат пропущен")
+
+    print(f"{'codec':>8} | {'bytes':>6} | {'encode msg/s':>13} | {'decode msg/s':>13}")
+    for codec in codecs:
+        encoded = [encode(message, codec) for message in messages]
+        assert [decode(data) for data in encoded] == messages
+
+        size = sum(len(data) for data in encoded) / len(encoded)
+        encode_rate = measure(lambda message: encode(message, codec), messages)
+        decode_rate = measure(decode, encoded)
+        print(f"{codec:>8} | {size:>6.1f} | {encode_rate:>13,.0f} | {decode_rate:>13,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Сравнение скорости подготовки признаков: prepare_features (построчно)
+против prepare_features_batch (по столбцам).
+
+Запуск: python -m benchmarks.bench_features
+"""
+
+import random
+import time
+
+import numpy as np
+
+from app.routers.utils import prepare_features, prepare_features_batch
+
+SIZES = (1, 100, 100_000)
+
+
+def make_rows(count: int):
+    rng = random.Random(42)
+    return [
+        {
+            "is_verified_seller": rng.random() < 0.5,
+            "images_qty": rng.randint(0, 10),
+            "description": "x" * rng.randint(0, 6000),
+            "category": rng.randint(0, 100),
+        }
+        for _ in range(count)
+    ]
+
+
+def scalar(rows):
+    return np.vstack([prepare_features(row) for row in rows])
+
+
+def measure(fn, rows, min_seconds: float = 0.5) -> float:
+    """Строк в секунду для fn(rows)"""
+    repeats = 0
+    start = time.perf_counter()
+    while True:
+        fn(rows)
+        repeats += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return repeats * len(rows) / elapsed
+
+
+def main():
+    print(f"{'rows':>8} | {'scalar rows/s':>14} | {'batch rows/s':>14} | {'speedup':>7}")
+    for size in SIZES:
+        rows = make_rows(size)
+        assert np.allclose(scalar(rows), prepare_features_batch(rows))
+
+        scalar_rps = measure(scalar, rows)
+        batch_rps = measure(prepare_features_batch, rows)
+        print(
+            f"{size:>8} | {scalar_rps:>14,.0f} | {batch_rps:>14,.0f} | "
+            f"{batch_rps / scalar_rps:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Пропускная способность воркера модерации: построчный режим (consume_single)
+против пакетного (consume_batches) и параллельного по партициям
+(consume_concurrent) на реальном PostgreSQL.
+
+Kafka заменена очередью в памяти, commit смещений ничего не стоит, поэтому
+выигрыш пакетного режима на реальном брокере будет больше. Сетевую задержку
+до БД (которой нет у локального PostgreSQL) добавляет LatencyConnection.
+
+Запуск: python -m benchmarks.bench_worker
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.clients.postgres import create_pg_pool, get_pg_connection
+from app.inference.executor import InferenceExecutor
+from app.model import load_or_train_model
+from app.repositories.worker import WorkerRepository
+from app.workers import moderation_worker
+
+MESSAGES = 2000
+BATCH_SIZES = (100, 500)
+PARTITIONS = 8
+IN_FLIGHT = (8, 32)
+DB_LATENCY_MS = (0, 1)
+
+
+class FakeMessage:
+    def __init__(self, offset, value):
+        self.offset = offset
+        self.value = value
+        # Как у продюсера с ключом item_key: объявление всегда в одной партиции
+        self.partition = value["item_id"] % PARTITIONS
+
+
+class FakeConsumer:
+    """Минимальная замена AIOKafkaConsumer: отдаёт заранее заданные сообщения"""
+
+    def __init__(self, events):
+        self._messages = [FakeMessage(offset, event) for offset, event in enumerate(events)]
+        self.commits = 0
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for msg in self._messages:
+            yield msg
+
+    async def getmany(self, timeout_ms=0, max_records=None):
+        if not self._messages:
+            raise StopAsyncIteration
+        batch, self._messages = self._messages[:max_records], self._messages[max_records:]
+        records = {}
+        for msg in batch:
+            records.setdefault(msg.partition, []).append(msg)
+        return records
+
+    def assignment(self):
+        return set(range(PARTITIONS))
+
+    async def commit(self, offsets=None):
+        self.commits += 1
+
+
+class LatencyConnection:
+    """Соединение или пул с искусственной задержкой каждого запроса"""
+
+    def __init__(self, conn, latency_ms: float):
+        self._conn = conn
+        self._latency = latency_ms / 1000
+
+    async def _call(self, method, *args):
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        return await getattr(self._conn, method)(*args)
+
+    async def fetch(self, *args):
+        return await self._call("fetch", *args)
+
+    async def fetchrow(self, *args):
+        return await self._call("fetchrow", *args)
+
+    async def execute(self, *args):
+        return await self._call("execute", *args)
+
+
+class FakeProducer:
+    async def send_json(self, topic, payload, key=None):
+        pass
+
+
+async def seed(conn, count: int):
+    seller_id = await conn.fetchval(
+        """
+        INSERT INTO sellers (username, email, password, is_verified)
+        VALUES ('bench_seller', 'bench@example.com', 'hash', true)
+        RETURNING seller_id
+        """
+    )
+    item_ids = await conn.fetch(
+        """
+        INSERT INTO advertisement (seller_id, name, description, category, images_qty)
+        SELECT $1, 'bench', repeat('x', (i * 37) % 3000), i % 100, i % 10
+        FROM generate_series(1, $2) AS i
+        RETURNING item_id
+        """,
+        seller_id,
+        count,
+    )
+    return seller_id, [row["item_id"] for row in item_ids]
+
+
+async def make_tasks(conn, item_ids):
+    rows = await conn.fetch(
+        """
+        INSERT INTO moderation_results (item_id, status)
+        SELECT unnest($1::int[]), 'pending'
+        RETURNING id, item_id
+        """,
+        item_ids,
+    )
+    return [{"item_id": row["item_id"], "task_id": row["id"]} for row in rows]
+
+
+async def measure(conn, item_ids, consume, latency_ms, repo_conn=None, **settings) -> float:
+    """Сообщений в секунду для consume на свежем наборе задач"""
+    events = await make_tasks(conn, item_ids)
+    consumer = FakeConsumer(events)
+    state = SimpleNamespace(model=load_or_train_model(), model_version="1")
+    executor = InferenceExecutor("none")
+
+    # Redis в бенчмарке не участвует: сравниваются чтение и запись в PostgreSQL
+    settings.setdefault("WORKER_CACHE_RESULTS", False)
+    for name, value in settings.items():
+        setattr(moderation_worker, name, value)
+
+    repo = WorkerRepository(LatencyConnection(repo_conn or conn, latency_ms))
+
+    start = time.perf_counter()
+    try:
+        await consume(consumer, state, executor, repo, FakeProducer())
+    except StopAsyncIteration:
+        pass
+    elapsed = time.perf_counter() - start
+
+    pending = await conn.fetchval(
+        """
+        SELECT count(*) FROM moderation_results
+        WHERE id = ANY($1::int[]) AND status <> 'completed'
+        """,
+        [event["task_id"] for event in events],
+    )
+    assert pending == 0
+    return len(events) / elapsed
+
+
+async def run_modes(conn, item_ids, latency_ms: float):
+    print(f"\nЗадержка запроса к БД: {latency_ms} мс")
+    print(f"{'mode':>14} | {'msg/s':>10} | {'speedup':>7}")
+    single = await measure(conn, item_ids, moderation_worker.consume_single, latency_ms)
+    print(f"{'single':>14} | {single:>10,.0f} | {1:>6.1f}x")
+
+    for size in BATCH_SIZES:
+        rate = await measure(
+            conn, item_ids, moderation_worker.consume_batches, latency_ms, WORKER_BATCH_SIZE=size
+        )
+        print(f"{f'batch {size}':>14} | {rate:>10,.0f} | {rate / single:>6.1f}x")
+
+    for in_flight in IN_FLIGHT:
+        pool = await create_pg_pool(max_size=in_flight)
+        try:
+            rate = await measure(
+                conn,
+                item_ids,
+                moderation_worker.consume_concurrent,
+                latency_ms,
+                repo_conn=pool,
+                WORKER_MAX_IN_FLIGHT=in_flight,
+            )
+        finally:
+            await pool.close()
+        label = f"concurrent {in_flight}"
+        print(f"{label:>14} | {rate:>10,.0f} | {rate / single:>6.1f}x")
+
+
+async def main():
+    async with get_pg_connection() as conn:
+        seller_id, item_ids = await seed(conn, MESSAGES)
+        try:
+            for latency_ms in DB_LATENCY_MS:
+                await run_modes(conn, item_ids, latency_ms)
+        finally:
+            await conn.execute(
+                "DELETE FROM moderation_results WHERE item_id = ANY($1::int[])", item_ids
+            )
+            await conn.execute("DELETE FROM advertisement WHERE seller_id = $1", seller_id)
+            await conn.execute("DELETE FROM sellers WHERE seller_id = $1", seller_id)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
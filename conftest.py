@@ -125,6 +125,7 @@ def mock_moderation_repository():
     mock_repo = AsyncMock(spec=ModerationRepository)
 
     mock_repo.create_task.return_value = 1
+    mock_repo.get_or_create_task.return_value = (1, True)
     mock_repo.mark_task_failed.return_value = None
     mock_repo.get_task_result.return_value = {
         "task_id": 1,
@@ -288,6 +289,7 @@ async def db_connection():
     async with get_pg_connection() as conn:
         # Очистка перед тестом
         await conn.execute("DELETE FROM moderation_results")
+        await conn.execute("DELETE FROM moderation_outbox")
         await conn.execute("DELETE FROM advertisement")
         await conn.execute("DELETE FROM sellers")
         await conn.execute("DELETE FROM account")
@@ -296,6 +298,7 @@ async def db_connection():
 
         # Очистка после теста
         await conn.execute("DELETE FROM moderation_results")
+        await conn.execute("DELETE FROM moderation_outbox")
         await conn.execute("DELETE FROM advertisement")
         await conn.execute("DELETE FROM sellers")
         await conn.execute("DELETE FROM account")
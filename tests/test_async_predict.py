@@ -1,5 +1,10 @@
+import asyncio
+from unittest.mock import patch
+
 import pytest
 
+from app.main import app
+
 
 @pytest.mark.unit
 @pytest.mark.parametrize(
@@ -51,3 +56,66 @@ async def test_async_predict_creates_task(db_connection, async_client, test_ad,
     assert result is not None
     assert result["item_id"] == test_ad
     assert result["status"] == "pending"
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_async_predict_batch(db_connection, async_client, test_ad):
+    """Интеграционный тест: задачи пачкой, ошибка по отсутствующему объявлению"""
+    delivered = asyncio.get_running_loop().create_future()
+    delivered.set_result(None)
+    producer = app.state.kafka_producer
+    producer.send_moderation_requests.return_value = [delivered]
+
+    response = await async_client.post(
+        "/async_predict/batch", json={"item_ids": [test_ad, 999999, test_ad]}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["accepted"] == 1 and data["errors"] == 1
+    ok, missing = data["results"]
+    assert ok["item_id"] == test_ad and ok["status"] == "pending"
+    assert missing == {
+        "item_id": 999999,
+        "task_id": None,
+        "status": "error",
+        "error": "Объявление с item_id=999999 не найдено",
+    }
+    producer.send_moderation_requests.assert_awaited_once_with([(test_ad, ok["task_id"])])
+    status = await db_connection.fetchval(
+        "SELECT status FROM moderation_results WHERE id = $1", ok["task_id"]
+    )
+    assert status == "pending"
+
+    # Повторная пачка присоединяется к ожидающей задаче без нового сообщения
+    again = await async_client.post("/async_predict/batch", json={"item_ids": [test_ad]})
+    assert again.json()["results"][0]["task_id"] == ok["task_id"]
+    producer.send_moderation_requests.assert_awaited_once()
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_async_predict_batch_delivery_error(db_connection, async_client, test_ad):
+    """Интеграционный тест: неподтверждённое сообщение — ошибка по объявлению и задача failed"""
+    failed = asyncio.get_running_loop().create_future()
+    failed.set_exception(RuntimeError("broker down"))
+    app.state.kafka_producer.send_moderation_requests.return_value = [failed]
+
+    response = await async_client.post("/async_predict/batch", json={"item_ids": [test_ad]})
+
+    [result] = response.json()["results"]
+    assert result["status"] == "error"
+    row = await db_connection.fetchrow(
+        "SELECT status, error_message FROM moderation_results WHERE item_id = $1", test_ad
+    )
+    assert row["status"] == "failed" and "broker down" in row["error_message"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_async_predict_batch_too_large(async_client):
+    """Юнит-тест: пачка больше ASYNC_PREDICT_BATCH_MAX_ITEMS отклоняется"""
+    with patch("app.routers.moderation.ASYNC_PREDICT_BATCH_MAX_ITEMS", 2):
+        response = await async_client.post("/async_predict/batch", json={"item_ids": [1, 2, 3]})
+    assert response.status_code == 413
@@ -0,0 +1,131 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.inference.batcher import BATCH_SIZE, MicroBatcher
+from app.model import train_model
+from app.routers.utils import predict_proba
+
+
+class CountingModel:
+    """Модель-заглушка, запоминающая размеры вызовов"""
+
+    def __init__(self, value: float = 0.5):
+        self.value = value
+        self.calls = []
+
+    def predict_proba(self, features):
+        self.calls.append(len(features))
+        positive = np.full(len(features), self.value)
+        return np.column_stack([1 - positive, positive])
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_call():
+    """Тест: одновременные запросы объединяются в один вызов модели"""
+    model = CountingModel(0.7)
+    batcher = MicroBatcher(predict_proba, max_batch_size=16, max_wait_ms=20)
+
+    features = np.array([[1.0, 0.1, 0.2, 0.3]])
+    results = await asyncio.gather(*(batcher.predict(model, features) for _ in range(10)))
+    await batcher.stop()
+
+    assert results == [pytest.approx(0.7)] * 10
+    assert model.calls == [10]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_batch_respects_max_size():
+    """Тест: батч не превышает max_batch_size"""
+    model = CountingModel()
+    batcher = MicroBatcher(predict_proba, max_batch_size=4, max_wait_ms=20)
+
+    features = np.array([[0.0, 0.0, 0.0, 0.0]])
+    await asyncio.gather(*(batcher.predict(model, features) for _ in range(10)))
+    await batcher.stop()
+
+    assert sum(model.calls) == 10
+    assert max(model.calls) <= 4
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_rows_are_scored_by_their_own_model():
+    """Тест: строки разных моделей не смешиваются в одном вызове"""
+    old_model, new_model = CountingModel(0.1), CountingModel(0.9)
+    batcher = MicroBatcher(predict_proba, max_batch_size=16, max_wait_ms=20)
+
+    features = np.array([[0.0, 0.0, 0.0, 0.0]])
+    results = await asyncio.gather(
+        batcher.predict(old_model, features),
+        batcher.predict(new_model, features),
+        batcher.predict(old_model, features),
+    )
+    await batcher.stop()
+
+    assert results == [pytest.approx(0.1), pytest.approx(0.9), pytest.approx(0.1)]
+    assert old_model.calls == [2]
+    assert new_model.calls == [1]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_batch_error_is_propagated():
+    """Тест: ошибка модели передаётся каждому ожидающему запросу"""
+
+    def failing_predict(model, features):
+        raise RuntimeError("ML Error")
+
+    batcher = MicroBatcher(failing_predict, max_batch_size=8, max_wait_ms=5)
+    features = np.array([[0.0, 0.0, 0.0, 0.0]])
+
+    results = await asyncio.gather(
+        batcher.predict(object(), features),
+        batcher.predict(object(), features),
+        return_exceptions=True,
+    )
+    await batcher.stop()
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_batched_matches_direct_prediction():
+    """Тест: результат батча совпадает с поштучным predict_proba"""
+    model = train_model()
+    batcher = MicroBatcher(predict_proba, max_batch_size=32, max_wait_ms=10)
+    rows = np.random.default_rng(0).random((20, 4))
+
+    count_before = BATCH_SIZE.count()
+    results = await asyncio.gather(*(batcher.predict(model, row[None, :]) for row in rows))
+    await batcher.stop()
+
+    expected = predict_proba(model, rows)
+    assert np.allclose(results, expected)
+    assert BATCH_SIZE.count() > count_before
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_stop_fails_collected_and_queued_rows():
+    """Тест: остановка завершает ошибкой и строки выполняемого батча, и строки в очереди"""
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_predict(model, features):
+        started.set()
+        await release.wait()
+        return np.full(len(features), 0.5)
+
+    batcher = MicroBatcher(slow_predict, max_batch_size=2, max_wait_ms=50)
+    features = np.array([[0.0, 0.0, 0.0, 0.0]])
+    requests = [asyncio.create_task(batcher.predict(object(), features)) for _ in range(3)]
+    await started.wait()
+
+    await batcher.stop()
+    results = await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 1)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
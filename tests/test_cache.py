@@ -3,6 +3,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 
 from app.models.users import UserModel
+from app.repositories.moderation import RESULT_CACHE_ERRORS, ModerationResultCache
 from app.repositories.users import UserRedisStorage, UserRepository
 
 
@@ -156,3 +157,45 @@ async def test_redis_delete():
         await storage.delete(123)
 
         mock_redis.delete.assert_called_once_with("123")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_result_cache_pipelines_results():
+    """Тест: результаты пачки пишутся одним pipeline под ключами moderation_result"""
+    mock_redis = AsyncMock()
+    mock_redis.__aenter__ = AsyncMock(return_value=mock_redis)
+    mock_redis.__aexit__ = AsyncMock(return_value=None)
+
+    mock_pipeline = AsyncMock()
+    mock_pipeline.set = MagicMock()
+    mock_pipeline.execute = AsyncMock(return_value=None)
+    mock_redis.pipeline = MagicMock(return_value=mock_pipeline)
+
+    results = [
+        {"task_id": 1, "status": "completed", "is_violation": True, "probability": 0.9},
+        {"task_id": 2, "status": "completed", "is_violation": False, "probability": 0.1},
+    ]
+    with patch("app.repositories.moderation.get_redis_connection", return_value=mock_redis):
+        await ModerationResultCache().set_many(results)
+
+    mock_redis.pipeline.assert_called_once()
+    keys = [call.args[0] for call in mock_pipeline.set.call_args_list]
+    assert keys == ["moderation_result:1", "moderation_result:2"]
+    # Тот же срок, что у записи из GET /moderation_result через UserRedisStorage
+    ttls = {call.kwargs["ex"] for call in mock_pipeline.set.call_args_list}
+    assert ttls == {UserRedisStorage()._TTL}
+    mock_pipeline.execute.assert_awaited_once()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_result_cache_swallows_redis_errors():
+    """Тест: недоступный Redis не прерывает запись результатов"""
+    errors = RESULT_CACHE_ERRORS.value()
+    with patch(
+        "app.repositories.moderation.get_redis_connection", side_effect=ConnectionError("down")
+    ):
+        await ModerationResultCache().set_many([{"task_id": 1}])
+
+    assert RESULT_CACHE_ERRORS.value() == errors + 1
@@ -0,0 +1,60 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.clients.codec import CodecError, check_codec, decode, encode
+from app.clients.kafka import moderation_request
+
+
+@pytest.mark.unit
+def test_struct_roundtrip_moderation_request():
+    """Юнит-тест: запрос модерации упаковывается в запись и читается без потерь"""
+    payload = moderation_request(42, task_id=7)
+    retried = {**payload, "retry_count": 2, "retry_at": 1700000000.25}
+
+    for message in (payload, retried, moderation_request(42)):
+        data = encode(message, "struct")
+        assert data[0] == 0
+        assert len(data) < len(encode(message, "json"))
+        assert decode(data) == message
+
+
+@pytest.mark.unit
+def test_struct_falls_back_to_json():
+    """Юнит-тест: сообщения, не помещающиеся в запись, уходят в JSON"""
+    dlq_message = {"original_message": moderation_request(1), "error": "x", "retry_count": 3}
+    data = encode(dlq_message, "struct")
+
+    assert data.startswith(b"{")
+    assert decode(data) == dlq_message
+    assert encode({"item_id": "abc"}, "struct").startswith(b"{")
+
+
+@pytest.mark.unit
+def test_decode_legacy_json():
+    """Юнит-тест: сообщения прежнего формата читаются без изменений"""
+    legacy = {"item_id": 1, "timestamp": "2024-05-01T12:00:00"}
+    assert decode(json.dumps(legacy).encode("utf-8")) == legacy
+
+
+@pytest.mark.unit
+def test_unknown_and_unavailable_codecs():
+    """Юнит-тест: неизвестный формат и отсутствующий msgpack дают CodecError"""
+    with pytest.raises(CodecError):
+        decode(bytes((0, 99)))
+    with pytest.raises(CodecError):
+        check_codec("avro")
+    with patch("app.clients.codec.msgpack", None):
+        with pytest.raises(CodecError):
+            check_codec("msgpack")
+        with pytest.raises(CodecError):
+            decode(bytes((0, 2)) + b"\x80")
+
+
+@pytest.mark.unit
+def test_msgpack_roundtrip():
+    """Юнит-тест: msgpack, если пакет установлен"""
+    pytest.importorskip("msgpack")
+    message = {"original_message": moderation_request(1, task_id=2), "error": "x"}
+    assert decode(encode(message, "msgpack")) == message
@@ -0,0 +1,71 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from app.model import model_version_number
+from app.workers.commits import OffsetCommitter
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_commit_every_messages():
+    """Юнит-тест: commit один раз на every_messages сообщений"""
+    consumer = AsyncMock()
+    committer = OffsetCommitter(consumer, every_messages=3, interval_ms=60000)
+
+    for _ in range(7):
+        await committer.processed()
+
+    assert consumer.commit.await_count == 2
+    await committer.commit()
+    assert consumer.commit.await_count == 3
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_commit_by_interval_with_offsets():
+    """Юнит-тест: по истечении интервала коммитятся накопленные смещения"""
+    consumer = AsyncMock()
+    consumer.assignment = Mock(return_value={"p0", "p1"})
+    committer = OffsetCommitter(consumer, every_messages=100, interval_ms=10)
+
+    await committer.processed(2, {"p0": 5})
+    await committer.processed(1, {"p1": 8})
+    consumer.commit.assert_not_awaited()
+
+    await asyncio.sleep(0.02)
+    await committer.maybe_commit()
+    consumer.commit.assert_awaited_once_with({"p0": 5, "p1": 8})
+
+    await committer.maybe_commit()
+    assert consumer.commit.await_count == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_commit_skips_revoked_partitions():
+    """Юнит-тест: смещения отданных партиций не коммитятся и не копятся после ошибки"""
+    consumer = AsyncMock()
+    consumer.assignment = Mock(return_value={"p1"})
+    committer = OffsetCommitter(consumer, every_messages=100, interval_ms=60000)
+
+    await committer.processed(1, {"p0": 5})
+    await committer.commit()
+    consumer.commit.assert_not_awaited()
+
+    consumer.commit.side_effect = [RuntimeError("coordinator"), None]
+    await committer.processed(1, {"p0": 6, "p1": 3})
+    with pytest.raises(RuntimeError):
+        await committer.commit()
+    await committer.commit()
+    assert [call.args[0] for call in consumer.commit.await_args_list] == [{"p1": 3}, {"p1": 3}]
+
+
+@pytest.mark.unit
+def test_model_version_number():
+    """Юнит-тест: номер версии модели для сравнения"""
+    assert model_version_number("7") == 7
+    assert model_version_number("local-1700000000") == 1700000000
+    assert model_version_number("latest") is None
+    assert model_version_number(None) is None
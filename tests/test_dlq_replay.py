@@ -0,0 +1,249 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.clients.settings import DLQ_REPLAY_GROUP, DLQ_TOPIC
+from app.repositories.worker import WorkerRepository
+from app.workers.dlq_replay import ReplayFilter, filter_group, main, replay, replay_event
+
+
+def dlq_message(error, timestamp, **event):
+    return {"original_message": event, "error": error, "timestamp": timestamp, "retry_count": 3}
+
+
+class FakeDlqConsumer:
+    """Одна партиция DLQ: getmany отдаёт сообщения пачками по max_records"""
+
+    def __init__(self, values):
+        self._messages = [SimpleNamespace(offset=i, value=v) for i, v in enumerate(values)]
+        self._position = 0
+        self.commit = AsyncMock()
+
+    async def position(self, tp):
+        return self._position
+
+    async def getmany(self, timeout_ms=0, max_records=None):
+        batch = self._messages[self._position : self._position + max_records]
+        self._position += len(batch)
+        return {"dlq-0": batch} if batch else {}
+
+
+@pytest.mark.unit
+def test_replay_filter():
+    """Юнит-тест: отбор по подстроке ошибки и интервалу времени"""
+    message = dlq_message("Объявление 5 не найдено", "2024-05-01T12:00:00", item_id=5)
+    assert ReplayFilter().matches(message)
+    assert ReplayFilter(errors=["НЕ НАЙДЕНО", "timeout"]).matches(message)
+    assert not ReplayFilter(errors=["timeout"]).matches(message)
+    assert ReplayFilter(since=datetime(2024, 5, 1), until=datetime(2024, 5, 2)).matches(message)
+    assert not ReplayFilter(since=datetime(2024, 5, 2)).matches(message)
+    assert not ReplayFilter(until=datetime(2024, 5, 1, 12)).matches(message)
+
+
+@pytest.mark.unit
+def test_replay_event_resets_retry_count():
+    """Юнит-тест: исходное событие возвращается с нулевым счётчиком попыток"""
+    message = dlq_message("err", "2024-05-01T12:00:00", item_id=5, task_id=7, retry_count=2)
+    message["original_message"]["retry_at"] = 1.0
+
+    assert replay_event(message) == {"item_id": 5, "task_id": 7, "retry_count": 0}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_replay_sends_matching_messages_in_batches():
+    """Юнит-тест: отобранные сообщения уходят пачками, задачи сбрасываются до отправки"""
+    values = [
+        dlq_message("timeout", "2024-05-01T12:00:00", item_id=i, task_id=100 + i)
+        for i in range(5)
+    ]
+    values.append(dlq_message("не найдено", "2024-05-01T12:00:00", item_id=99))
+    values.append(dlq_message("timeout", "2024-05-01T12:00:00", item_id=50))
+    consumer = FakeDlqConsumer(values)
+    producer = AsyncMock()
+    repo = AsyncMock()
+    repo.reset_failed_tasks.return_value = 1
+
+    stats = await replay(
+        consumer, producer, repo, {"dlq-0": len(values)}, ReplayFilter(["timeout"]), batch_size=3
+    )
+
+    assert (stats.scanned, stats.matched, stats.replayed) == (7, 6, 6)
+    assert producer.send_many.await_count == 3
+    sent = [event for call in producer.send_many.await_args_list for event in call.args[1]]
+    assert [event["item_id"] for event in sent] == [0, 1, 2, 3, 4, 50]
+    assert repo.reset_failed_tasks.await_args_list[0].args == ([100, 101, 102], [])
+    assert repo.reset_failed_tasks.await_args_list[2].args == ([], [50])
+    assert consumer.commit.await_count == 3
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_replay_stops_at_end_offsets_from_start():
+    """Юнит-тест: попавшие в DLQ после старта сообщения не повторяются и не коммитятся"""
+    values = [
+        dlq_message("timeout", "2024-05-01T12:00:00", item_id=i, task_id=100 + i)
+        for i in range(5)
+    ]
+    consumer = FakeDlqConsumer(values)
+    producer = AsyncMock()
+    repo = AsyncMock()
+    repo.reset_failed_tasks.return_value = 1
+
+    stats = await replay(consumer, producer, repo, {"dlq-0": 3}, ReplayFilter(), batch_size=2)
+
+    assert (stats.scanned, stats.replayed) == (3, 3)
+    sent = [event for call in producer.send_many.await_args_list for event in call.args[1]]
+    assert [event["item_id"] for event in sent] == [0, 1, 2]
+    assert [call.args for call in consumer.commit.await_args_list] == [
+        ({"dlq-0": 2},),
+        ({"dlq-0": 3},),
+    ]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_replay_dry_run_sends_nothing():
+    """Юнит-тест: dry-run только считает сообщения"""
+    values = [dlq_message("timeout", "2024-05-01T12:00:00", item_id=1, task_id=1)]
+    consumer = FakeDlqConsumer(values)
+    producer = AsyncMock()
+    repo = AsyncMock()
+
+    stats = await replay(consumer, producer, repo, {"dlq-0": 1}, ReplayFilter(), dry_run=True)
+
+    assert stats.matched == 1
+    producer.send_many.assert_not_awaited()
+    repo.reset_failed_tasks.assert_not_awaited()
+    consumer.commit.assert_not_awaited()
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_reset_failed_tasks(db_connection, test_ad, test_task):
+    """Интеграционный тест: упавшие задачи возвращаются в pending, готовые не трогаются"""
+    completed = await db_connection.fetchval(
+        "INSERT INTO moderation_results (item_id, status) VALUES ($1, 'completed') RETURNING id",
+        test_ad,
+    )
+    await db_connection.execute(
+        "UPDATE moderation_results SET status = 'failed', error_message = 'x' WHERE id = $1",
+        test_task,
+    )
+
+    reset = await WorkerRepository(db_connection).reset_failed_tasks([test_task, completed])
+
+    assert reset == 1
+    rows = await db_connection.fetch(
+        "SELECT id, status, error_message FROM moderation_results ORDER BY id"
+    )
+    assert {row["id"]: row["status"] for row in rows} == {
+        test_task: "pending",
+        completed: "completed",
+    }
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_reset_failed_tasks_by_item_resets_latest_only(db_connection, test_ad):
+    """Интеграционный тест: по item_id в pending возвращается только последняя упавшая задача"""
+    older, latest = [
+        await db_connection.fetchval(
+            "INSERT INTO moderation_results (item_id, status, error_message) "
+            "VALUES ($1, 'failed', 'x') RETURNING id",
+            test_ad,
+        )
+        for _ in range(2)
+    ]
+
+    reset = await WorkerRepository(db_connection).reset_failed_tasks([], [test_ad])
+
+    assert reset == 1
+    rows = await db_connection.fetch("SELECT id, status FROM moderation_results")
+    assert {row["id"]: row["status"] for row in rows} == {older: "failed", latest: "pending"}
+
+
+class FakeDlqBroker:
+    """DLQ из одной партиции и смещения, закоммиченные группами"""
+
+    def __init__(self, values):
+        self.values = values
+        self.committed = {}
+
+    def consumer(self, **config):
+        return FakeGroupConsumer(self, config["group_id"])
+
+
+class FakeGroupConsumer:
+    """AIOKafkaConsumer с ручным назначением: читает с позиции своей группы"""
+
+    def __init__(self, broker: FakeDlqBroker, group: str):
+        self._broker = broker
+        self._group = group
+        self._position = broker.committed.get(group, 0)
+        self._tp = None
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def topics(self):
+        return {DLQ_TOPIC}
+
+    def partitions_for_topic(self, topic):
+        return {0}
+
+    def assign(self, partitions):
+        [self._tp] = partitions
+
+    async def end_offsets(self, partitions):
+        return {tp: len(self._broker.values) for tp in partitions}
+
+    async def position(self, tp):
+        return self._position
+
+    async def getmany(self, timeout_ms=0, max_records=None):
+        messages = [
+            SimpleNamespace(offset=offset, value=value)
+            for offset, value in enumerate(self._broker.values)
+        ][self._position : self._position + max_records]
+        self._position += len(messages)
+        return {self._tp: messages} if messages else {}
+
+    async def commit(self, offsets=None):
+        self._broker.committed[self._group] = offsets[self._tp] if offsets else self._position
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_filtered_replay_keeps_skipped_messages_for_next_run():
+    """Юнит-тест: запуск с фильтром не сдвигает позицию основной группы"""
+    broker = FakeDlqBroker(
+        [
+            dlq_message("timeout", "2024-05-01T12:00:00", item_id=1, task_id=1),
+            dlq_message("не найдено", "2024-05-01T12:00:00", item_id=2, task_id=2),
+        ]
+    )
+    repo = AsyncMock()
+    repo.reset_failed_tasks.return_value = 1
+
+    async def run(*argv):
+        with patch("app.workers.dlq_replay.AIOKafkaConsumer", broker.consumer), patch(
+            "app.workers.dlq_replay.KafkaProducer", return_value=AsyncMock()
+        ), patch("app.workers.dlq_replay.create_pg_pool", AsyncMock()), patch(
+            "app.workers.dlq_replay.WorkerRepository", return_value=repo
+        ):
+            return await main(list(argv))
+
+    filtered = await run("--error", "timeout")
+    unfiltered = await run()
+
+    assert (filtered.scanned, filtered.replayed) == (2, 1)
+    assert (unfiltered.scanned, unfiltered.replayed) == (2, 2)
+    assert filter_group(DLQ_REPLAY_GROUP, ReplayFilter(["timeout"])) in broker.committed
+    assert broker.committed[DLQ_REPLAY_GROUP] == 2
+    assert filter_group(DLQ_REPLAY_GROUP, ReplayFilter()) == DLQ_REPLAY_GROUP
@@ -0,0 +1,90 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.inference.batcher import MicroBatcher
+from app.inference.executor import QUEUE_DEPTH, RUN_TIME, InferenceExecutor
+from app.inference.scorer import LogisticScorer
+from app.model import train_model
+from app.routers.utils import get_prediction, predict_proba
+
+
+@pytest.fixture
+def model():
+    return LogisticScorer.from_model(train_model())
+
+
+@pytest.fixture
+def features():
+    return np.random.default_rng(3).random((16, 4))
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["none", "thread", "process"])
+async def test_executor_predict_proba(kind, model, features):
+    """Тест: все типы исполнителя дают одинаковый результат"""
+    executor = InferenceExecutor(kind, workers=2)
+    executor.start(model)
+    try:
+        result = await executor.predict_proba(model, features)
+    finally:
+        executor.shutdown()
+
+    assert np.allclose(result, predict_proba(model, features))
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_executor_runs_arbitrary_function(model, features):
+    """Тест: run выполняет произвольную функцию и учитывает время в метриках"""
+    executor = InferenceExecutor("thread")
+    executor.start(model)
+    runs_before = RUN_TIME.count()
+    try:
+        proba = await executor.run(get_prediction, model, features[:1])
+    finally:
+        executor.shutdown()
+
+    assert proba == pytest.approx(predict_proba(model, features[:1])[0])
+    assert RUN_TIME.count() == runs_before + 1
+    assert QUEUE_DEPTH.value() == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_process_executor_set_model(model, features):
+    """Тест: после замены модели пул процессов использует новую модель"""
+    executor = InferenceExecutor("process")
+    executor.start(model)
+    new_model = LogisticScorer(-model.coef_, -model.intercept_, model.classes_)
+    try:
+        executor.set_model(new_model)
+        result = await executor.predict_proba(new_model, features)
+    finally:
+        executor.shutdown()
+
+    assert np.allclose(result, predict_proba(new_model, features))
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_batcher_with_executor(model, features):
+    """Тест: батчер вызывает модель через исполнитель"""
+    executor = InferenceExecutor("thread")
+    executor.start(model)
+    batcher = MicroBatcher(executor.predict_proba, max_batch_size=32, max_wait_ms=10)
+    try:
+        results = await asyncio.gather(*(batcher.predict(model, row[None, :]) for row in features))
+    finally:
+        await batcher.stop()
+        executor.shutdown()
+
+    assert np.allclose(results, predict_proba(model, features))
+
+
+@pytest.mark.unit
+def test_executor_unknown_kind():
+    with pytest.raises(ValueError):
+        InferenceExecutor("gpu")
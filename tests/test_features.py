@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from app.routers.utils import prepare_features, prepare_features_batch
+
+ROWS = [
+    {"is_verified_seller": True, "images_qty": 3, "description": "abc", "category": 1},
+    {"is_verified_seller": False, "images_qty": 0, "description": "", "category": 100},
+    {"is_verified_seller": False, "images_qty": 10, "description": "x" * 7000, "category": 50},
+    {"is_verified_seller": True, "images_qty": None, "description": None, "category": 0},
+]
+
+
+@pytest.mark.unit
+def test_batch_matches_scalar():
+    """Тест: пакетная подготовка признаков совпадает с построчной"""
+    expected = np.vstack([prepare_features(row) for row in ROWS])
+    features = prepare_features_batch(ROWS)
+
+    assert features.shape == (len(ROWS), 4)
+    assert features.dtype == np.float64
+    assert features.flags["C_CONTIGUOUS"]
+    assert np.allclose(features, expected)
+
+
+@pytest.mark.unit
+def test_batch_from_columns():
+    """Тест: столбцы и строки дают одинаковую матрицу"""
+    columns = {
+        "is_verified_seller": np.array([row["is_verified_seller"] for row in ROWS]),
+        "images_qty": [row["images_qty"] for row in ROWS],
+        "description_length": [len(row["description"] or "") for row in ROWS],
+        "category": np.array([row["category"] for row in ROWS]),
+    }
+
+    assert np.allclose(prepare_features_batch(columns), prepare_features_batch(ROWS))
+
+
+@pytest.mark.unit
+def test_batch_clips_out_of_range_values():
+    """Тест: нормированные признаки ограничены отрезком [0, 1]"""
+    columns = {
+        "is_verified_seller": [False, True],
+        "images_qty": [-5, 100],
+        "description_length": [0, 10**6],
+        "category": [0, 100],
+    }
+
+    features = prepare_features_batch(columns)
+
+    assert features[:, 1].tolist() == [0.0, 1.0]
+    assert features[:, 2].tolist() == [0.0, 1.0]
+
+
+@pytest.mark.unit
+def test_batch_matches_scalar_on_edge_values():
+    """Тест: на граничных значениях построчные и пакетные признаки совпадают"""
+    rows = [
+        {"is_verified_seller": True, "images_qty": images_qty, "description": "x", "category": 5}
+        for images_qty in (-5, -1, None, 0, 20, 21, 1000)
+    ]
+
+    expected = np.vstack([prepare_features(row) for row in rows])
+
+    assert np.array_equal(prepare_features_batch(rows), expected)
+    assert expected[:, 1].tolist() == [0.0, 0.0, 0.0, 0.0, 1.0, 1.0, 1.0]
+
+
+@pytest.mark.unit
+def test_batch_empty():
+    """Тест: пустой набор даёт пустую матрицу нужной ширины"""
+    assert prepare_features_batch([]).shape == (0, 4)
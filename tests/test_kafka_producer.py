@@ -0,0 +1,117 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from aiokafka.structs import TopicPartition
+
+from app.clients.kafka import BATCH_MESSAGES, DELIVERY_ERRORS, KafkaProducer, item_key
+
+
+class FakeAIOKafkaProducer:
+    """Копит сообщения; ack() подтверждает их одним батчем, как брокер"""
+
+    def __init__(self, **config):
+        self.config = config
+        self.pending = []
+        self.keys = []
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def send(self, topic, value, key=None):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((topic, value, future))
+        self.keys.append(key)
+        return future
+
+    def ack(self, error=None):
+        for offset, (topic, _, future) in enumerate(self.pending):
+            if error:
+                future.set_exception(error)
+            else:
+                tp = TopicPartition(topic, 0)
+                future.set_result(SimpleNamespace(topic_partition=tp, offset=offset))
+        self.pending = []
+
+
+async def started_producer(**kwargs) -> KafkaProducer:
+    producer = KafkaProducer("localhost:9092", **kwargs)
+    with patch("app.clients.kafka.AIOKafkaProducer", FakeAIOKafkaProducer):
+        await producer.start()
+    return producer
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_producer_config_and_batch_metric():
+    """Юнит-тест: настройки батчинга передаются продюсеру, размер батча учитывается"""
+    producer = await started_producer(linger_ms=20, compression="gzip", acks=1)
+    assert producer._producer.config["linger_ms"] == 20
+    assert producer._producer.config["compression_type"] == "gzip"
+    assert producer._producer.config["acks"] == 1
+
+    batches = BATCH_MESSAGES.count(topic="moderation")
+    deliveries = [await producer.send("moderation", {"item_id": i}) for i in range(3)]
+    assert not any(delivery.done() for delivery in deliveries)
+
+    producer._producer.ack()
+    await asyncio.gather(*deliveries)
+    await asyncio.sleep(0)
+
+    assert BATCH_MESSAGES.count(topic="moderation") == batches + 1
+    assert BATCH_MESSAGES.sum(topic="moderation") >= 3
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_producer_backpressure():
+    """Юнит-тест: при заполненном буфере send ждёт подтверждения предыдущих"""
+    producer = await started_producer(max_buffered=2)
+    await producer.send("moderation", {"item_id": 1})
+    await producer.send("moderation", {"item_id": 2})
+
+    third = asyncio.create_task(producer.send("moderation", {"item_id": 3}))
+    await asyncio.sleep(0.01)
+    assert not third.done()
+
+    producer._producer.ack()
+    await asyncio.wait_for(third, 1)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_send_moderation_request_without_wait():
+    """Юнит-тест: wait=False возвращает неподтверждённую доставку, ошибка считается"""
+    producer = await started_producer()
+    errors = DELIVERY_ERRORS.value(topic="moderation")
+
+    delivery = await producer.send_moderation_request(1, task_id=2, wait=False)
+    assert not delivery.done()
+
+    producer._producer.ack(error=RuntimeError("broker down"))
+    with pytest.raises(RuntimeError):
+        await delivery
+    await asyncio.sleep(0)
+    assert DELIVERY_ERRORS.value(topic="moderation") == errors + 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_messages_keyed_by_item_id():
+    """Юнит-тест: запросы модерации и пачки отправляются с ключом item_id"""
+    producer = await started_producer()
+
+    await producer.send_moderation_request(42, task_id=1, wait=False)
+    sending = asyncio.create_task(
+        producer.send_many("moderation", [{"item_id": 7}, {"item_id": 8}], [b"7", None])
+    )
+    await asyncio.sleep(0)
+    producer._producer.ack()
+    await sending
+
+    assert producer._producer.keys == [item_key(42), b"7", None]
+    assert item_key(42) == b"42"
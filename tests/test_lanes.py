@@ -0,0 +1,180 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.workers.commits import RebalanceHandoff
+from app.workers.lanes import OffsetTracker, PartitionLanes, consume_partitioned
+
+
+@pytest.mark.unit
+def test_offset_tracker_waits_for_earlier_offsets():
+    """Юнит-тест: смещение не коммитится, пока не завершены предыдущие"""
+    tracker = OffsetTracker()
+    for offset in (10, 11, 12):
+        tracker.start("p0", offset)
+
+    tracker.finish("p0", 11)
+    assert tracker.committable() == {}
+
+    tracker.finish("p0", 10)
+    assert tracker.committable() == {"p0": 12}
+    assert tracker.committable() == {}
+
+    tracker.finish("p0", 12)
+    assert tracker.committable() == {"p0": 13}
+    assert tracker.pending() == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_lanes_keep_order_within_partition():
+    """Юнит-тест: порядок внутри партиции сохраняется, партиции идут параллельно"""
+    processed = []
+
+    async def handler(item):
+        partition, index = item
+        # Ранние сообщения медленнее: без очередей по партициям порядок бы нарушился
+        await asyncio.sleep(0.01 * (3 - index))
+        processed.append(item)
+
+    lanes = PartitionLanes(handler, max_in_flight=10)
+    for index in range(3):
+        for partition in ("p0", "p1"):
+            await lanes.submit(partition, index, (partition, index))
+    await lanes.drain()
+    await lanes.close()
+
+    for partition in ("p0", "p1"):
+        assert [i for p, i in processed if p == partition] == [0, 1, 2]
+    assert lanes.tracker.committable() == {"p0": 3, "p1": 3}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_lanes_bound_in_flight():
+    """Юнит-тест: одновременно обрабатывается не больше max_in_flight сообщений"""
+    running = 0
+    peak = 0
+
+    async def handler(item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    lanes = PartitionLanes(handler, max_in_flight=3)
+    for partition in range(10):
+        await lanes.submit(partition, 0, None)
+    await lanes.drain()
+    await lanes.close()
+
+    assert peak == 3
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_lanes_propagate_handler_error():
+    """Юнит-тест: ошибка обработчика не коммитится и пробрасывается из submit"""
+
+    async def handler(item):
+        raise RuntimeError("DB down")
+
+    lanes = PartitionLanes(handler, max_in_flight=1, max_pending=1)
+    await lanes.submit("p0", 0, None)
+    with pytest.raises(RuntimeError):
+        await lanes.submit("p0", 1, None)
+    await lanes.close()
+
+    assert lanes.tracker.committable() == {}
+
+
+class RevokingConsumer:
+    """Две партиции; во время обработки p0 партиция отзывается через listener"""
+
+    def __init__(self, handoff: RebalanceHandoff, started: asyncio.Event):
+        self._handoff = handoff
+        self._started = started
+        self._polls = 0
+        self._assigned = {"p0", "p1"}
+        self.commits = []
+
+    def assignment(self):
+        return set(self._assigned)
+
+    async def getmany(self, timeout_ms=0, max_records=None):
+        self._polls += 1
+        if self._polls == 1:
+            return {
+                "p0": [SimpleNamespace(offset=5, value="a")],
+                "p1": [SimpleNamespace(offset=7, value="b")],
+            }
+        if self._polls == 2:
+            await self._started.wait()
+            await self._handoff.on_partitions_revoked({"p0"})
+            self._assigned.discard("p0")
+            return {"p1": [SimpleNamespace(offset=8, value="c")]}
+        raise StopAsyncIteration()
+
+    async def commit(self, offsets=None):
+        if set(offsets) - self._assigned:
+            raise RuntimeError(f"Partition {offsets} is not assigned")
+        self.commits.append(dict(offsets))
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_consume_partitioned_hands_off_revoked_partition():
+    """Юнит-тест: при отзыве партиции её сообщения дорабатываются и коммитятся"""
+    started = asyncio.Event()
+    handled = []
+
+    async def handler(value):
+        if value == "a":
+            started.set()
+            await asyncio.sleep(0.01)
+        handled.append(value)
+
+    handoff = RebalanceHandoff()
+    consumer = RevokingConsumer(handoff, started)
+    with pytest.raises(StopAsyncIteration):
+        await consume_partitioned(
+            consumer,
+            handler,
+            max_in_flight=4,
+            max_records=10,
+            timeout_ms=0,
+            commit_every=100,
+            commit_interval_ms=60000,
+            handoff=handoff,
+        )
+
+    assert sorted(handled) == ["a", "b", "c"]
+    # При отзыве p0 закоммичена вместе с уже обработанной p1, дальше только p1
+    assert consumer.commits[0] == {"p0": 6, "p1": 8}
+    assert all("p0" not in offsets for offsets in consumer.commits[1:])
+    assert consumer.commits[-1] == {"p1": 9}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_lanes_drop_removes_partition():
+    """Юнит-тест: drop удаляет очередь, обработчик и смещения партиции"""
+    release = asyncio.Event()
+
+    async def handler(item):
+        await release.wait()
+
+    lanes = PartitionLanes(handler, max_in_flight=1, max_pending=2)
+    await lanes.submit("p0", 0, None)
+    await lanes.submit("p0", 1, None)
+    await asyncio.sleep(0)
+
+    await lanes.drop(["p0"])
+
+    assert lanes._queues == {} and lanes._tasks == {}
+    assert lanes.tracker.pending() == 0
+    # Места отменённых сообщений освобождены
+    await asyncio.wait_for(lanes.submit("p1", 0, None), 1)
+    await lanes.close()
@@ -0,0 +1,57 @@
+import pytest
+
+from app.workers.local_cache import ENTRIES, HIT_RATIO, LRUCache, PartitionCaches
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.unit
+def test_lru_cache_evicts_least_recent_and_expired():
+    """Юнит-тест: вытесняется давно не использованная запись, просроченные не отдаются"""
+    clock = FakeClock()
+    cache = LRUCache(max_size=2, ttl=10, clock=clock)
+    cache.put(1, "a")
+    cache.put(2, "b")
+    assert cache.get(1) == "a"
+    cache.put(3, "c")
+
+    assert cache.get(2) is None
+    assert cache.get(1) == "a" and cache.get(3) == "c"
+
+    clock.now = 10
+    assert cache.get(1) is None
+    assert len(cache) == 1
+
+
+@pytest.mark.unit
+def test_partition_caches_report_hit_ratio_per_partition():
+    """Юнит-тест: у каждой партиции свой кэш и своя доля попаданий"""
+    caches = PartitionCaches("test-partitions", max_size=10, ttl=60)
+    caches.put(0, 1, "row")
+    assert caches.get(0, 1) == "row"
+    assert caches.get(0, 2) is None
+    assert caches.get(1, 1) is None
+    assert caches.get(None, 1) is None
+
+    caches.report()
+    assert HIT_RATIO.value(cache="test-partitions", partition=0) == 0.5
+    assert HIT_RATIO.value(cache="test-partitions", partition=1) == 0.0
+    assert ENTRIES.value(cache="test-partitions", partition=0) == 1
+
+    caches.retain([1])
+    assert caches.get(0, 1) is None
+    assert ENTRIES.value(cache="test-partitions", partition=0) == 0
+
+
+@pytest.mark.unit
+def test_partition_caches_disabled():
+    """Юнит-тест: max_size=0 отключает кэш"""
+    caches = PartitionCaches("test-disabled", max_size=0, ttl=60)
+    caches.put(0, 1, "row")
+    assert caches.get(0, 1) is None
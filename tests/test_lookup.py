@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from app.inference.lookup import LookupTableScorer
+from app.inference.scorer import LogisticScorer, select_backend
+from app.model import train_model
+from app.routers.utils import lookup_prediction, prepare_features, prepare_features_batch
+
+
+@pytest.fixture(scope="module")
+def live_model():
+    return LogisticScorer.from_model(train_model())
+
+
+@pytest.fixture(scope="module")
+def exact_table(live_model):
+    return LookupTableScorer(live_model, description_step=1)
+
+
+@pytest.mark.unit
+def test_exact_table_matches_model(exact_table, live_model):
+    """Тест: без квантования таблица совпадает с моделью с точностью float32"""
+    assert exact_table.verify(sample_size=2000) < 1e-6
+
+
+@pytest.mark.unit
+def test_quantized_table_within_tolerance(live_model):
+    """Тест: квантованная ось длины описания даёт малое отклонение"""
+    table = LookupTableScorer(live_model, description_step=50)
+    assert table.verify(sample_size=2000) < 1e-3
+
+
+@pytest.mark.unit
+def test_score_row_matches_prepare_features(exact_table, live_model):
+    row = {"is_verified_seller": False, "images_qty": 2, "description": "x" * 123, "category": 7}
+
+    expected = live_model.predict_proba(prepare_features(row))[0, 1]
+    assert exact_table.score_row(row) == pytest.approx(expected, abs=1e-6)
+    assert lookup_prediction(exact_table, row) == exact_table.score_row(row)
+
+
+@pytest.mark.unit
+def test_out_of_domain_falls_back_to_model(exact_table, live_model):
+    """Тест: значения вне домена не ищутся в таблице"""
+    row = {"is_verified_seller": True, "images_qty": 15, "description": "", "category": 1}
+    assert exact_table.score_row(row) is None
+
+    features = prepare_features(row)
+    assert np.allclose(exact_table.predict_proba(features), live_model.predict_proba(features))
+
+
+@pytest.mark.unit
+def test_vectorized_predict_proba(exact_table, live_model):
+    """Тест: векторизованный путь совпадает с моделью на доменных и произвольных строках"""
+    rng = np.random.default_rng(5)
+    rows = [
+        {
+            "is_verified_seller": bool(rng.integers(0, 2)),
+            "images_qty": int(rng.integers(0, 11)),
+            "description_length": int(rng.integers(0, 7000)),
+            "category": int(rng.integers(0, 101)),
+        }
+        for _ in range(200)
+    ]
+    features = np.vstack([prepare_features_batch(rows), rng.random((20, 4))])
+
+    assert np.allclose(
+        exact_table.predict_proba(features), live_model.predict_proba(features), atol=1e-6
+    )
+
+
+@pytest.mark.unit
+def test_lookup_prediction_ignores_other_models(live_model):
+    row = {"is_verified_seller": True, "images_qty": 1, "description": "", "category": 1}
+    assert lookup_prediction(live_model, row) is None
+
+
+@pytest.mark.unit
+def test_select_backend_lookup_rebuilds_for_new_model():
+    """Тест: таблица строится заново для каждой загруженной модели (в т.ч. при перезагрузке)"""
+    first = select_backend(train_model(), "lookup")
+    base = first.model
+    second = select_backend(LogisticScorer(-base.coef_, -base.intercept_, base.classes_), "lookup")
+
+    assert isinstance(first, LookupTableScorer)
+    assert isinstance(second, LookupTableScorer)
+    assert not np.allclose(first.table, second.table)
+
+
+@pytest.mark.unit
+def test_table_is_picklable(live_model):
+    """Тест: таблицу можно передать в пул процессов инференса"""
+    import pickle
+
+    table = LookupTableScorer(live_model, description_step=100)
+    restored = pickle.loads(pickle.dumps(table))
+
+    assert restored.score(1, 2, 300, 4) == table.score(1, 2, 300, 4)
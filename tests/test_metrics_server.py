@@ -0,0 +1,43 @@
+import asyncio
+from collections import namedtuple
+from functools import partial
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.workers.metrics_server import MetricsServer, update_partition_lag
+
+TopicPartition = namedtuple("TopicPartition", "topic partition")
+
+
+async def http_get(port: int, path: str) -> str:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response.decode()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_partition_lag():
+    """Юнит-тест: /metrics отдаёт лаг по партициям, посчитанный при запросе"""
+    consumer = MagicMock()
+    consumer.assignment.return_value = {TopicPartition("moderation", 0)}
+    consumer.highwater.return_value = 120
+    consumer.position = AsyncMock(return_value=100)
+
+    server = MetricsServer(
+        "127.0.0.1", 0, before_render=partial(update_partition_lag, consumer)
+    )
+    await server.start()
+    try:
+        response = await http_get(server.port, "/metrics")
+        missing = await http_get(server.port, "/")
+    finally:
+        await server.stop()
+
+    assert response.startswith("HTTP/1.1 200 OK")
+    assert 'worker_partition_lag{topic="moderation",partition="0"} 20.0' in response
+    assert missing.startswith("HTTP/1.1 404")
@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.model import load_model_cached, train_model
+
+
+@pytest.fixture
+def model_version():
+    return SimpleNamespace(version="3", run_id="run-3", source="models:/m-3")
+
+
+@pytest.mark.unit
+def test_cold_then_warm_start(tmp_path, model_version):
+    """Тест: первая загрузка идёт в MLflow, повторная — из локального кэша"""
+    model = train_model()
+    features = np.random.default_rng(4).random((5, 4))
+
+    with patch("app.model.mlflow.sklearn.load_model", return_value=model) as mlflow_load:
+        cold = load_model_cached("moderation-model", model_version, cache_dir=tmp_path)
+        warm = load_model_cached("moderation-model", model_version, cache_dir=tmp_path)
+
+    mlflow_load.assert_called_once_with("models:/moderation-model/3")
+    assert np.allclose(cold.predict_proba(features), warm.predict_proba(features))
+    assert len(list((tmp_path / "objects").iterdir())) == 1
+
+
+@pytest.mark.unit
+def test_corrupted_cache_is_reloaded(tmp_path, model_version):
+    """Тест: при несовпадении контрольной суммы модель перезагружается из MLflow"""
+    model = train_model()
+
+    with patch("app.model.mlflow.sklearn.load_model", return_value=model) as mlflow_load:
+        load_model_cached("moderation-model", model_version, cache_dir=tmp_path)
+        for path in (tmp_path / "objects").iterdir():
+            path.write_bytes(b"corrupted")
+        load_model_cached("moderation-model", model_version, cache_dir=tmp_path)
+
+    assert mlflow_load.call_count == 2
+
+
+@pytest.mark.unit
+def test_new_run_for_same_version_is_not_served_from_cache(tmp_path, model_version):
+    """Тест: запись кэша привязана к run_id версии реестра"""
+    model = train_model()
+
+    with patch("app.model.mlflow.sklearn.load_model", return_value=model) as mlflow_load:
+        load_model_cached("moderation-model", model_version, cache_dir=tmp_path)
+        model_version.run_id = "run-3-recreated"
+        load_model_cached("moderation-model", model_version, cache_dir=tmp_path)
+
+    assert mlflow_load.call_count == 2
@@ -1,3 +1,4 @@
+import asyncio
 from http import HTTPStatus
 from unittest.mock import AsyncMock, patch
 
@@ -125,7 +126,7 @@ async def test_async_predict_success_unit(
     mock_request.app.state.kafka_producer.send_moderation_request = AsyncMock()
 
     mock_ads_repository.get_ad_id.return_value = 456
-    mock_moderation_repository.create_task.return_value = 789
+    mock_moderation_repository.get_or_create_task.return_value = (789, True)
 
     with (
         patch("app.routers.moderation.AdsRepository", return_value=mock_ads_repository),
@@ -139,6 +140,62 @@ async def test_async_predict_success_unit(
         assert response.task_id == 789
         assert response.status == "pending"
         mock_ads_repository.get_ad_id.assert_called_once_with(123)
+        mock_request.app.state.kafka_producer.send_moderation_request.assert_called_once_with(
+            456, task_id=789, wait=True
+        )
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_async_predict_marks_failed_on_late_delivery_error(
+    mock_request, mock_ads_repository, mock_moderation_repository
+):
+    """Тест: без ожидания подтверждения ошибка доставки помечает задачу failed позже"""
+    delivery = asyncio.get_running_loop().create_future()
+    mock_request.app.state.kafka_producer = AsyncMock()
+    mock_request.app.state.kafka_producer.send_moderation_request.return_value = delivery
+    mock_ads_repository.get_ad_id.return_value = 456
+    mock_moderation_repository.get_or_create_task.return_value = (789, True)
+
+    with (
+        patch("app.routers.moderation.KAFKA_WAIT_FOR_ACK", False),
+        patch("app.routers.moderation.AdsRepository", return_value=mock_ads_repository),
+        patch(
+            "app.routers.moderation.ModerationRepository", return_value=mock_moderation_repository
+        ),
+    ):
+        response = await async_predict(AdSimpleRequest(item_id=123), mock_request)
+
+    assert response.task_id == 789
+    mock_moderation_repository.mark_task_failed.assert_not_called()
+
+    delivery.set_exception(RuntimeError("broker down"))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    mock_moderation_repository.mark_task_failed.assert_awaited_once()
+    assert mock_moderation_repository.mark_task_failed.await_args.args[0] == 789
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_async_predict_coalesced_unit(
+    mock_request, mock_ads_repository, mock_moderation_repository
+):
+    """Тест: запрос к объявлению с ожидающей задачей не отправляет сообщение повторно"""
+    mock_request.app.state.kafka_producer = AsyncMock()
+    mock_ads_repository.get_ad_id.return_value = 456
+    mock_moderation_repository.get_or_create_task.return_value = (789, False)
+
+    with (
+        patch("app.routers.moderation.AdsRepository", return_value=mock_ads_repository),
+        patch(
+            "app.routers.moderation.ModerationRepository", return_value=mock_moderation_repository
+        ),
+    ):
+        response = await async_predict(AdSimpleRequest(item_id=123), mock_request)
+
+    assert response.task_id == 789
+    mock_request.app.state.kafka_producer.send_moderation_request.assert_not_called()
 
 
 @pytest.mark.unit
@@ -156,6 +213,24 @@ async def test_async_predict_ad_not_found_unit(mock_request, mock_ads_repository
         assert exc_info.value.status_code == HTTPStatus.NOT_FOUND
 
 
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_get_or_create_task_coalesces(db_connection, test_ad, mock_request_with_db):
+    """Интеграционный тест: повторный запрос получает ту же pending-задачу"""
+    repo = ModerationRepository(request=mock_request_with_db)
+
+    first, created = await repo.get_or_create_task(test_ad)
+    second, created_again = await repo.get_or_create_task(test_ad)
+    assert (created, created_again) == (True, False)
+    assert second == first
+
+    await db_connection.execute(
+        "UPDATE moderation_results SET status = 'completed' WHERE id = $1", first
+    )
+    third, created = await repo.get_or_create_task(test_ad)
+    assert created and third != first
+
+
 @pytest.mark.integration
 @pytest.mark.asyncio
 async def test_create_task(db_connection, test_ad, mock_request_with_db):
@@ -0,0 +1,85 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.repositories.moderation import ModerationRepository
+from app.workers.outbox_relay import OUTBOX_AGE, relay_batch
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_outbox_written_with_task(db_connection, test_ad, mock_request_with_db):
+    """Интеграционный тест: запрос модерации попадает в outbox в транзакции с задачей"""
+    repo = ModerationRepository(request=mock_request_with_db)
+
+    task_id, created = await repo.get_or_create_task(test_ad, outbox=True)
+    again, created_again = await repo.get_or_create_task(test_ad, outbox=True)
+
+    assert created and not created_again and again == task_id
+    rows = await db_connection.fetch("SELECT topic, payload FROM moderation_outbox")
+    assert len(rows) == 1
+    assert rows[0]["topic"] == "moderation"
+    assert f'"task_id": {task_id}' in rows[0]["payload"]
+    assert await db_connection.fetchval("SELECT key FROM moderation_outbox") == str(test_ad)
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_relay_batch_publishes_and_deletes(db_connection, mock_request_with_db):
+    """Интеграционный тест: опубликованные строки удаляются, при ошибке остаются"""
+    for item_id in range(3):
+        await db_connection.execute(
+            "INSERT INTO moderation_outbox (topic, key, payload) VALUES ('moderation', $1, $2)",
+            str(item_id),
+            f'{{"item_id": {item_id}}}',
+        )
+    pool = mock_request_with_db.app.state.pg_pool
+
+    failing = AsyncMock()
+    failing.send_many.side_effect = RuntimeError("broker down")
+    with pytest.raises(RuntimeError):
+        await relay_batch(pool, failing, batch_size=2)
+    assert await db_connection.fetchval("SELECT count(*) FROM moderation_outbox") == 3
+
+    producer = AsyncMock()
+    assert await relay_batch(pool, producer, batch_size=2) == 2
+    assert await relay_batch(pool, producer, batch_size=2) == 1
+    assert await relay_batch(pool, producer, batch_size=2) == 0
+
+    sent = [p["item_id"] for call in producer.send_many.await_args_list for p in call.args[1]]
+    assert sent == [0, 1, 2]
+    keys = [key for call in producer.send_many.await_args_list for key in call.args[2]]
+    assert keys == [b"0", b"1", b"2"]
+    assert await db_connection.fetchval("SELECT count(*) FROM moderation_outbox") == 0
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_outbox_written_with_task_batch(db_connection, test_ad, mock_request_with_db):
+    """Интеграционный тест: пачка задач и её запросы в outbox одним INSERT каждая"""
+    repo = ModerationRepository(request=mock_request_with_db)
+
+    tasks = await repo.get_or_create_tasks([test_ad, test_ad], outbox=True)
+
+    [(task_id, created)] = tasks.values()
+    assert created
+    row = await db_connection.fetchrow("SELECT key, payload FROM moderation_outbox")
+    assert row["key"] == str(test_ad)
+    assert f'"task_id": {task_id}' in row["payload"]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_relay_batch_age_from_database_clock(db_connection, mock_request_with_db):
+    """Интеграционный тест: возраст outbox считается в БД и не зависит от часового пояса"""
+    await db_connection.execute("SET TIME ZONE 'Asia/Vladivostok'")
+    try:
+        await db_connection.execute(
+            "INSERT INTO moderation_outbox (topic, payload, created_at) "
+            "VALUES ('moderation', '{}'::jsonb, LOCALTIMESTAMP - interval '30 seconds')"
+        )
+        await relay_batch(mock_request_with_db.app.state.pg_pool, AsyncMock(), batch_size=10)
+    finally:
+        await db_connection.execute("RESET TIME ZONE")
+
+    assert 30 <= OUTBOX_AGE.value() < 60
@@ -1,4 +1,5 @@
 from http import HTTPStatus
+from unittest.mock import patch
 
 import pytest
 
@@ -53,3 +54,67 @@ def test_is_violation_logic(app_client, base_ad_data):
 def test_client_without_model(app_client_without_model, base_ad_data):
     response = app_client_without_model.post("/predict", json=base_ad_data)
     assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+
+
+@pytest.mark.unit
+def test_predict_batch_keeps_order(app_client, base_ad_data):
+    items = []
+    for images_qty, is_verified_seller in [(0, False), (5, True), (10, False)]:
+        data = base_ad_data.copy()
+        data["images_qty"] = images_qty
+        data["is_verified_seller"] = is_verified_seller
+        items.append(data)
+
+    response = app_client.post("/predict/batch", json={"items": items})
+    assert response.status_code == HTTPStatus.OK
+
+    json_data = response.json()
+    assert json_data["errors"] == []
+    assert len(json_data["results"]) == len(items)
+
+    for item, result in zip(items, json_data["results"]):
+        single = app_client.post("/predict", json=item).json()
+        assert result["probability"] == pytest.approx(single["probability"])
+        assert result["is_violation"] == single["is_violation"]
+
+
+@pytest.mark.unit
+def test_predict_batch_partial_errors(app_client, base_ad_data):
+    invalid = base_ad_data.copy()
+    invalid["is_verified_seller"] = "да"
+    items = [base_ad_data, invalid, {"item_id": 1}, base_ad_data]
+
+    response = app_client.post("/predict/batch", json={"items": items})
+    assert response.status_code == HTTPStatus.OK
+
+    json_data = response.json()
+    assert [error["index"] for error in json_data["errors"]] == [1, 2]
+    assert json_data["results"][1] is None
+    assert json_data["results"][2] is None
+    assert json_data["results"][0] == json_data["results"][3]
+
+
+@pytest.mark.unit
+def test_predict_batch_too_large(app_client, base_ad_data):
+    with patch("app.routers.moderation.PREDICT_BATCH_MAX_ITEMS", 2):
+        response = app_client.post("/predict/batch", json={"items": [base_ad_data] * 3})
+    assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+@pytest.mark.unit
+def test_predict_batch_without_model(app_client_without_model, base_ad_data):
+    response = app_client_without_model.post("/predict/batch", json={"items": [base_ad_data]})
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+
+
+@pytest.mark.unit
+def test_predict_returns_model_version(app_client, base_ad_data):
+    from app.main import app
+
+    app.state.model_version = "7"
+    try:
+        response = app_client.post("/predict", json=base_ad_data)
+    finally:
+        app.state.model_version = None
+
+    assert response.json()["model_version"] == "7"
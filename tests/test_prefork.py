@@ -0,0 +1,58 @@
+import os
+import time
+
+import pytest
+
+from app.prefork import Prefork, _fork
+
+
+@pytest.mark.unit
+def test_prefork_restarts_crashed_child():
+    """Тест: упавший процесс перезапускается с тем же индексом"""
+    starts = _fork.Value("i", 0)
+
+    def target(index):
+        with starts.get_lock():
+            starts.value += 1
+            first_start = starts.value == 1
+        if first_start:
+            os._exit(1)
+        time.sleep(60)
+
+    supervisor = Prefork("test", 1, target, restart_delay=0)
+    supervisor.start()
+    try:
+        supervisor.poll(timeout=10)
+        deadline = time.monotonic() + 10
+        while starts.value < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        supervisor.stop(timeout=5)
+
+    assert starts.value == 2
+    assert supervisor.restarts == 1
+    assert supervisor.alive() == 0
+
+
+@pytest.mark.unit
+def test_prefork_children_share_parent_state():
+    """Тест: данные, загруженные в родителе, доступны детям без повторной загрузки"""
+    preloaded = {"model": "loaded-once"}
+    seen = _fork.Array("c", 32)
+
+    def target(index):
+        seen.value = preloaded["model"].encode()
+
+    supervisor = Prefork("test", 1, target, restart_delay=0)
+    supervisor.start()
+    supervisor._stopping = True
+    supervisor.poll(timeout=10)
+    supervisor.stop(timeout=5)
+
+    assert seen.value == b"loaded-once"
+
+
+@pytest.mark.unit
+def test_prefork_requires_processes():
+    with pytest.raises(ValueError):
+        Prefork("test", 0, lambda index: None)
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from app.inference.reloader import MODEL_INFO, ModelReloader, set_model
+from app.inference.scorer import LogisticScorer
+from app.model import train_model
+
+
+@pytest.fixture
+def state():
+    state = SimpleNamespace()
+    set_model(state, LogisticScorer.from_model(train_model()), "1")
+    return state
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_reloader_swaps_model_on_new_version(state):
+    """Тест: при появлении новой версии модель загружается и подменяется"""
+    old_model = state.model
+    new_model = LogisticScorer(-old_model.coef_, -old_model.intercept_, old_model.classes_)
+    executor = Mock()
+
+    reloader = ModelReloader(
+        state, version_fn=lambda: "2", load_fn=lambda version: new_model, executor=executor
+    )
+
+    assert await reloader.check_once() is True
+    assert state.model is new_model
+    assert state.model_version == "2"
+    executor.set_model.assert_called_once_with(new_model)
+    assert MODEL_INFO.value(version="2") == 1
+    assert MODEL_INFO.value(version="1") == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_reloader_keeps_model_for_same_version(state):
+    """Тест: без новой версии модель не загружается"""
+    load_fn = Mock()
+    reloader = ModelReloader(state, version_fn=lambda: "1", load_fn=load_fn)
+
+    assert await reloader.check_once() is False
+    load_fn.assert_not_called()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_reloader_keeps_old_model_when_load_fails(state):
+    """Тест: ошибка загрузки новой версии не ломает текущую модель"""
+    old_model = state.model
+
+    def failing_load(version):
+        raise RuntimeError("MLflow недоступен")
+
+    reloader = ModelReloader(state, version_fn=lambda: "2", load_fn=failing_load)
+
+    with pytest.raises(RuntimeError):
+        await reloader.check_once()
+    assert state.model is old_model
+    assert state.model_version == "1"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_in_flight_reference_survives_swap(state):
+    """Тест: ссылка, полученная до замены, продолжает указывать на старую модель"""
+    in_flight_model = state.model
+    features = np.ones((1, 4))
+    expected = in_flight_model.predict_proba(features)
+
+    new_model = LogisticScorer(np.zeros(4), 0.0, in_flight_model.classes_)
+    reloader = ModelReloader(state, version_fn=lambda: "2", load_fn=lambda version: new_model)
+    await reloader.check_once()
+
+    assert np.allclose(in_flight_model.predict_proba(features), expected)
+    assert state.model is new_model
@@ -0,0 +1,57 @@
+import random
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.clients.settings import MAX_RETRIES, RETRY_TOPIC_PREFIX, TOPIC
+from app.workers.retry import retry_delay, retry_topic, retry_topics, schedule_retry
+from app.workers.retry_worker import relay
+
+
+@pytest.mark.unit
+def test_retry_delay_grows_exponentially_with_jitter():
+    """Юнит-тест: задержка удваивается с каждой попыткой и ограничена сверху"""
+    rng = random.Random(0)
+    for attempt in (1, 2, 3):
+        delay = retry_delay(attempt, base=5, cap=300, rng=rng)
+        assert 5 * 2 ** (attempt - 1) / 2 <= delay <= 5 * 2 ** (attempt - 1)
+
+    assert 150 <= retry_delay(20, base=5, cap=300, rng=rng) <= 300
+
+
+@pytest.mark.unit
+def test_retry_topics_cover_all_attempts():
+    """Юнит-тест: у каждой попытки повтора свой топик"""
+    assert retry_topics() == [f"{RETRY_TOPIC_PREFIX}_{n}" for n in range(1, MAX_RETRIES)]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_schedule_retry_does_not_wait():
+    """Юнит-тест: повтор уходит в топик попытки сразу, с моментом retry_at"""
+    producer = AsyncMock()
+    event = {"item_id": 1, "task_id": 2, "retry_count": 2}
+
+    start = time.time()
+    delay = await schedule_retry(producer, event)
+
+    assert time.time() - start < 0.1
+    topic, payload = producer.send_json.call_args[0]
+    assert topic == retry_topic(2)
+    assert payload["retry_at"] == pytest.approx(start + delay, abs=0.1)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_relay_waits_until_due():
+    """Юнит-тест: retry_worker возвращает событие в основной топик не раньше retry_at"""
+    producer = AsyncMock()
+    due = time.time() + 0.05
+
+    await relay(producer, {"item_id": 1, "retry_count": 1, "retry_at": due})
+
+    assert time.time() >= due
+    producer.send_json.assert_called_once_with(
+        TOPIC, {"item_id": 1, "retry_count": 1}, key=b"1"
+    )
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+from app.inference.scorer import LogisticScorer, select_backend
+from app.model import load_or_train_model, train_model
+
+
+@pytest.fixture
+def sklearn_model():
+    return train_model()
+
+
+@pytest.mark.unit
+def test_scorer_matches_sklearn(sklearn_model):
+    """Тест: вероятности нативного скорера совпадают с sklearn"""
+    scorer = LogisticScorer.from_model(sklearn_model)
+    features = np.random.default_rng(1).random((500, 4))
+
+    assert np.allclose(
+        scorer.predict_proba(features), sklearn_model.predict_proba(features), atol=1e-12
+    )
+    assert np.array_equal(scorer.predict(features), sklearn_model.predict(features))
+
+
+@pytest.mark.unit
+def test_scorer_single_row(sklearn_model):
+    """Тест: скоринг одной строки (основной путь API)"""
+    scorer = LogisticScorer.from_model(sklearn_model)
+    features = np.array([[1.0, 0.15, 0.0008, 0.01]])
+
+    proba = scorer.predict_proba(features)
+    assert proba.shape == (1, 2)
+    assert proba[0, 1] == pytest.approx(sklearn_model.predict_proba(features)[0, 1], abs=1e-12)
+
+
+@pytest.mark.unit
+def test_scorer_extreme_logits_without_overflow():
+    """Тест: сигмоида без переполнения на больших по модулю логитах"""
+    scorer = LogisticScorer(np.array([1.0]), 0.0, np.array([0, 1]))
+    features = np.array([[-1e6], [-800.0], [0.0], [800.0], [1e6]])
+
+    with np.errstate(over="raise"):
+        proba = scorer.predict_proba(features)[:, 1]
+    assert np.allclose(proba, [0.0, 0.0, 0.5, 1.0, 1.0])
+
+
+@pytest.mark.unit
+def test_scorer_rejects_wrong_shape(sklearn_model):
+    scorer = LogisticScorer.from_model(sklearn_model)
+    with pytest.raises(ValueError):
+        scorer.predict_proba(np.zeros((1, 3)))
+
+
+@pytest.mark.unit
+def test_select_backend_falls_back_for_unsupported_models():
+    """Тест: неподдерживаемые модели остаются sklearn-моделями"""
+    features = np.random.default_rng(2).random((50, 4))
+    tree = DecisionTreeClassifier().fit(features, features[:, 0] > 0.5)
+    multiclass = LogisticRegression().fit(features, (features[:, 0] * 3).astype(int))
+
+    assert select_backend(tree, "native") is tree
+    assert select_backend(multiclass, "native") is multiclass
+
+
+@pytest.mark.unit
+def test_select_backend_unknown():
+    with pytest.raises(ValueError):
+        select_backend(train_model(), "onnx")
+
+
+@pytest.mark.unit
+def test_load_or_train_model_native_backend():
+    model = load_or_train_model(use_mlflow="false", backend="native")
+    assert isinstance(model, LogisticScorer)
@@ -0,0 +1,65 @@
+import queue
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app.workers.moderation_worker import cli
+from app.workers.supervisor import StatusBoard, consumer_lag
+
+
+@pytest.mark.unit
+def test_status_board_aggregates_processes():
+    """Юнит-тест: сводка складывает скорость и лаг всех процессов"""
+    reports = queue.Queue()
+    board = StatusBoard(reports)
+    for index, processed, lag in ((0, 0, 5), (1, 0, 7), (0, 100, 3), (1, 50, 2)):
+        time = 10.0 if processed else 0.0
+        reports.put({"index": index, "processed": processed, "lag": lag, "time": time})
+
+    board.drain()
+
+    assert board.rates == {0: 10.0, 1: 5.0}
+    summary = board.summary()
+    assert "процессов=2" in summary
+    assert "msg/s=15.0" in summary
+    assert "lag=5" in summary
+
+
+@pytest.mark.unit
+def test_status_board_skips_rate_after_restart():
+    """Юнит-тест: перезапущенный процесс со сброшенным счётчиком не даёт отрицательной скорости"""
+    reports = queue.Queue()
+    board = StatusBoard(reports)
+    reports.put({"index": 0, "processed": 100, "lag": None, "time": 0.0})
+    reports.put({"index": 0, "processed": 3, "lag": None, "time": 5.0})
+
+    board.drain()
+
+    assert board.rates == {}
+    assert "lag=?" in board.summary()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_consumer_lag_sums_assigned_partitions():
+    """Юнит-тест: лаг — сумма highwater - position по назначенным партициям"""
+    consumer = Mock()
+    consumer.assignment.return_value = {"p0", "p1", "p2"}
+    consumer.highwater.side_effect = {"p0": 10, "p1": 20, "p2": None}.get
+    consumer.position = AsyncMock(side_effect={"p0": 4, "p1": 20}.get)
+
+    assert await consumer_lag(consumer) == 6
+
+
+@pytest.mark.unit
+def test_cli_starts_supervisor_for_several_processes():
+    """Юнит-тест: --processes N > 1 запускает супервизор, иначе один процесс"""
+    with patch("app.workers.moderation_worker.run_supervisor") as supervisor:
+        cli(["--processes", "4"])
+    supervisor.assert_called_once_with(4)
+
+    with patch("app.workers.moderation_worker.main", new=Mock(return_value=None)) as main:
+        with patch("app.workers.moderation_worker.asyncio.run") as run:
+            cli(["--processes", "1"])
+    main.assert_called_once_with()
+    run.assert_called_once()
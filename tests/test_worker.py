@@ -1,8 +1,23 @@
-from unittest.mock import AsyncMock, patch
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
-from app.workers.moderation_worker import MAX_RETRIES, handle_error, main
+from app.inference.executor import InferenceExecutor
+from app.model import load_or_train_model
+from app.repositories.worker import WorkerRepository
+from app.workers.local_cache import LOOKUPS, PartitionCaches
+from app.workers.moderation_worker import (
+    MAX_RETRIES,
+    STAGE_TIME,
+    WorkerRebalanceListener,
+    consume_batches,
+    handle_error,
+    main,
+    process_batch,
+    process_message,
+)
 
 
 @pytest.mark.integration
@@ -138,3 +153,187 @@ async def test_handle_error_function():
     mock_conn.execute.assert_called_once()
     assert "UPDATE moderation_results" in mock_conn.execute.call_args[0][0]
     assert "failed" in mock_conn.execute.call_args[0][0]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_worker_batch_mode(db_connection, test_ad, test_task):
+    """Интеграционный тест пакетного режима: один getmany, один commit на пачку"""
+    mock_msg = AsyncMock()
+    mock_msg.value = {"item_id": test_ad, "task_id": test_task, "retry_count": 0}
+
+    mock_consumer = AsyncMock()
+    mock_consumer.getmany.side_effect = [{"tp": [mock_msg]}, StopAsyncIteration()]
+
+    with patch("app.workers.moderation_worker.WORKER_MODE", "batch"):
+        with patch("app.workers.moderation_worker.AIOKafkaConsumer", return_value=mock_consumer):
+            with patch("app.workers.moderation_worker.KafkaProducer", return_value=AsyncMock()):
+                try:
+                    await main()
+                except StopAsyncIteration:
+                    pass
+
+    mock_consumer.commit.assert_called_once()
+    result = await db_connection.fetchrow(
+        "SELECT status, probability FROM moderation_results WHERE id = $1", test_task
+    )
+    assert result["status"] == "completed"
+    assert result["probability"] is not None
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_process_batch_mixed(db_connection, test_ad, test_task):
+    """Интеграционный тест пачки с найденной задачей, задачей без task_id и битым сообщением"""
+    second_task = await db_connection.fetchval(
+        "INSERT INTO moderation_results (item_id, status) VALUES ($1, 'pending') RETURNING id",
+        test_ad,
+    )
+    mock_producer = AsyncMock()
+    events = [
+        {"item_id": test_ad, "task_id": test_task},
+        {"item_id": test_ad},
+        {"item_id": 999999, "task_id": None, "retry_count": MAX_RETRIES - 1},
+    ]
+
+    await process_batch(
+        SimpleNamespace(model=load_or_train_model(), model_version=None),
+        InferenceExecutor("none"),
+        WorkerRepository(db_connection),
+        mock_producer,
+        events,
+    )
+
+    rows = await db_connection.fetch(
+        "SELECT id, status FROM moderation_results WHERE id = ANY($1::int[])",
+        [test_task, second_task],
+    )
+    assert {row["status"] for row in rows} == {"completed"}
+    mock_producer.send_json.assert_called_once()
+    assert mock_producer.send_json.call_args[0][0] == "moderation_dlq"
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_worker_concurrent_mode(db_connection, test_ad, test_task):
+    """Интеграционный тест параллельного режима: commit смещения после обработки"""
+    mock_msg = AsyncMock()
+    mock_msg.offset = 41
+    mock_msg.value = {"item_id": test_ad, "task_id": test_task, "retry_count": 0}
+
+    mock_consumer = AsyncMock()
+    mock_consumer.getmany.side_effect = [{"tp": [mock_msg]}, StopAsyncIteration()]
+    mock_consumer.assignment = Mock(return_value={"tp"})
+
+    with patch("app.workers.moderation_worker.WORKER_MODE", "concurrent"):
+        with patch("app.workers.moderation_worker.AIOKafkaConsumer", return_value=mock_consumer):
+            with patch("app.workers.moderation_worker.KafkaProducer", return_value=AsyncMock()):
+                try:
+                    await main()
+                except StopAsyncIteration:
+                    pass
+
+    mock_consumer.commit.assert_called_once_with({"tp": 42})
+    result = await db_connection.fetchrow(
+        "SELECT status FROM moderation_results WHERE id = $1", test_task
+    )
+    assert result["status"] == "completed"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_process_message_uses_task_id_without_lookup():
+    """Юнит-тест: сообщение с task_id обрабатывается без поиска pending-задачи"""
+    repo = AsyncMock()
+    repo.get_features.return_value = {
+        "is_verified_seller": True,
+        "images_qty": 3,
+        "description_length": 100,
+        "category": 1,
+    }
+    repo.complete_task.return_value = True
+    event = {"schema_version": 2, "item_id": 1, "task_id": 7}
+    updates = STAGE_TIME.count(stage="update")
+
+    with patch("app.workers.moderation_worker.RESULT_CACHE") as cache:
+        cache.set_many = AsyncMock()
+        await process_message(
+            SimpleNamespace(model=load_or_train_model(), model_version="3"),
+            InferenceExecutor("none"),
+            repo,
+            AsyncMock(),
+            event,
+        )
+
+    repo.find_pending_task.assert_not_called()
+    assert repo.complete_task.call_args[0][0] == 7
+    assert repo.complete_task.call_args[0][3] == 3
+    assert STAGE_TIME.count(stage="update") == updates + 1
+    [cached] = cache.set_many.await_args.args[0]
+    assert cached["task_id"] == 7 and cached["status"] == "completed"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_process_batch_uses_partition_feature_cache():
+    """Юнит-тест: признаки берутся из кэша партиции, в БД — только промахи"""
+    features = {"is_verified_seller": True, "images_qty": 3, "description_length": 100}
+    repo = AsyncMock()
+    repo.get_features_many.side_effect = lambda ids: {
+        item_id: dict(features, category=1) for item_id in ids
+    }
+    repo.complete_tasks.side_effect = lambda task_ids, *args: list(task_ids)
+    state = SimpleNamespace(model=load_or_train_model(), model_version="3")
+    cache = PartitionCaches("features-test", max_size=10, ttl=60)
+
+    with patch("app.workers.moderation_worker.FEATURE_CACHE", cache):
+        with patch("app.workers.moderation_worker.cache_results", AsyncMock()):
+            events = [{"item_id": 1, "task_id": 10}, {"item_id": 2, "task_id": 20}]
+            await process_batch(state, InferenceExecutor("none"), repo, AsyncMock(), events, [0, 1])
+            events = [{"item_id": 1, "task_id": 11}, {"item_id": 3, "task_id": 30}]
+            await process_batch(state, InferenceExecutor("none"), repo, AsyncMock(), events, [0, 1])
+
+    assert [set(call.args[0]) for call in repo.get_features_many.await_args_list] == [{1, 2}, {3}]
+    assert repo.complete_tasks.await_args.args[0] == [11, 30]
+    assert LOOKUPS.value(cache="features-test", partition=0, result="hit") == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_batch_mode_commits_before_partitions_revoked():
+    """Юнит-тест: отзыв партиции посреди пачки ждёт её конца и коммитит до передачи"""
+    polls = iter([{"tp": [SimpleNamespace(value={"item_id": 1}, partition=0)]}])
+
+    async def getmany(**kwargs):
+        for records in polls:
+            return records
+        await asyncio.Event().wait()
+
+    consumer = SimpleNamespace(getmany=getmany, commit=AsyncMock())
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_batch(*args):
+        started.set()
+        await release.wait()
+
+    listener = WorkerRebalanceListener()
+    with patch("app.workers.moderation_worker.process_batch", slow_batch), patch(
+        "app.workers.moderation_worker.WORKER_COMMIT_EVERY_MESSAGES", 1000
+    ), patch("app.workers.moderation_worker.WORKER_COMMIT_INTERVAL_MS", 60000):
+        worker = asyncio.create_task(
+            consume_batches(consumer, None, None, None, None, handoff=listener)
+        )
+        await started.wait()
+        revoke = asyncio.create_task(listener.on_partitions_revoked({"tp"}))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert not revoke.done()
+        consumer.commit.assert_not_awaited()
+
+        release.set()
+        await asyncio.wait_for(revoke, 1)
+        consumer.commit.assert_awaited_once_with()
+
+        worker.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await worker
@@ -0,0 +1,85 @@
+import pytest
+
+from app.clients.postgres import create_pg_pool
+from app.repositories.worker import WorkerRepository, prepare_statements
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_prepare_statements_on_new_connection(db_connection):
+    """Интеграционный тест: горячие запросы подготовлены на каждом соединении пула"""
+    pool = await create_pg_pool(min_size=1, max_size=1, init=prepare_statements)
+    try:
+        prepared = await pool.fetchval("SELECT count(*) FROM pg_prepared_statements")
+    finally:
+        await pool.close()
+
+    assert prepared >= 6
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_repository_replaces_broken_connection(db_connection, test_ad):
+    """Интеграционный тест: запрос переживает разрыв соединения пула"""
+    pool = await create_pg_pool(
+        min_size=1, max_size=1, init=prepare_statements, command_timeout=1
+    )
+    try:
+        pid = await pool.fetchval("SELECT pg_backend_pid()")
+        await db_connection.execute("SELECT pg_terminate_backend($1)", pid)
+
+        row = await WorkerRepository(pool).get_features(test_ad)
+
+        assert row is not None
+        assert await pool.fetchval("SELECT pg_backend_pid()") != pid
+    finally:
+        await pool.close()
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_complete_task_is_idempotent(db_connection, test_task):
+    """Интеграционный тест: повторная доставка не перезаписывает результат"""
+    repo = WorkerRepository(db_connection)
+
+    assert await repo.complete_task(test_task, True, 0.9, model_version=2)
+    assert not await repo.complete_task(test_task, False, 0.1, model_version=2)
+    assert not await repo.complete_task(test_task, False, 0.1, model_version=1)
+
+    row = await db_connection.fetchrow(
+        "SELECT is_violation, model_version FROM moderation_results WHERE id = $1", test_task
+    )
+    assert row["is_violation"] is True
+    assert row["model_version"] == 2
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_newer_model_does_not_overwrite_result(db_connection, test_task):
+    """Интеграционный тест: сообщение, посчитанное после смены модели, не заменяет результат"""
+    repo = WorkerRepository(db_connection)
+    await repo.complete_task(test_task, True, 0.9, model_version=1)
+
+    assert await repo.complete_tasks([test_task], [False], [0.2], model_version=3) == []
+    assert not await repo.complete_task(test_task, False, 0.2, model_version=3)
+
+    row = await db_connection.fetchrow(
+        "SELECT is_violation, model_version FROM moderation_results WHERE id = $1", test_task
+    )
+    assert row["is_violation"] is True
+    assert row["model_version"] == 1
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_fail_does_not_overwrite_completed(db_connection, test_task):
+    """Интеграционный тест: поздняя ошибка не затирает готовый результат"""
+    repo = WorkerRepository(db_connection)
+    await repo.complete_task(test_task, True, 0.9, model_version=1)
+
+    await repo.fail_task(test_task, "timeout")
+
+    status = await db_connection.fetchval(
+        "SELECT status FROM moderation_results WHERE id = $1", test_task
+    )
+    assert status == "completed"